@@ -6,6 +6,7 @@ const Endpoints = [
     `${BASE_API_URL}/api/issues`,
     `${BASE_API_URL}/api/biography`,
     `${BASE_API_URL}/api/summarize`,
+    `${BASE_API_URL}/api/summarize/stream`,
 ];
 
 async function defaultFetch(endpoint) {
@@ -50,7 +51,39 @@ async function fetchResults(endpoint, queryText, topK) {
     }
 }
 
-async function summarizePoliticalContext(endpoint,promptText) {
+// Splits a Server-Sent Events body into {event, data} objects as chunks arrive.
+async function* readServerSentEvents(response) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = "message";
+            let data = "";
+            block.split("\n").forEach((line) => {
+                if (line.startsWith("event: ")) event = line.slice(7);
+                else if (line.startsWith("data: ")) data += line.slice(6);
+            });
+            yield { event, data: data ? JSON.parse(data) : null };
+        }
+    }
+}
+
+// Streams /api/summarize/stream. Optional handlers are called as data arrives:
+//   onSources({articles, executive_orders})  - retrieved documents, right away
+//   onSynopses({articles, executive_orders}) - same documents with llm_synopses
+//   onToken(htmlSoFar)                       - the LLM answer as it is generated
+// Resolves to the same {llm_response, articles, executive_orders} as before.
+async function summarizePoliticalContext(endpoint, promptText, handlers = {}) {
     try {
         const response = await fetch(endpoint, {
             method: "POST",
@@ -67,15 +100,29 @@ async function summarizePoliticalContext(endpoint,promptText) {
             throw new Error(`API Error: ${error.error || response.statusText}`);
         }
 
-        const data = await response.json();
-        console.log("LLM Response:", data.llm_response);
-
         const responseDict = {
-            "llm_response": data.llm_response,
-            "articles": data.articles,
-            "executive_orders": data.executive_orders,
+            "llm_response": "",
+            "articles": [],
+            "executive_orders": [],
         }
 
+        for await (const { event, data } of readServerSentEvents(response)) {
+            if (event === "sources" || event === "synopses") {
+                responseDict.articles = data.articles;
+                responseDict.executive_orders = data.executive_orders;
+                const handler = event === "sources" ? handlers.onSources : handlers.onSynopses;
+                if (handler) handler(data);
+            } else if (event === "token") {
+                responseDict.llm_response += data.text;
+                if (handlers.onToken) handlers.onToken(responseDict.llm_response);
+            } else if (event === "done") {
+                responseDict.llm_response = data.llm_response;
+            } else if (event === "error") {
+                throw new Error(`API Error: ${data.error}`);
+            }
+        }
+
+        console.log("LLM Response:", responseDict.llm_response);
         return responseDict;
 
     } catch (error) {
@@ -93,16 +140,36 @@ async function fetchExecutive(queryText, topK) {
     return await fetchResults(Endpoints[1], queryText, topK);
 }
 
+// Follows the cursor through every page of /api/issues. Unchanged pages are
+// revalidated with the browser's cached ETag and come back as 304s.
 async function fetchIssues() {
-    return await defaultFetch(Endpoints[2]);
+    const issues = [];
+    let after = null;
+
+    do {
+        const url = new URL(Endpoints[2], window.location.origin);
+        if (after !== null) url.searchParams.append("after", after);
+
+        const page = await defaultFetch(url.toString());
+        if (!page) return issues.length ? issues : null;
+        issues.push(...page.issues);
+        after = page.next;
+    } while (after !== null);
+
+    return issues;
+}
+
+// One issue with its stored llm_summary, articles and executive_orders
+async function fetchIssue(issueId) {
+    return await defaultFetch(`${Endpoints[2]}/${encodeURIComponent(issueId)}`);
 }
 
 async function fetchBiography(queryText, topK) {
     return await fetchResults(Endpoints[3], queryText, topK);
 }
 
-async function fetchSummary(promptText) {
-    return await summarizePoliticalContext(Endpoints[4], promptText);
+async function fetchSummary(promptText, handlers = {}) {
+    return await summarizePoliticalContext(Endpoints[5], promptText, handlers);
 }
 
 
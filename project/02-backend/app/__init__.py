@@ -1,13 +1,29 @@
 # app/__init__.py
 import os
+import time
 from flask import Flask, redirect
 from flask_cors import CORS
 from app.routes.api_routes import api_bp
 from app.routes.llm_routes import llm_bp
 from app.config import DevelopmentConfig, ProductionConfig
+from app.services.admission import init_admission
+from app.services.compression import init_compression
+from app.services.db import init_mongo_client
+from app.services.embedding import (
+    configure_document_cache,
+    configure_embedding_cache,
+    configure_search_backend,
+    load_embedding_snapshots,
+    warm_up_embeddings,
+)
+from app.services.embedding_model import configure_model
+from app.services.index_refresh import start_index_refreshers
+from app.services.issues import configure_issues
+from app.services.llm import init_llm_pool
 
 
 def create_app():
+    started = time.perf_counter()
     app = Flask(__name__)
 
     @app.route("/")
@@ -26,8 +42,49 @@ def create_app():
         MONGO_URI=config.MONGO_URI,
         MONGO_INITDB_ROOT_USERNAME=config.MONGO_INITDB_ROOT_USERNAME,
         MONGO_INITDB_ROOT_PASSWORD=config.MONGO_INITDB_ROOT_PASSWORD,
+        MONGO_MAX_POOL_SIZE=config.MONGO_MAX_POOL_SIZE,
+        MONGO_MIN_POOL_SIZE=config.MONGO_MIN_POOL_SIZE,
+        MONGO_CONNECT_TIMEOUT_MS=config.MONGO_CONNECT_TIMEOUT_MS,
+        MONGO_SERVER_SELECTION_TIMEOUT_MS=config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        MONGO_SOCKET_TIMEOUT_MS=config.MONGO_SOCKET_TIMEOUT_MS,
         GOOGLE_API_KEY=config.GOOGLE_API_KEY,
+        LLM_MAX_CONCURRENCY=config.LLM_MAX_CONCURRENCY,
+        LLM_TIMEOUT=config.LLM_TIMEOUT,
+        LLM_SYNOPSIS_DEADLINE=config.LLM_SYNOPSIS_DEADLINE,
+        SUMMARY_CACHE_SIZE=config.SUMMARY_CACHE_SIZE,
+        SUMMARY_CACHE_TTL=config.SUMMARY_CACHE_TTL,
+        SYNOPSIS_CACHE_ENABLED=config.SYNOPSIS_CACHE_ENABLED,
         FRONTEND_ORIGINS=config.FRONTEND_ORIGINS,
+        LLM_ROUTE_CONCURRENCY=config.LLM_ROUTE_CONCURRENCY,
+        LLM_ROUTE_QUEUE=config.LLM_ROUTE_QUEUE,
+        SEARCH_ROUTE_CONCURRENCY=config.SEARCH_ROUTE_CONCURRENCY,
+        SEARCH_ROUTE_QUEUE=config.SEARCH_ROUTE_QUEUE,
+        ROUTE_QUEUE_TIMEOUT=config.ROUTE_QUEUE_TIMEOUT,
+        EMBEDDING_CACHE_SIZE=config.EMBEDDING_CACHE_SIZE,
+        EMBEDDING_CACHE_TTL=config.EMBEDDING_CACHE_TTL,
+        EMBEDDING_CACHE_DIR=config.EMBEDDING_CACHE_DIR,
+        EMBEDDING_CACHE_DIR_SIZE=config.EMBEDDING_CACHE_DIR_SIZE,
+        EMBEDDING_SNAPSHOT_DIR=config.EMBEDDING_SNAPSHOT_DIR,
+        EMBEDDING_PRELOAD=config.EMBEDDING_PRELOAD,
+        EMBEDDING_BACKEND=config.EMBEDDING_BACKEND,
+        EMBEDDING_ONNX_FILE=config.EMBEDDING_ONNX_FILE,
+        SEARCH_SNIPPET_LENGTH=config.SEARCH_SNIPPET_LENGTH,
+        DOCUMENT_CACHE_SIZE=config.DOCUMENT_CACHE_SIZE,
+        DOCUMENT_CACHE_TTL=config.DOCUMENT_CACHE_TTL,
+        SEARCH_BATCH_MAX_QUERIES=config.SEARCH_BATCH_MAX_QUERIES,
+        ISSUES_PAGE_SIZE=config.ISSUES_PAGE_SIZE,
+        ISSUES_MAX_PAGE_SIZE=config.ISSUES_MAX_PAGE_SIZE,
+        ISSUES_VERSION_TTL=config.ISSUES_VERSION_TTL,
+        COMPRESS_ENABLED=config.COMPRESS_ENABLED,
+        COMPRESS_MIN_SIZE=config.COMPRESS_MIN_SIZE,
+        COMPRESS_LEVEL=config.COMPRESS_LEVEL,
+        INDEX_REFRESH_ENABLED=config.INDEX_REFRESH_ENABLED,
+        INDEX_REFRESH_INTERVAL=config.INDEX_REFRESH_INTERVAL,
+        INDEX_REFRESH_AFTER_FORK=config.INDEX_REFRESH_AFTER_FORK,
+        VECTOR_BACKEND=config.VECTOR_BACKEND,
+        IVF_NLIST=config.IVF_NLIST,
+        IVF_NPROBE=config.IVF_NPROBE,
+        IVF_PQ_M=config.IVF_PQ_M,
     )
 
     # Set up CORS using the correct frontend origins
@@ -41,5 +98,22 @@ def create_app():
 
     app.register_blueprint(api_bp)
     app.register_blueprint(llm_bp)
+    init_admission(app)
+    init_compression(app)
 
+    # One pooled Mongo client per process, shared by every request
+    init_mongo_client(app)
+
+    init_llm_pool(app)
+    configure_issues(app)
+    configure_model(app.config["EMBEDDING_BACKEND"], app.config["EMBEDDING_ONNX_FILE"])
+    configure_embedding_cache(app)
+    configure_document_cache(app)
+    configure_search_backend(app)
+    load_embedding_snapshots(app)
+    if app.config["EMBEDDING_PRELOAD"]:
+        warm_up_embeddings(app)
+    start_index_refreshers(app)
+
+    app.logger.info(f"App created in {(time.perf_counter() - started) * 1000:.0f}ms")
     return app
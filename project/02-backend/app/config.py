@@ -22,11 +22,86 @@ class Config:
         self.MONGO_INITDB_ROOT_USERNAME = os.getenv("MONGO_INITDB_ROOT_USERNAME")
         self.MONGO_INITDB_ROOT_PASSWORD = os.getenv("MONGO_INITDB_ROOT_PASSWORD")
         self.GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+        # Gemini call limits (timeouts in seconds)
+        self.LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        self.LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+        self.LLM_SYNOPSIS_DEADLINE = float(os.getenv("LLM_SYNOPSIS_DEADLINE", "45"))
+        self.SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "256"))
+        self.SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", "3600"))
+        self.SYNOPSIS_CACHE_ENABLED = (
+            os.getenv("SYNOPSIS_CACHE_ENABLED", "true").lower() == "true"
+        )
         self.FRONTEND_ORIGINS = [
             origin.strip()
             for origin in os.getenv("FRONTEND_ORIGINS", "").split(",")
             if origin
         ]
+        # Per-process admission control by route class: concurrent requests,
+        # how many more may wait, and for how long (seconds) before a 503.
+        # 0 concurrency disables the limit.
+        self.LLM_ROUTE_CONCURRENCY = int(os.getenv("LLM_ROUTE_CONCURRENCY", "64"))
+        self.LLM_ROUTE_QUEUE = int(os.getenv("LLM_ROUTE_QUEUE", "64"))
+        self.SEARCH_ROUTE_CONCURRENCY = int(
+            os.getenv("SEARCH_ROUTE_CONCURRENCY", "16")
+        )
+        self.SEARCH_ROUTE_QUEUE = int(os.getenv("SEARCH_ROUTE_QUEUE", "64"))
+        self.ROUTE_QUEUE_TIMEOUT = float(os.getenv("ROUTE_QUEUE_TIMEOUT", "5"))
+        # Shared Mongo connection pool
+        self.MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+        self.MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+        self.MONGO_CONNECT_TIMEOUT_MS = int(
+            os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")
+        )
+        self.MONGO_SERVER_SELECTION_TIMEOUT_MS = int(
+            os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")
+        )
+        self.MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+        # Query embedding cache (EMBEDDING_CACHE_DIR enables the shared disk store)
+        self.EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+        self.EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+        self.EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "")
+        self.EMBEDDING_CACHE_DIR_SIZE = int(os.getenv("EMBEDDING_CACHE_DIR_SIZE", "20000"))
+        # Query embedding inference: "torch", "onnx" or "onnx-int8"
+        self.EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+        self.EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "")
+        # Load the embedding model and indexes in create_app (e.g. pre-fork)
+        self.EMBEDDING_PRELOAD = (
+            os.getenv("EMBEDDING_PRELOAD", "false").lower() == "true"
+        )
+        # Memory-mapped index snapshots written by export_embedding_snapshot.py
+        self.EMBEDDING_SNAPSHOT_DIR = os.getenv("EMBEDDING_SNAPSHOT_DIR", "")
+        # Search results: text snippet length (0 = full text) and the
+        # cache of documents fetched for the top hits
+        self.SEARCH_SNIPPET_LENGTH = int(os.getenv("SEARCH_SNIPPET_LENGTH", "1000"))
+        self.DOCUMENT_CACHE_SIZE = int(os.getenv("DOCUMENT_CACHE_SIZE", "1024"))
+        self.DOCUMENT_CACHE_TTL = float(os.getenv("DOCUMENT_CACHE_TTL", "600"))
+        # Most queries accepted by one POST /api/search/batch
+        self.SEARCH_BATCH_MAX_QUERIES = int(
+            os.getenv("SEARCH_BATCH_MAX_QUERIES", "1000")
+        )
+        # GET /api/issues pages and how long the collection version behind
+        # their ETags is reused (seconds)
+        self.ISSUES_PAGE_SIZE = int(os.getenv("ISSUES_PAGE_SIZE", "50"))
+        self.ISSUES_MAX_PAGE_SIZE = int(os.getenv("ISSUES_MAX_PAGE_SIZE", "200"))
+        self.ISSUES_VERSION_TTL = float(os.getenv("ISSUES_VERSION_TTL", "5"))
+        # gzip/brotli response compression (level 1-9)
+        self.COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "true").lower() == "true"
+        self.COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+        self.COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+        # Background sync of the in-memory search indexes
+        self.INDEX_REFRESH_ENABLED = (
+            os.getenv("INDEX_REFRESH_ENABLED", "true").lower() == "true"
+        )
+        self.INDEX_REFRESH_INTERVAL = float(os.getenv("INDEX_REFRESH_INTERVAL", "30"))
+        # Only start the refreshers in forked children (the preloading master never polls)
+        self.INDEX_REFRESH_AFTER_FORK = (
+            os.getenv("INDEX_REFRESH_AFTER_FORK", "false").lower() == "true"
+        )
+        # "exact" (brute force) or "ivf" (approximate) similarity search
+        self.VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "exact").lower()
+        self.IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))
+        self.IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+        self.IVF_PQ_M = int(os.getenv("IVF_PQ_M", "0"))
 
     # Add more keys like API keys, DB names, etc.
 
@@ -42,6 +117,11 @@ class DevelopmentConfig(Config):
         print("MONGO_INITDB_ROOT_PASSWORD:", self.MONGO_INITDB_ROOT_PASSWORD)
         print("GOOGLE_API_KEY:", self.GOOGLE_API_KEY)
         print("FRONTEND_ORIGINS:", self.FRONTEND_ORIGINS)
+        print("MONGO_MAX_POOL_SIZE:", self.MONGO_MAX_POOL_SIZE)
+        print("INDEX_REFRESH_ENABLED:", self.INDEX_REFRESH_ENABLED)
+        print("INDEX_REFRESH_INTERVAL:", self.INDEX_REFRESH_INTERVAL)
+        print("VECTOR_BACKEND:", self.VECTOR_BACKEND)
+        print("EMBEDDING_BACKEND:", self.EMBEDDING_BACKEND)
 
 
 class ProductionConfig(Config):
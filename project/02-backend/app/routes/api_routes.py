@@ -1,9 +1,22 @@
-from flask import Blueprint, jsonify, request
-from app.services.db import get_mongo_client
+from flask import Blueprint, current_app, jsonify, make_response, request
+from pymongo.errors import PyMongoError
+from app.services.admission import gates
+from app.services.db import ping_mongo
 from app.services.embedding import (
+    SEARCH_INDEXES,
+    article_index,
+    document_cache,
+    embedding_cache,
+    executive_index,
+    get_query_embedding,
+    get_query_embeddings,
+    search_documents_batch,
+    search_filters,
     similarity_search_articles,
     similarity_search_executive,
 )
+from app.services.issues import get_issue, issues_etag, list_issues, replace_issue
+from app.services.llm import summary_cache, summary_flight
 
 api_bp = Blueprint("api", __name__, url_prefix="/api")
 
@@ -13,6 +26,32 @@ def health_check():
     return jsonify({"message": "Hello World!", "status": "OK"}), 200
 
 
+@api_bp.route("/health", methods=["GET"])
+def readiness_check():
+    try:
+        ping_mongo()
+    except PyMongoError as e:
+        return jsonify({"status": "UNAVAILABLE", "mongo": str(e)}), 503
+    return jsonify({"status": "OK", "mongo": "OK"}), 200
+
+
+@api_bp.route("/stats", methods=["GET"])
+def cache_stats():
+    return (
+        jsonify(
+            {
+                "embedding_cache": embedding_cache.stats(),
+                "document_cache": document_cache.stats(),
+                "summary_cache": dict(
+                    summary_cache.stats(), coalesced=summary_flight.coalesced
+                ),
+                "admission": {name: gate.stats() for name, gate in gates.items()},
+            }
+        ),
+        200,
+    )
+
+
 @api_bp.route("/issues", methods=["POST"])
 def replace_existing_issue():
     data = request.get_json()
@@ -28,38 +67,62 @@ def replace_existing_issue():
         return jsonify({"error": "Missing required fields"}), 400
 
     try:
-        client = get_mongo_client()
-        db = client["WhatTheGovDoin"]
-        issue_collection = db["issues"]
         data["_id"] = int(data["_id"])
-        result = issue_collection.replace_one({"_id": data["_id"]}, data, upsert=False)
-        if result.matched_count == 0:
+        if not replace_issue(data):
             return jsonify({"error": "No issue found with the specified _id"}), 404
         return jsonify({"message": "Issue successfully replaced."}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def not_modified(etag):
+    """
+    304 response when the client already holds this ETag, else None. Checked
+    before any issue is read, so polling unchanged data only costs the
+    (cached) collection version check.
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = make_response("", 304)
+        response.set_etag(etag, weak=True)
+        response.cache_control.no_cache = True
+        return response
+    return None
+
+
+def conditional_json(payload, etag):
+    response = make_response(jsonify(payload), 200)
+    response.set_etag(etag, weak=True)
+    # Browsers keep the copy but revalidate it on every fetch.
+    response.cache_control.no_cache = True
+    return response
+
+
 @api_bp.route("/issues", methods=["GET"])
 def get_all_issues():
-    client = get_mongo_client()
-    db = client["WhatTheGovDoin"]
-    issue_collection = db["issues"]
+    after = request.args.get("after", type=int)
+    limit = request.args.get("limit", type=int)
     try:
-        issues = list(
-            issue_collection.find(
-                {},
-                {
-                    "_id": 1,
-                    "issue": 1,
-                    "summary": 1,
-                    "llm_summary": 1,
-                    "articles": 1,
-                    "executive_orders": 1,
-                },
-            )
-        )
-        return jsonify(issues), 200
+        etag = issues_etag("list", after, limit)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+        issues, next_cursor = list_issues(after, limit)
+        return conditional_json({"issues": issues, "next": next_cursor}, etag)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@api_bp.route("/issues/<int:issue_id>", methods=["GET"])
+def get_issue_detail(issue_id):
+    try:
+        etag = issues_etag("detail", issue_id)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+        issue = get_issue(issue_id)
+        if issue is None:
+            return jsonify({"error": "No issue found with the specified _id"}), 404
+        return conditional_json(issue, etag)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -71,10 +134,16 @@ def fetch_biography():
     if not query_text:
         return jsonify({"error": "query_text parameter is required"}), 400
 
+    # Encode once and reuse the vector for both collections
+    query_embedding = get_query_embedding(query_text)
     return jsonify(
         {
-            "articles": similarity_search_articles(query_text, top_k),
-            "executive orders": similarity_search_executive(query_text, top_k),
+            "articles": similarity_search_articles(
+                query_text, top_k, query_embedding=query_embedding
+            ),
+            "executive orders": similarity_search_executive(
+                query_text, top_k, query_embedding=query_embedding
+            ),
         }
     )
 
@@ -85,7 +154,12 @@ def fetch_articles_similarity():
     top_k = request.args.get("top_k", default=5, type=int)
     if not query_text:
         return jsonify({"error": "query_text parameter is required"}), 400
-    return jsonify(similarity_search_articles(query_text, top_k))
+    try:
+        # e.g. ?createdAt_from=2025-01-20&createdAt_to=2025-03-31
+        filters = search_filters(article_index, request.args)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter: {e}"}), 400
+    return jsonify(similarity_search_articles(query_text, top_k, filters=filters))
 
 
 @api_bp.route("/executive", methods=["GET"])
@@ -94,4 +168,71 @@ def fetch_executive_similarity():
     top_k = request.args.get("top_k", default=5, type=int)
     if not query_text:
         return jsonify({"error": "query_text parameter is required"}), 400
-    return jsonify(similarity_search_executive(query_text, top_k))
+    try:
+        # e.g. ?signing_date_from=2025-01-01 or ?executive_order_number=14151
+        filters = search_filters(executive_index, request.args)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter: {e}"}), 400
+    return jsonify(similarity_search_executive(query_text, top_k, filters=filters))
+
+
+@api_bp.route("/search/batch", methods=["POST"])
+def batch_similarity_search():
+    """
+    Many queries against one or more collections in a single call:
+    {"queries": [...], "collections": ["articles", "executive"], "top_k": 5}.
+    Optional "filters" are keyed by collection and take the same parameters
+    as the single-collection routes, e.g.
+    {"executive": {"signing_date_from": "2025-01-01"}}. Returns {"results": [{"query": ..., "articles": [...], ...}, ...]} in
+    query order.
+    """
+    data = request.get_json(silent=True) or {}
+    queries = data.get("queries")
+    collections = data.get("collections") or list(SEARCH_INDEXES)
+    top_k = data.get("top_k", 5)
+
+    if (
+        not isinstance(queries, list)
+        or not queries
+        or not all(isinstance(q, str) and q.strip() for q in queries)
+    ):
+        return jsonify({"error": "queries must be a list of non-empty strings"}), 400
+    max_queries = current_app.config["SEARCH_BATCH_MAX_QUERIES"]
+    if len(queries) > max_queries:
+        return jsonify({"error": f"At most {max_queries} queries per batch"}), 400
+    if not isinstance(collections, list) or not all(
+        isinstance(name, str) and name in SEARCH_INDEXES for name in collections
+    ):
+        return (
+            jsonify({"error": f"collections must be a subset of {sorted(SEARCH_INDEXES)}"}),
+            400,
+        )
+    if isinstance(top_k, bool) or not isinstance(top_k, int) or top_k < 1:
+        return jsonify({"error": "top_k must be a positive integer"}), 400
+    filter_params = data.get("filters") or {}
+    if not isinstance(filter_params, dict) or not all(
+        isinstance(params, dict) for params in filter_params.values()
+    ):
+        return jsonify({"error": "filters must map collections to objects"}), 400
+    try:
+        filters = {
+            name: search_filters(SEARCH_INDEXES[name], filter_params.get(name, {}))
+            for name in collections
+        }
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter: {e}"}), 400
+
+    # One encode call for the whole batch, reused for every collection
+    embeddings = get_query_embeddings(queries)
+    results = [{"query": query} for query in queries]
+    for name in dict.fromkeys(collections):
+        hits = search_documents_batch(
+            SEARCH_INDEXES[name],
+            queries,
+            top_k,
+            query_embeddings=embeddings,
+            filters=filters[name],
+        )
+        for result, collection_hits in zip(results, hits):
+            result[name] = collection_hits
+    return jsonify({"results": results})
@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 from app.services.llm import gemini_summarize as summarize_impl
+from app.services.llm import gemini_summarize_stream as summarize_stream_impl
 
 llm_bp = Blueprint("llm", __name__, url_prefix="/api")
 
@@ -7,3 +8,8 @@ llm_bp = Blueprint("llm", __name__, url_prefix="/api")
 @llm_bp.route("/summarize", methods=["POST"])
 def gemini_summarize():
     return summarize_impl(request)
+
+
+@llm_bp.route("/summarize/stream", methods=["POST"])
+def gemini_summarize_stream():
+    return summarize_stream_impl(request)
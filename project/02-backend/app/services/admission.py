@@ -0,0 +1,128 @@
+import math
+import threading
+from flask import g, jsonify, request
+
+
+class AdmissionGate:
+    """
+    Concurrency limit with a bounded wait queue for one class of routes.
+
+    Up to `limit` requests run at once; up to `queue` more wait (at most
+    `timeout` seconds) for a slot. Anything beyond that is turned away at
+    once, so a burst of slow requests degrades into quick 503s instead of a
+    backlog that holds every worker. limit 0 disables the gate.
+    """
+
+    def __init__(self, name, limit=0, queue=0, timeout=10.0):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._cond = threading.Condition()
+
+    def configure(self, limit, queue, timeout):
+        with self._cond:
+            self.limit = limit
+            self.queue = queue
+            self.timeout = timeout
+            self._cond.notify_all()
+
+    def acquire(self):
+        """Take a slot, waiting if the queue has room. False means rejected."""
+        with self._cond:
+            if not self.limit or self.active < self.limit:
+                self.active += 1
+                return True
+            if self.waiting >= self.queue:
+                self.rejected += 1
+                return False
+            self.waiting += 1
+            try:
+                admitted = self._cond.wait_for(
+                    lambda: not self.limit or self.active < self.limit, self.timeout
+                )
+            finally:
+                self.waiting -= 1
+            if not admitted:
+                self.rejected += 1
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "queue": self.queue,
+                "active": self.active,
+                "waiting": self.waiting,
+                "rejected": self.rejected,
+            }
+
+
+# Route classes share a gate per process. Routes not listed here (issues,
+# health, stats) are never queued.
+gates = {"llm": AdmissionGate("llm"), "search": AdmissionGate("search")}
+ROUTE_CLASSES = {
+    "llm.gemini_summarize": "llm",
+    "llm.gemini_summarize_stream": "llm",
+    "api.fetch_biography": "search",
+    "api.fetch_articles_similarity": "search",
+    "api.fetch_executive_similarity": "search",
+    "api.batch_similarity_search": "search",
+}
+
+
+def busy_response(gate):
+    response = jsonify({"error": f"Too many {gate.name} requests, try again shortly"})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(max(1, math.ceil(gate.timeout)))
+    return response
+
+
+def init_admission(app):
+    """
+    Gate requests by route class. The slot is handed to the response and
+    only released when the server closes it, which for the summary event
+    stream is when the stream ends (or the client goes away).
+    """
+    timeout = app.config["ROUTE_QUEUE_TIMEOUT"]
+    gates["llm"].configure(
+        app.config["LLM_ROUTE_CONCURRENCY"], app.config["LLM_ROUTE_QUEUE"], timeout
+    )
+    gates["search"].configure(
+        app.config["SEARCH_ROUTE_CONCURRENCY"], app.config["SEARCH_ROUTE_QUEUE"], timeout
+    )
+
+    @app.before_request
+    def admit_request():
+        route_class = ROUTE_CLASSES.get(request.endpoint)
+        if route_class is None or request.method == "OPTIONS":
+            return None
+        gate = gates[route_class]
+        if not gate.acquire():
+            return busy_response(gate)
+        g.admission_gate = gate
+        return None
+
+    @app.after_request
+    def hold_until_closed(response):
+        gate = g.pop("admission_gate", None)
+        if gate is not None:
+            response.call_on_close(gate.release)
+        return response
+
+    @app.teardown_request
+    def release_unanswered(exc=None):
+        # Only reached with the slot still held when no response was made.
+        gate = g.pop("admission_gate", None)
+        if gate is not None:
+            gate.release()
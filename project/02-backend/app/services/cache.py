@@ -0,0 +1,212 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with an optional time-to-live per entry.
+
+    maxsize bounds the number of entries (least recently used go first);
+    ttl is in seconds, 0 means entries never expire. Hit/miss counters are
+    kept for the /api/stats route.
+    """
+
+    def __init__(self, maxsize=1024, ttl=0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, maxsize, ttl):
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self._evict()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            self._evict()
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_where(self, predicate):
+        """Remove every entry whose key satisfies predicate(key)."""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+    def _evict(self):
+        while len(self._data) > max(self.maxsize, 0):
+            self._data.popitem(last=False)
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one: the first caller
+    runs fn, everyone else arriving meanwhile waits for and shares its
+    result (or exception).
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"event": threading.Event()}
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call["event"].wait()
+            if "result" not in call:
+                raise call.get("error") or RuntimeError(f"Call for {key!r} was aborted")
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["event"].set()
+
+
+class DiskArrayStore:
+    """
+    Directory of .npy files keyed by a hash of the cache key, so every
+    worker on the host (or a tmpfs / /dev/shm mount) shares one copy.
+    Writes go through a temp file and rename, which makes them atomic.
+
+    The directory is pruned from set() at most every prune_interval
+    seconds: expired files and leftover temp files are deleted, then the
+    oldest files beyond max_entries (0 = unbounded). Any worker may do the
+    pruning; files another worker removed first are skipped.
+    """
+
+    def __init__(self, directory, ttl=0, max_entries=0, prune_interval=60):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self._next_prune = 0.0
+        self._prune_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.npy")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if self.ttl and os.path.getmtime(path) + self.ttl < time.time():
+                self._remove(path)
+                return None
+            return np.load(path)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key, value):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, value)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            self._remove(tmp)
+        if time.monotonic() >= self._next_prune:
+            self.prune()
+
+    def prune(self):
+        """Delete expired and surplus files. Returns how many were removed."""
+        if not self._prune_lock.acquire(blocking=False):
+            return 0
+        try:
+            self._next_prune = time.monotonic() + self.prune_interval
+            now = time.time()
+            # Temp files older than this were left behind by a crashed writer
+            stale_tmp = now - max(self.prune_interval, 60)
+            removed = 0
+            entries = []
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    try:
+                        mtime = entry.stat().st_mtime
+                    except OSError:
+                        continue
+                    if entry.name.endswith(".tmp"):
+                        if mtime < stale_tmp:
+                            removed += self._remove(entry.path)
+                    elif entry.name.endswith(".npy"):
+                        if self.ttl and mtime + self.ttl < now:
+                            removed += self._remove(entry.path)
+                        else:
+                            entries.append((mtime, entry.path))
+            if self.max_entries and len(entries) > self.max_entries:
+                entries.sort()
+                for _, path in entries[: len(entries) - self.max_entries]:
+                    removed += self._remove(path)
+            return removed
+        finally:
+            self._prune_lock.release()
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
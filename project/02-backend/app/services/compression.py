@@ -0,0 +1,67 @@
+"""
+gzip / brotli compression of API responses, negotiated from Accept-Encoding.
+
+Brotli needs `pip install brotli`; without it only gzip is offered. Streamed
+responses (the /api/summarize event stream) are left alone so events still
+reach the browser as they are produced.
+"""
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def choose_encoding(accept_encodings):
+    """Best encoding the client accepts, or None."""
+    offers = ["br", "gzip"] if brotli is not None else ["gzip"]
+    quality = {encoding: accept_encodings[encoding] for encoding in offers}
+    best = max(offers, key=lambda encoding: quality[encoding])
+    return best if quality[best] > 0 else None
+
+
+def compress(data, encoding, level):
+    if encoding == "br":
+        # Brotli quality runs 0-11; map the gzip-style 1-9 level onto it.
+        return brotli.compress(data, quality=min(11, level + 2))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def init_compression(app):
+    if not app.config["COMPRESS_ENABLED"]:
+        return
+    min_size = app.config["COMPRESS_MIN_SIZE"]
+    level = app.config["COMPRESS_LEVEL"]
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or not 200 <= response.status_code < 300
+            or response.status_code == 204
+            or "Content-Encoding" in response.headers
+            or not (response.mimetype or "").startswith(COMPRESSIBLE_TYPES)
+        ):
+            return response
+
+        # Caches must key on Accept-Encoding even when this reply is plain.
+        response.vary.add("Accept-Encoding")
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        response.set_data(compress(data, encoding, level))
+        response.headers["Content-Encoding"] = encoding
+        # The bytes differ per encoding, so a strong validator no longer holds.
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -1,10 +1,75 @@
+import os
+import threading
 from pymongo import MongoClient
 from flask import current_app
 
+# One pooled client per process. MongoClient isn't fork-safe, so a forked
+# worker (gunicorn) notices the pid change and builds its own.
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
 
-def get_mongo_client():
+
+def create_mongo_client(config):
     return MongoClient(
-        f"{current_app.config['MONGO_URI']}?authSource=admin",
-        username=current_app.config["MONGO_INITDB_ROOT_USERNAME"],
-        password=current_app.config["MONGO_INITDB_ROOT_PASSWORD"],
+        f"{config['MONGO_URI']}?authSource=admin",
+        username=config["MONGO_INITDB_ROOT_USERNAME"],
+        password=config["MONGO_INITDB_ROOT_PASSWORD"],
+        maxPoolSize=config["MONGO_MAX_POOL_SIZE"],
+        minPoolSize=config["MONGO_MIN_POOL_SIZE"],
+        connectTimeoutMS=config["MONGO_CONNECT_TIMEOUT_MS"],
+        serverSelectionTimeoutMS=config["MONGO_SERVER_SELECTION_TIMEOUT_MS"],
+        socketTimeoutMS=config["MONGO_SOCKET_TIMEOUT_MS"],
+        # Don't open sockets until first use, so nothing leaks across a fork.
+        connect=False,
     )
+
+
+def init_mongo_client(app):
+    """
+    Create the shared client for this process from the app config.
+    Called from create_app; get_mongo_client() rebuilds it after a fork.
+    """
+    global _client, _client_pid
+    with _client_lock:
+        _client = create_mongo_client(app.config)
+        _client_pid = os.getpid()
+    return _client
+
+
+def get_mongo_client():
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = create_mongo_client(current_app.config)
+                _client_pid = os.getpid()
+    return _client
+
+
+def close_mongo_client():
+    global _client, _client_pid
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
+
+
+def _reset_after_fork():
+    # The parent's client (and possibly a held lock) must not be reused.
+    global _client, _client_pid, _client_lock
+    _client = None
+    _client_pid = None
+    _client_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def ping_mongo():
+    """
+    Round-trip to the server on the shared client. Raises on failure.
+    """
+    get_mongo_client().admin.command("ping")
@@ -1,12 +1,209 @@
+import time
+from datetime import datetime, time as day_time
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from pymongo.errors import PyMongoError
+from app.services.cache import DiskArrayStore, TTLCache
 from app.services.db import get_mongo_client
+from app.services.embedding_model import get_model
+from app.services.snapshot import read_snapshot
+from app.services.vector_backends import make_backend_factory
+from app.services.vector_index import VectorIndex
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+# Loaded lazily on the first search in each process, then reused. They hold
+# ids, vectors and the filterable fields; the documents are fetched for the
+# top hits.
+article_index = VectorIndex("articles", "summary_embedding", date_fields=("createdAt",))
+executive_index = VectorIndex(
+    "executive",
+    "order_text_embedding",
+    date_fields=("signing_date",),
+    exact_fields=("executive_order_number",),
+)
+# Collection names accepted by the batch search route
+SEARCH_INDEXES = {"articles": article_index, "executive": executive_index}
+
+# collection -> (name field, text field, text when missing) for search results
+DOCUMENT_FIELDS = {
+    "articles": ("name", "summary", "No summary"),
+    "executive": ("title", "order_text", "No order text"),
+}
+
+# (collection, _id, snippet length) -> projected document for search results.
+# Sized from config in create_app; entries are dropped when the index
+# refresher sees the document change.
+document_cache = TTLCache()
+snippet_length = 1000
+_snippet_lengths = {0}
+
+
+# Query text -> read-only float32 embedding. Sized from config in create_app.
+embedding_cache = TTLCache()
+embedding_disk_store = None
+
+
+def configure_embedding_cache(app):
+    global embedding_disk_store
+    embedding_cache.configure(
+        app.config["EMBEDDING_CACHE_SIZE"], app.config["EMBEDDING_CACHE_TTL"]
+    )
+    if app.config["EMBEDDING_CACHE_DIR"]:
+        embedding_disk_store = DiskArrayStore(
+            app.config["EMBEDDING_CACHE_DIR"],
+            app.config["EMBEDDING_CACHE_TTL"],
+            max_entries=app.config["EMBEDDING_CACHE_DIR_SIZE"],
+        )
+
+
+def configure_document_cache(app):
+    global snippet_length
+    document_cache.configure(
+        app.config["DOCUMENT_CACHE_SIZE"], app.config["DOCUMENT_CACHE_TTL"]
+    )
+    snippet_length = app.config["SEARCH_SNIPPET_LENGTH"]
+
+
+def configure_search_backend(app):
+    """
+    Point both indexes at the backend selected by VECTOR_BACKEND. Must run
+    before the indexes are loaded for the choice to take effect.
+    """
+    factory = make_backend_factory(
+        app.config["VECTOR_BACKEND"],
+        nlist=app.config["IVF_NLIST"],
+        nprobe=app.config["IVF_NPROBE"],
+        pq_m=app.config["IVF_PQ_M"],
+    )
+    for index in (article_index, executive_index):
+        index.backend_factory = factory
+
+
+def load_embedding_snapshots(app):
+    """
+    Map the exported snapshots under EMBEDDING_SNAPSHOT_DIR (see
+    export_embedding_snapshot.py) into both indexes, read-only. Every worker
+    maps the same files, so they share one page-cache copy and start without
+    scanning Mongo. Indexes without a snapshot are loaded from Mongo as usual.
+    """
+    root = app.config["EMBEDDING_SNAPSHOT_DIR"]
+    if not root:
+        return
+    for index in (article_index, executive_index):
+        start = time.perf_counter()
+        try:
+            snapshot = read_snapshot(root, index.collection_name)
+        except (OSError, ValueError, KeyError) as e:
+            app.logger.warning(f"Ignoring {index.collection_name} snapshot: {e}")
+            continue
+        if snapshot is None:
+            continue
+        ids, matrix, columns, manifest = snapshot
+        if manifest["embedding_field"] != index.embedding_field:
+            app.logger.warning(
+                f"Ignoring {index.collection_name} snapshot of "
+                f"{manifest['embedding_field']}, expected {index.embedding_field}"
+            )
+            continue
+        missing = set(index.metadata.fields) - set(columns)
+        if missing:
+            app.logger.warning(
+                f"Ignoring {index.collection_name} snapshot without "
+                f"{', '.join(sorted(missing))}; re-run export_embedding_snapshot.py"
+            )
+            continue
+        index.load_arrays(ids, matrix, columns, snapshot_info=manifest)
+        app.logger.info(
+            f"Mapped {index.collection_name} snapshot {manifest['version']}: "
+            f"{len(ids)} vectors in {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+
+
+def warm_up_embeddings(app):
+    """
+    Load the embedding model and both search indexes now instead of on the
+    first request. Run it in the gunicorn master (preload_app) so workers
+    inherit them through copy-on-write after forking.
+    """
+    start = time.perf_counter()
+    get_model()
+    model_ms = (time.perf_counter() - start) * 1000
+    for index in (article_index, executive_index):
+        try:
+            get_loaded_index(index)
+        except PyMongoError as e:
+            app.logger.warning(f"Could not preload {index.collection_name} index: {e}")
+    app.logger.info(
+        f"Warm-up done in {(time.perf_counter() - start) * 1000:.0f}ms "
+        f"(model {model_ms:.0f}ms, {len(article_index)} articles, "
+        f"{len(executive_index)} executive orders)"
+    )
+
+
+def normalize_query(text):
+    # all-MiniLM-L6-v2 is uncased and ignores runs of whitespace, so these
+    # variants all encode to the same vector and can share a cache entry.
+    return " ".join(text.split()).lower()
+
+
+def get_query_embedding(text):
+    """
+    Embedding for a search query as a read-only float32 array, served from
+    the LRU cache (then the shared disk store) before running the model.
+    """
+    key = normalize_query(text)
+    embedding = embedding_cache.get(key)
+    if embedding is not None:
+        return embedding
+
+    if embedding_disk_store is not None:
+        embedding = embedding_disk_store.get(key)
+    if embedding is None:
+        embedding = np.asarray(get_model().encode(text), dtype=np.float32)
+        if embedding_disk_store is not None:
+            embedding_disk_store.set(key, embedding)
+
+    embedding.flags.writeable = False
+    embedding_cache.set(key, embedding)
+    return embedding
+
+
+def get_query_embeddings(texts):
+    """
+    Batched get_query_embedding: cached texts are looked up (LRU cache, then
+    the shared disk store), the rest go through the model in a single encode
+    call and are written back to both. Returns one array per text.
+    """
+    keys = [normalize_query(text) for text in texts]
+    embeddings = [embedding_cache.get(key) for key in keys]
+    missing = {}
+    for i, (key, embedding) in enumerate(zip(keys, embeddings)):
+        if embedding is None:
+            missing.setdefault(key, []).append(i)
+
+    def remember(key, embedding):
+        embedding.flags.writeable = False
+        embedding_cache.set(key, embedding)
+        for i in missing.pop(key):
+            embeddings[i] = embedding
+
+    if missing and embedding_disk_store is not None:
+        for key in list(missing):
+            embedding = embedding_disk_store.get(key)
+            if embedding is not None:
+                remember(key, embedding)
+
+    if missing:
+        originals = [texts[positions[0]] for positions in missing.values()]
+        encoded = np.asarray(get_model().encode(originals), dtype=np.float32)
+        for key, embedding in zip(list(missing), encoded):
+            embedding = embedding.copy()
+            if embedding_disk_store is not None:
+                embedding_disk_store.set(key, embedding)
+            remember(key, embedding)
+    return embeddings
 
 
 def get_text_embedding(text):
-    return model.encode(text).tolist()
+    return get_query_embedding(text).tolist()
 
 
 def cosine_similarity(vec_a, vec_b):
@@ -18,41 +215,175 @@ def cosine_similarity(vec_a, vec_b):
     return 0.0 if norm_a == 0 or norm_b == 0 else dot_product / (norm_a * norm_b)
 
 
-def similarity_search_articles(query_text, top_k=5):
-    client = get_mongo_client()
-    collection = client["WhatTheGovDoin"]["articles"]
-    query_embedding = get_text_embedding(query_text)
-    results = []
-    for article in collection.find({}):
-        emb = article.get("summary_embedding")
-        if emb:
-            sim = cosine_similarity(query_embedding, emb)
-            results.append(
-                {
-                    "article_id": article["_id"],
-                    "name": article.get("name", "Unnamed"),
-                    "summary": article.get("summary", "No summary"),
-                    "similarity_score": sim,
-                }
+def get_loaded_index(index):
+    index.ensure_loaded(
+        lambda: get_mongo_client()["WhatTheGovDoin"][index.collection_name]
+    )
+    return index
+
+
+def snippet(text, length):
+    """text cut to at most length characters (0 keeps it whole)."""
+    if not length or not isinstance(text, str) or len(text) <= length:
+        return text
+    return text[:length].rstrip() + "..."
+
+
+def hydrate_documents(collection_name, ids, length):
+    """
+    Fetch the name and text of just the given documents with one $in query,
+    returning {_id: doc}. With length > 0 the text is already cut to that
+    many characters by Mongo, so long executive orders never leave the
+    server whole (the $substrCP projection needs MongoDB 4.4+). Documents
+    are served from document_cache when possible.
+    """
+    name_field, text_field, _ = DOCUMENT_FIELDS[collection_name]
+    _snippet_lengths.add(length)
+    found, missing = {}, []
+    for doc_id in ids:
+        doc = document_cache.get((collection_name, doc_id, length))
+        if doc is None:
+            missing.append(doc_id)
+        else:
+            found[doc_id] = doc
+    if not missing:
+        return found
+
+    projection = {name_field: 1, text_field: 1}
+    if length:
+        # One extra character tells us whether the text was cut.
+        projection[text_field] = {
+            "$substrCP": [{"$ifNull": [f"${text_field}", ""]}, 0, length + 1]
+        }
+    collection = get_mongo_client()["WhatTheGovDoin"][collection_name]
+    for doc in collection.find({"_id": {"$in": missing}}, projection):
+        if text_field in doc:
+            doc[text_field] = snippet(doc[text_field], length)
+        found[doc["_id"]] = doc
+        document_cache.set((collection_name, doc["_id"], length), doc)
+    return found
+
+
+def forget_documents(collection_name, ids=None):
+    """Drop cached documents that changed (all of the collection when ids is None)."""
+    if ids is None:
+        document_cache.discard_where(lambda key: key[0] == collection_name)
+        return
+    for doc_id in ids:
+        for length in list(_snippet_lengths):
+            document_cache.discard((collection_name, doc_id, length))
+
+
+def parse_date_param(value, end_of_day=False):
+    """
+    ISO date or datetime from a request. A bare date used as the end of a
+    range covers that whole day.
+    """
+    if not isinstance(value, str):
+        raise ValueError(f"expected an ISO date, got {value!r}")
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and "T" not in value and " " not in value.strip():
+        parsed = datetime.combine(parsed.date(), day_time.max)
+    return parsed
+
+
+def search_filters(index, params):
+    """
+    Filters for index.search from request parameters (query string args or
+    a JSON object): <date field>_from / <date field>_to (ISO dates, both
+    inclusive) and <exact field> (one or more values, repeated or comma
+    separated). Raises ValueError for malformed values.
+    """
+    filters = {}
+    for field in index.metadata.date_fields:
+        start, end = params.get(f"{field}_from"), params.get(f"{field}_to")
+        if start or end:
+            filters[field] = (
+                parse_date_param(start) if start else None,
+                parse_date_param(end, end_of_day=True) if end else None,
             )
-    return sorted(results, key=lambda x: x["similarity_score"], reverse=True)[:top_k]
+    for field in index.metadata.exact_fields:
+        raw = params.getlist(field) if hasattr(params, "getlist") else params.get(field)
+        if raw is None:
+            continue
+        values = [
+            value.strip()
+            for item in ([raw] if isinstance(raw, (str, int)) else raw)
+            for value in str(item).split(",")
+            if value.strip()
+        ]
+        if values:
+            filters[field] = values
+    return filters
+
+
+def search_documents(
+    index, query_text, top_k, query_embedding=None, length=None, filters=None
+):
+    """
+    Two-phase search: score against the in-memory vectors (ids only), then
+    hydrate the top_k hits from Mongo. length is the text snippet length
+    (SEARCH_SNIPPET_LENGTH by default, 0 for the full text); filters (see
+    search_filters) limit scoring to the matching documents.
+    """
+    if query_embedding is None:
+        query_embedding = get_query_embedding(query_text)
+    hits = get_loaded_index(index).search(query_embedding, top_k, filters)
+    if length is None:
+        length = snippet_length
+    docs = hydrate_documents(index.collection_name, [doc_id for doc_id, _ in hits], length)
+    return search_results(index.collection_name, hits, docs)
+
 
+def search_documents_batch(
+    index, query_texts, top_k, query_embeddings=None, length=None, filters=None
+):
+    """
+    search_documents for many queries at once: one encode call for the texts
+    not cached yet, one matrix-matrix scoring pass over the index, and one
+    $in query for the distinct hits of every query together.
+    """
+    if query_embeddings is None:
+        query_embeddings = get_query_embeddings(query_texts)
+    hit_lists = get_loaded_index(index).search_batch(query_embeddings, top_k, filters)
+    if length is None:
+        length = snippet_length
+    doc_ids = list(dict.fromkeys(doc_id for hits in hit_lists for doc_id, _ in hits))
+    docs = hydrate_documents(index.collection_name, doc_ids, length)
+    return [search_results(index.collection_name, hits, docs) for hits in hit_lists]
 
-def similarity_search_executive(query_text, top_k=5):
-    client = get_mongo_client()
-    collection = client["WhatTheGovDoin"]["executive"]
-    query_embedding = get_text_embedding(query_text)
+
+def search_results(collection_name, hits, docs):
+    """Result dicts for [(id, score), ...] hits, given the hydrated docs."""
+    name_field, text_field, missing_text = DOCUMENT_FIELDS[collection_name]
     results = []
-    for order in collection.find({}):
-        emb = order.get("order_text_embedding")
-        if emb:
-            sim = cosine_similarity(query_embedding, emb)
-            results.append(
-                {
-                    "article_id": order["_id"],
-                    "name": order.get("title", "Unnamed"),
-                    "summary": order.get("order_text", "No order text"),
-                    "similarity_score": sim,
-                }
-            )
-    return sorted(results, key=lambda x: x["similarity_score"], reverse=True)[:top_k]
+    for doc_id, score in hits:
+        doc = docs.get(doc_id)
+        if doc is None:
+            # Deleted after the index last refreshed
+            continue
+        results.append(
+            {
+                "article_id": doc_id,
+                "name": doc.get(name_field, "Unnamed"),
+                "summary": doc.get(text_field, missing_text),
+                "similarity_score": score,
+            }
+        )
+    return results
+
+
+def similarity_search_articles(
+    query_text, top_k=5, query_embedding=None, length=None, filters=None
+):
+    return search_documents(
+        article_index, query_text, top_k, query_embedding, length, filters
+    )
+
+
+def similarity_search_executive(
+    query_text, top_k=5, query_embedding=None, length=None, filters=None
+):
+    return search_documents(
+        executive_index, query_text, top_k, query_embedding, length, filters
+    )
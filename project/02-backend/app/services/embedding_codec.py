@@ -0,0 +1,72 @@
+"""
+Storage formats for document embeddings.
+
+Embeddings are either plain BSON arrays of doubles (the original format) or
+compact BSON Binary values, chosen with EMBEDDING_FORMAT when ingesting.
+Binary values use the user-defined subtype and start with a 4 byte header
+whose first byte names the layout:
+
+    0x01  float32   header + little-endian float32 values
+    0x02  int8      header + float32 scale + int8 values (value * scale)
+
+Also imported directly by 03-db/db_populate, so it must not import anything
+from the app package.
+"""
+import os
+import struct
+import numpy as np
+from bson.binary import Binary
+
+EMBEDDING_FORMATS = ("list", "float32", "int8")
+BINARY_SUBTYPE = 0x80
+HEADER_SIZE = 4
+FLOAT32 = 0x01
+INT8 = 0x02
+LAYOUTS = {"float32": FLOAT32, "int8": INT8}
+
+
+def encode_embedding(vector, fmt=None):
+    """
+    Convert a model output vector to its stored form in the given format
+    (the EMBEDDING_FORMAT environment variable by default).
+    """
+    fmt = fmt or os.getenv("EMBEDDING_FORMAT", "list").lower()
+    vector = np.asarray(vector, dtype=np.float32)
+    if fmt == "list":
+        return vector.tolist()  # Convert embedding to list for storage in MongoDB
+    if fmt not in LAYOUTS:
+        raise ValueError(f"EMBEDDING_FORMAT must be one of {EMBEDDING_FORMATS}, got {fmt!r}")
+
+    header = bytes([LAYOUTS[fmt], 0, 0, 0])
+    if fmt == "float32":
+        payload = vector.astype("<f4").tobytes()
+    else:
+        peak = float(np.abs(vector).max()) if vector.size else 0.0
+        scale = peak / 127 if peak else 1.0
+        quantized = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+        payload = struct.pack("<f", scale) + quantized.tobytes()
+    return Binary(header + payload, BINARY_SUBTYPE)
+
+
+def decode_embedding(value):
+    """
+    Return a stored embedding as a float32 numpy array. float32 Binary
+    values are wrapped without copying (the result is read-only).
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        layout = value[0]
+        if layout == FLOAT32:
+            return np.frombuffer(value, dtype="<f4", offset=HEADER_SIZE)
+        if layout == INT8:
+            scale = np.frombuffer(value, dtype="<f4", count=1, offset=HEADER_SIZE)[0]
+            quantized = np.frombuffer(value, dtype=np.int8, offset=HEADER_SIZE + 4)
+            return quantized.astype(np.float32) * scale
+        raise ValueError(f"Unknown embedding layout {layout:#x}")
+    return np.asarray(value, dtype=np.float32)
+
+
+def embedding_format(value):
+    """Which of EMBEDDING_FORMATS a stored embedding is in."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "float32" if value[0] == FLOAT32 else "int8"
+    return "list"
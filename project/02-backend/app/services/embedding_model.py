@@ -0,0 +1,101 @@
+"""
+The sentence embedding model, loaded once per process on first use.
+
+Shared by the backend (app.services.embedding) and the ingestion scripts
+(03-db/db_populate/embedding.py imports this file directly), so it must not
+import anything from the app package.
+
+The inference backend is chosen with EMBEDDING_BACKEND:
+
+    torch      PyTorch SentenceTransformer (default)
+    onnx       the model's ONNX export, run by ONNX Runtime
+    onnx-int8  the dynamically int8-quantized ONNX export
+
+The ONNX backends need `pip install "sentence-transformers[onnx]"`; without
+it the torch backend is used and a warning is logged.
+"""
+import logging
+import os
+import platform
+import threading
+import time
+
+MODEL_NAME = "all-MiniLM-L6-v2"  # Use the best model for general text embeddings
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+logger = logging.getLogger(__name__)
+
+_model = None
+_lock = threading.Lock()
+load_seconds = None
+settings = {"backend": None, "onnx_file": None}
+
+
+def configure_model(backend=None, onnx_file=None):
+    """
+    Pick the backend used by get_model() (the EMBEDDING_BACKEND and
+    EMBEDDING_ONNX_FILE environment variables otherwise). Must run before
+    the model is first loaded.
+    """
+    settings["backend"] = backend
+    settings["onnx_file"] = onnx_file
+
+
+def default_int8_file():
+    # all-MiniLM-L6-v2 ships quantized exports tuned per instruction set;
+    # the AVX2 one runs on any recent x86 CPU.
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "onnx/model_qint8_arm64.onnx"
+    return "onnx/model_quint8_avx2.onnx"
+
+
+def load_model(backend="torch", onnx_file=None, fallback=True):
+    """
+    Load a fresh SentenceTransformer on the given backend (not cached).
+    With fallback, an ONNX backend that can't be loaded degrades to torch.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"EMBEDDING_BACKEND must be one of {BACKENDS}, got {backend!r}")
+    # Importing torch alone takes seconds, so that is deferred too.
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(MODEL_NAME)
+    file_name = onnx_file or (default_int8_file() if backend == "onnx-int8" else None)
+    model_kwargs = {"file_name": file_name} if file_name else None
+    try:
+        return SentenceTransformer(MODEL_NAME, backend="onnx", model_kwargs=model_kwargs)
+    except (ImportError, TypeError) as e:
+        if not fallback:
+            raise
+        # ImportError: onnxruntime/optimum missing; TypeError: a
+        # sentence-transformers release without backend support.
+        logger.warning(f"Cannot use the {backend} backend ({e}), falling back to torch")
+        return SentenceTransformer(MODEL_NAME)
+
+
+def get_model():
+    """
+    Return the SentenceTransformer, loading it on the first call. Safe to
+    call from many threads at once: only one of them loads the model.
+    """
+    global _model, load_seconds
+    if _model is None:
+        with _lock:
+            if _model is None:
+                backend = (
+                    settings["backend"] or os.getenv("EMBEDDING_BACKEND", "torch")
+                ).lower()
+                onnx_file = settings["onnx_file"] or os.getenv("EMBEDDING_ONNX_FILE") or None
+                start = time.perf_counter()
+                model = load_model(backend, onnx_file)
+                load_seconds = time.perf_counter() - start
+                # Reports what actually loaded, which differs after a fallback.
+                loaded = getattr(model, "backend", "torch")
+                logger.info(f"Loaded {MODEL_NAME} ({loaded}) in {load_seconds:.2f}s")
+                _model = model
+    return _model
+
+
+def model_loaded():
+    return _model is not None
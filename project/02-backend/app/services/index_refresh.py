@@ -0,0 +1,247 @@
+import os
+import threading
+from pymongo.errors import OperationFailure, PyMongoError
+from app.services.db import get_mongo_client
+from app.services.embedding import article_index, executive_index, forget_documents
+
+# Run a full id reconciliation (to catch deletes) every N watermark polls.
+RECONCILE_EVERY = 10
+
+_refreshers = []
+
+
+class IndexRefresher(threading.Thread):
+    """
+    Keeps one VectorIndex in sync with its collection in the background.
+
+    Uses a change stream when Mongo is a replica set. On a standalone server
+    it falls back to polling an _id / updatedAt watermark, plus a periodic
+    id sweep to notice deletes. Either way only the changed documents are
+    patched into the index.
+    """
+
+    def __init__(self, app, index, interval):
+        super().__init__(daemon=True, name=f"index-refresh-{index.collection_name}")
+        self.app = app
+        self.index = index
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.use_change_stream = True
+        self.resume_token = None
+        self.max_id = None
+        self.updated_since = None
+        self.polls = 0
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        with self.app.app_context():
+            collection = get_mongo_client()["WhatTheGovDoin"][
+                self.index.collection_name
+            ]
+            stream = self._open_stream(collection)
+            if stream is None:
+                self._init_watermarks(collection)
+
+            # Warm the index here so the first request doesn't pay for it.
+            try:
+                self.index.ensure_loaded(lambda: collection)
+            except PyMongoError as e:
+                self.app.logger.warning(
+                    f"Initial load of {self.index.collection_name} index failed: {e}"
+                )
+
+            while self.index.snapshot_info is not None and not self.stop_event.is_set():
+                try:
+                    self._catch_up(collection, self.index.snapshot_info)
+                except PyMongoError as e:
+                    self.app.logger.warning(
+                        f"Catching up {self.index.collection_name} snapshot failed: {e}"
+                    )
+                    self.stop_event.wait(self.interval)
+
+            while not self.stop_event.is_set():
+                try:
+                    if self.use_change_stream:
+                        stream = stream or self._open_stream(collection)
+                        if stream is not None:
+                            self._consume_stream(collection, stream)
+                            stream = None
+                            continue
+                        self._init_watermarks(collection)
+                    self._poll(collection)
+                except PyMongoError as e:
+                    self.app.logger.warning(
+                        f"Refreshing {self.index.collection_name} index failed: {e}"
+                    )
+                    stream = None
+                self.stop_event.wait(self.interval)
+
+    def _open_stream(self, collection):
+        try:
+            return collection.watch(
+                # Only what the index holds (id, embedding, metadata) is needed
+                [
+                    {
+                        "$project": {
+                            "operationType": 1,
+                            "documentKey": 1,
+                            "fullDocument._id": 1,
+                            **{
+                                f"fullDocument.{field}": 1
+                                for field in self.index.projection
+                            },
+                        }
+                    }
+                ],
+                full_document="updateLookup",
+                resume_after=self.resume_token,
+                max_await_time_ms=int(self.interval * 1000),
+            )
+        except OperationFailure:
+            # Standalone servers don't support $changeStream.
+            self.app.logger.info(
+                f"Change streams unavailable, polling {self.index.collection_name} "
+                f"every {self.interval}s"
+            )
+            self.use_change_stream = False
+            return None
+
+    def _consume_stream(self, collection, stream):
+        docs, deleted = {}, set()
+        with stream:
+            while not self.stop_event.is_set():
+                change = stream.try_next()
+                if change is None:
+                    # Quiet period: flush what we have so far, and only then
+                    # advance the resume point past it.
+                    self._apply(list(docs.values()), deleted)
+                    docs, deleted = {}, set()
+                    self.resume_token = stream.resume_token
+                    continue
+
+                operation = change["operationType"]
+                if operation in ("insert", "update", "replace"):
+                    doc = change.get("fullDocument")
+                    if doc:
+                        docs[doc["_id"]] = doc
+                        deleted.discard(doc["_id"])
+                elif operation == "delete":
+                    doc_id = change["documentKey"]["_id"]
+                    docs.pop(doc_id, None)
+                    deleted.add(doc_id)
+                elif operation in ("drop", "rename", "invalidate"):
+                    self.index.load(collection)
+                    forget_documents(self.index.collection_name)
+                    docs, deleted = {}, set()
+                    self.resume_token = None
+                    return
+
+    def _init_watermarks(self, collection):
+        if self.max_id is not None or self.updated_since is not None:
+            return
+        newest = collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        self.max_id = newest["_id"] if newest else None
+        latest = collection.find_one(
+            {"updatedAt": {"$ne": None}}, {"updatedAt": 1}, sort=[("updatedAt", -1)]
+        )
+        self.updated_since = latest["updatedAt"] if latest else None
+
+    def _catch_up(self, collection, manifest):
+        """
+        Apply everything that changed after a mapped snapshot was exported:
+        documents past its _id / updatedAt watermarks, and deletes. Runs
+        after the change stream is opened (or watermarks taken), so nothing
+        falls between the two.
+        """
+        watermarks = manifest["watermarks"]
+        query = {}
+        if watermarks.get("max_id") is not None:
+            updated_since = watermarks.get("updated_since")
+            query = {
+                "$or": [
+                    {"_id": {"$gt": watermarks["max_id"]}},
+                    {"updatedAt": {"$ne": None}}
+                    if updated_since is None
+                    else {"updatedAt": {"$gt": updated_since}},
+                ]
+            }
+        docs = list(collection.find(query, self.index.projection))
+        live = {doc["_id"] for doc in collection.find({}, {"_id": 1})}
+        self._apply(docs, set(self.index.doc_ids) - live)
+        self.index.snapshot_info = None
+
+    def _poll(self, collection):
+        projection = dict(self.index.projection, updatedAt=1)
+
+        new_query = {} if self.max_id is None else {"_id": {"$gt": self.max_id}}
+        changed_query = (
+            {"updatedAt": {"$ne": None}}
+            if self.updated_since is None
+            else {"updatedAt": {"$gt": self.updated_since}}
+        )
+        docs = list(collection.find(new_query, projection))
+        docs += list(collection.find(changed_query, projection))
+
+        for doc in docs:
+            if self.max_id is None or doc["_id"] > self.max_id:
+                self.max_id = doc["_id"]
+            updated = doc.get("updatedAt")
+            if updated is not None and (
+                self.updated_since is None or updated > self.updated_since
+            ):
+                self.updated_since = updated
+
+        deleted = set()
+        self.polls += 1
+        if self.polls % RECONCILE_EVERY == 0:
+            live = {doc["_id"] for doc in collection.find({}, {"_id": 1})}
+            deleted = set(self.index.doc_ids) - live
+
+        self._apply(docs, deleted)
+
+    def _apply(self, docs, deleted):
+        if not docs and not deleted:
+            return
+        self.index.apply_changes(docs, deleted)
+        forget_documents(
+            self.index.collection_name, [doc["_id"] for doc in docs] + list(deleted)
+        )
+        self.app.logger.info(
+            f"Patched {self.index.collection_name} index: "
+            f"{len(docs)} upserted, {len(deleted)} removed, {len(self.index)} total"
+        )
+
+
+def start_index_refreshers(app):
+    """
+    Start one background refresher per search index. Threads don't survive
+    a fork, so worker processes restart their own after forking.
+
+    With INDEX_REFRESH_AFTER_FORK the calling process starts none itself:
+    a preloading gunicorn master would otherwise poll Mongo forever, and a
+    refresher caught holding an index or cache lock at fork time would
+    leave that lock held for good in the child.
+    """
+    if not app.config["INDEX_REFRESH_ENABLED"]:
+        return
+
+    def start():
+        _refreshers.clear()
+        for index in (article_index, executive_index):
+            refresher = IndexRefresher(
+                app, index, app.config["INDEX_REFRESH_INTERVAL"]
+            )
+            refresher.start()
+            _refreshers.append(refresher)
+
+    if not app.config["INDEX_REFRESH_AFTER_FORK"]:
+        start()
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=start)
+
+
+def stop_index_refreshers():
+    for refresher in _refreshers:
+        refresher.stop()
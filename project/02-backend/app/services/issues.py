@@ -0,0 +1,91 @@
+import hashlib
+from datetime import datetime
+from app.services.cache import TTLCache
+from app.services.db import get_mongo_client
+
+# What the issue list needs; the detail route adds the generated fields.
+LIST_PROJECTION = {"_id": 1, "issue": 1, "summary": 1}
+DETAIL_PROJECTION = dict(
+    LIST_PROJECTION, llm_summary=1, articles=1, executive_orders=1
+)
+
+# The collection version is re-read at most once per ISSUES_VERSION_TTL
+# seconds per process; writes through this process drop it right away.
+version_cache = TTLCache(maxsize=1)
+page_size = 50
+max_page_size = 200
+
+
+def configure_issues(app):
+    global page_size, max_page_size
+    version_cache.configure(1, app.config["ISSUES_VERSION_TTL"])
+    page_size = app.config["ISSUES_PAGE_SIZE"]
+    max_page_size = app.config["ISSUES_MAX_PAGE_SIZE"]
+
+
+def get_issue_collection():
+    return get_mongo_client()["WhatTheGovDoin"]["issues"]
+
+
+def collection_version():
+    """
+    Cheap fingerprint of the issues collection: document count, newest _id
+    and newest updatedAt. Inserts and deletes move the first two, edits the
+    last (every writer stamps updatedAt). Each part is an index lookup, so
+    this never scans the collection.
+    """
+    version = version_cache.get("issues")
+    if version is None:
+        collection = get_issue_collection()
+        newest = collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        updated = collection.find_one(
+            {"updatedAt": {"$ne": None}}, {"updatedAt": 1}, sort=[("updatedAt", -1)]
+        )
+        version = (
+            collection.estimated_document_count(),
+            newest["_id"] if newest else None,
+            str(updated["updatedAt"]) if updated else None,
+        )
+        version_cache.set("issues", version)
+    return version
+
+
+def issues_etag(*parts):
+    """
+    ETag for a response built from the issues collection: the collection
+    version plus whatever selects the response (page cursor, size, id).
+    """
+    raw = repr(collection_version() + parts).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+
+def mark_issues_changed():
+    version_cache.clear()
+
+
+def list_issues(after=None, limit=None):
+    """
+    One page of issues in _id order, starting after the given _id. Returns
+    (issues, next_cursor); next_cursor is None on the last page.
+    """
+    limit = max(1, min(limit or page_size, max_page_size))
+    query = {"_id": {"$gt": after}} if after is not None else {}
+    # One extra document tells whether another page follows.
+    issues = list(
+        get_issue_collection().find(query, LIST_PROJECTION).sort("_id", 1).limit(limit + 1)
+    )
+    if len(issues) > limit:
+        issues = issues[:limit]
+        return issues, issues[-1]["_id"]
+    return issues, None
+
+
+def get_issue(issue_id):
+    return get_issue_collection().find_one({"_id": issue_id}, DETAIL_PROJECTION)
+
+
+def replace_issue(issue):
+    issue["updatedAt"] = datetime.utcnow()
+    result = get_issue_collection().replace_one({"_id": issue["_id"]}, issue, upsert=False)
+    mark_issues_changed()
+    return result.matched_count
@@ -1,108 +1,360 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 import google.generativeai as genai
-from flask import jsonify, current_app
+from flask import Response, current_app, jsonify, stream_with_context
+from pymongo.errors import PyMongoError
+from app.services.cache import SingleFlight, TTLCache
 from app.services.embedding import (
+    article_index,
+    executive_index,
+    get_query_embedding,
+    normalize_query,
     similarity_search_articles,
     similarity_search_executive,
+    snippet,
+)
+from app.services.synopsis_cache import get_cached_synopses, store_synopses
+
+LLM_MODEL_NAME = "models/gemini-1.5-pro-002"
+
+
+# Shared by every request in the process: the pool runs the per-document
+# synopsis calls and the semaphore caps all in-flight Gemini calls, which
+# keeps us under the provider's rate limits however many requests arrive.
+_llm_pool = None
+_llm_slots = None
+
+
+# Finished /api/summarize responses, keyed by summary_cache_key().
+summary_cache = TTLCache()
+summary_flight = SingleFlight()
+
+
+def init_llm_pool(app):
+    global _llm_pool, _llm_slots
+    limit = app.config["LLM_MAX_CONCURRENCY"]
+    _llm_slots = threading.BoundedSemaphore(limit)
+    _llm_pool = ThreadPoolExecutor(max_workers=limit, thread_name_prefix="llm")
+    summary_cache.configure(
+        app.config["SUMMARY_CACHE_SIZE"], app.config["SUMMARY_CACHE_TTL"]
+    )
+
+
+def generate_text(llm_model, prompt, timeout):
+    with _llm_slots:
+        return llm_model.generate_content(
+            prompt, request_options={"timeout": timeout}
+        ).text
+
+
+def fallback_synopsis(doc, length=300):
+    summary = doc.get("summary", "")
+    return summary if len(summary) <= length else summary[:length].rstrip() + "..."
+
+
+SYNOPSIS_PREFIXES = {
+    "articles": "Relevant article: ",
+    "executive": "Relevant executive order: ",
+}
+
+
+def synopsis_prompt(collection_name, text):
+    return SYNOPSIS_PREFIXES[collection_name] + text
+
+
+def add_synopses(llm_model, jobs):
+    """
+    Fill doc["llm_synopses"] for every (collection_name, doc, prompt) job.
+
+    Synopses already stored for the same document text and model are reused;
+    the rest run concurrently and are written back to the cache. Calls that
+    fail or miss the deadline fall back to a trimmed copy of the document
+    summary instead of failing the whole request.
+    """
+    use_cache = current_app.config["SYNOPSIS_CACHE_ENABLED"]
+    cached = {}
+    if use_cache:
+        try:
+            cached = get_cached_synopses(
+                [(name, doc["article_id"], prompt) for name, doc, prompt in jobs],
+                llm_model.model_name,
+            )
+        except PyMongoError as e:
+            current_app.logger.warning(f"Synopsis cache lookup failed: {e}")
+
+    timeout = current_app.config["LLM_TIMEOUT"]
+    futures = {}
+    for name, doc, prompt in jobs:
+        synopsis = cached.get((name, doc["article_id"]))
+        if synopsis is not None:
+            doc["llm_synopses"] = synopsis
+        else:
+            future = _llm_pool.submit(generate_text, llm_model, prompt, timeout)
+            futures[future] = (name, doc, prompt)
+    if not futures:
+        return
+    done, _ = wait(futures, timeout=current_app.config["LLM_SYNOPSIS_DEADLINE"])
+
+    fresh = []
+    for future, (name, doc, prompt) in futures.items():
+        if future in done and future.exception() is None:
+            doc["llm_synopses"] = future.result()
+            fresh.append((name, doc["article_id"], prompt, doc["llm_synopses"]))
+            continue
+        future.cancel()
+        reason = future.exception() if future in done else "deadline exceeded"
+        current_app.logger.warning(
+            f"Synopsis for {doc.get('name', 'document')!r} failed: {reason}"
+        )
+        doc["llm_synopses"] = fallback_synopsis(doc)
+
+    if use_cache:
+        try:
+            store_synopses(fresh, llm_model.model_name)
+        except PyMongoError as e:
+            current_app.logger.warning(f"Synopsis cache write failed: {e}")
+
+
+PRE_PROMPT = (
+    "You are a political assistant. The user has shared a personal or professional concern.\n\n"
+    "Use the attached articles and executive orders to explain how recent political developments may affect them. Base your answer only on those documents.\n\n"
+    "Article Summaries will be appended after the user prompt below.\n\n"
+    "Respond using RAW HTML, not Markdown. Do not wrap your output in backticks or escape characters. Do not include <html>, <head>, or <body> tags.\n\n"
+    'Use semantic HTML elements: <section>, <h2>, <h3>, <ul>, <li>, <p>, <strong>. Apply Tailwind utility classes where helpful for spacing and clarity (e.g., class="mb-4", class="font-semibold", etc.), but use your judgment to adapt the layout to the content.\n\n'
+    "Follow the structure below, but you may adapt or reorganize content sections if needed to best serve the user's question:\n\n"
+    "---\n\n"
+    '<section class="mb-6">\n'
+    '  <h2 class="text-xl font-semibold">User or Issue Summary</h2>\n'
+    "  <p>Summary of the user or issue</p>\n"
+    "</section>\n\n"
+    '<section class="mb-6">\n'
+    '  <h2 class="text-xl font-semibold">Key Implications</h2>\n'
+    '  <h3 class="text-lg font-medium">How This May Affect the User</h3>\n'
+    '  <ul class="list-disc pl-6 space-y-2">\n'
+    "    <li>Explain a specific impact</li>\n"
+    "    <li>Another important implication</li>\n"
+    "    <li>Optional additional point</li>\n"
+    "  </ul>\n"
+    "</section>\n\n"
+    '<section class="mb-6">\n'
+    '  <h2 class="text-xl font-semibold">Policy Context</h2>\n'
+    '  <h3 class="text-lg font-medium">Relevant Articles</h3>\n'
+    "  <p><strong>Title 1:</strong> Summary...</p>\n"
+    "  <p><strong>Title 2:</strong> Summary...</p>\n"
+    '  <h3 class="text-lg font-medium mt-4">Relevant Executive Orders</h3>\n'
+    "  <p><strong>EO Title 1:</strong> Summary...</p>\n"
+    "  <p><strong>EO Title 2:</strong> Summary...</p>\n"
+    "</section>\n\n"
+    '<section class="mb-6">\n'
+    '  <h2 class="text-xl font-semibold">Recommendations</h2>\n'
+    '  <ul class="list-disc pl-6 space-y-2">\n'
+    "    <li><strong>Stay Informed:</strong> Describe useful sources or topics to watch</li>\n"
+    "    <li><strong>Consider Actions:</strong> Strategic career or personal steps</li>\n"
+    "    <li><strong>Engage Locally:</strong> Civic/union/community involvement ideas</li>\n"
+    "  </ul>\n"
+    "</section>\n\n"
+    '<section class="mb-6">\n'
+    '  <h2 class="text-xl font-semibold">Supporting Sources</h2>\n'
+    '  <ul class="list-disc pl-6 space-y-2">\n'
+    "    <li>List article or EO titles if relevant</li>\n"
+    "  </ul>\n"
+    "</section>\n\n"
+    "Write clearly and professionally, adapting your tone to the user's context. Do not mention that you are an AI model."
+    "If it is obviously not a user and simply a political issue, summarize that political issue with respect to the articles and executive orders"
+    "Do not fill null for anything. You are meant to be informative. Thanks!\n\n"
 )
 
 
 def initialize_llm_model():
     api_key = current_app.config["GOOGLE_API_KEY"]
     genai.configure(api_key=api_key)
-    return genai.GenerativeModel("models/gemini-1.5-pro-002")
+    return genai.GenerativeModel(LLM_MODEL_NAME)
 
 
-def gemini_summarize(request):
+def retrieve_context(prompt, top_k=10):
+    # One encode shared by both collections. The synopsis prompts need the
+    # full document text, so nothing is cut here (see response_documents).
+    query_embedding = get_query_embedding(prompt)
+    articles = similarity_search_articles(
+        prompt, top_k=top_k, query_embedding=query_embedding, length=0
+    )
+    executives = similarity_search_executive(
+        prompt, top_k=top_k, query_embedding=query_embedding, length=0
+    )
+    return articles, executives
 
-    # Initialize LLM
-    llm_model = initialize_llm_model()
 
-    data = request.get_json()
-    if not data or "prompt" not in data:
-        return jsonify({"error": "Missing 'prompt' in request body"}), 400
+def response_documents(docs):
+    """Copies of docs with the text cut to SEARCH_SNIPPET_LENGTH for responses."""
+    length = current_app.config["SEARCH_SNIPPET_LENGTH"]
+    return [dict(doc, summary=snippet(doc.get("summary"), length)) for doc in docs]
 
-    prompt = data["prompt"]
-    articles = similarity_search_articles(prompt, top_k=10)
-    executives = similarity_search_executive(prompt, top_k=10)
-
-    pre_prompt = (
-        "You are a political assistant. The user has shared a personal or professional concern.\n\n"
-        "Use the attached articles and executive orders to explain how recent political developments may affect them. Base your answer only on those documents.\n\n"
-        "Article Summaries will be appended after the user prompt below.\n\n"
-        "Respond using RAW HTML, not Markdown. Do not wrap your output in backticks or escape characters. Do not include <html>, <head>, or <body> tags.\n\n"
-        'Use semantic HTML elements: <section>, <h2>, <h3>, <ul>, <li>, <p>, <strong>. Apply Tailwind utility classes where helpful for spacing and clarity (e.g., class="mb-4", class="font-semibold", etc.), but use your judgment to adapt the layout to the content.\n\n'
-        "Follow the structure below, but you may adapt or reorganize content sections if needed to best serve the user's question:\n\n"
-        "---\n\n"
-        '<section class="mb-6">\n'
-        '  <h2 class="text-xl font-semibold">User or Issue Summary</h2>\n'
-        "  <p>Summary of the user or issue</p>\n"
-        "</section>\n\n"
-        '<section class="mb-6">\n'
-        '  <h2 class="text-xl font-semibold">Key Implications</h2>\n'
-        '  <h3 class="text-lg font-medium">How This May Affect the User</h3>\n'
-        '  <ul class="list-disc pl-6 space-y-2">\n'
-        "    <li>Explain a specific impact</li>\n"
-        "    <li>Another important implication</li>\n"
-        "    <li>Optional additional point</li>\n"
-        "  </ul>\n"
-        "</section>\n\n"
-        '<section class="mb-6">\n'
-        '  <h2 class="text-xl font-semibold">Policy Context</h2>\n'
-        '  <h3 class="text-lg font-medium">Relevant Articles</h3>\n'
-        "  <p><strong>Title 1:</strong> Summary...</p>\n"
-        "  <p><strong>Title 2:</strong> Summary...</p>\n"
-        '  <h3 class="text-lg font-medium mt-4">Relevant Executive Orders</h3>\n'
-        "  <p><strong>EO Title 1:</strong> Summary...</p>\n"
-        "  <p><strong>EO Title 2:</strong> Summary...</p>\n"
-        "</section>\n\n"
-        '<section class="mb-6">\n'
-        '  <h2 class="text-xl font-semibold">Recommendations</h2>\n'
-        '  <ul class="list-disc pl-6 space-y-2">\n'
-        "    <li><strong>Stay Informed:</strong> Describe useful sources or topics to watch</li>\n"
-        "    <li><strong>Consider Actions:</strong> Strategic career or personal steps</li>\n"
-        "    <li><strong>Engage Locally:</strong> Civic/union/community involvement ideas</li>\n"
-        "  </ul>\n"
-        "</section>\n\n"
-        '<section class="mb-6">\n'
-        '  <h2 class="text-xl font-semibold">Supporting Sources</h2>\n'
-        '  <ul class="list-disc pl-6 space-y-2">\n'
-        "    <li>List article or EO titles if relevant</li>\n"
-        "  </ul>\n"
-        "</section>\n\n"
-        "Write clearly and professionally, adapting your tone to the user's context. Do not mention that you are an AI model."
-        "If it is obviously not a user and simply a political issue, summarize that political issue with respect to the articles and executive orders"
-        "Do not fill null for anything. You are meant to be informative. Thanks!\n\n"
-    )
-    final_prompt = f"{pre_prompt}\n\n{prompt}"
 
-    # Append LLM summaries for articles
-    for article in articles:
-        content = article.get("summary", "")
-        article["llm_synopses"] = llm_model.generate_content(
-            "Relevant article: " + content
-        ).text
+def add_context_synopses(llm_model, articles, executives):
+    # Append LLM summaries for articles and executive orders, all at once
+    add_synopses(
+        llm_model,
+        [("articles", a, synopsis_prompt("articles", a.get("summary", ""))) for a in articles]
+        + [
+            ("executive", e, synopsis_prompt("executive", e.get("summary", "")))
+            for e in executives
+        ],
+    )
 
-    for order in executives:
-        content = order.get("summary", "")
-        order["llm_synopses"] = llm_model.generate_content(
-            "Relevant executive order: " + content
-        ).text
 
+def build_final_prompt(prompt, articles, executives):
+    final_prompt = f"{PRE_PROMPT}\n\n{prompt}"
     final_prompt += "\n\n" + "\n\n".join(
         [f"{a['name']}: {a['llm_synopses']}" for a in articles]
     )
     final_prompt += "\n\n" + "\n\n".join(
         [f"{e['name']}: {e['llm_synopses']}" for e in executives]
     )
+    return final_prompt
+
+
+def summary_cache_key(prompt, articles, executives, model_name):
+    """
+    Two requests get the same answer when they ask the same (normalized)
+    question, retrieve the same documents from the same corpus version and
+    use the same model.
+    """
+    return (
+        normalize_query(prompt),
+        tuple(a["article_id"] for a in articles),
+        tuple(e["article_id"] for e in executives),
+        model_name,
+        article_index.version,
+        executive_index.version,
+    )
+
+
+def summarize_uncached(llm_model, prompt, articles, executives, key):
+    add_context_synopses(llm_model, articles, executives)
+    response = generate_text(
+        llm_model,
+        build_final_prompt(prompt, articles, executives),
+        current_app.config["LLM_TIMEOUT"],
+    )
+    result = {
+        "llm_response": response,
+        "articles": response_documents(articles),
+        "executive_orders": response_documents(executives),
+    }
+    summary_cache.set(key, result)
+    return result
+
+
+def gemini_summarize(request):
+
+    # Initialize LLM
+    llm_model = initialize_llm_model()
+
+    data = request.get_json()
+    if not data or "prompt" not in data:
+        return jsonify({"error": "Missing 'prompt' in request body"}), 400
+
+    prompt = data["prompt"]
+    articles, executives = retrieve_context(prompt)
+    key = summary_cache_key(prompt, articles, executives, llm_model.model_name)
 
     try:
-        response = llm_model.generate_content(final_prompt).text
-        return jsonify(
-            {
-                "llm_response": response,
-                "articles": articles,
-                "executive_orders": executives,
-            }
-        )
+        result = summary_cache.get(key)
+        if result is None:
+            # Identical requests arriving together share one LLM run
+            result = summary_flight.do(
+                key,
+                lambda: summarize_uncached(
+                    llm_model, prompt, articles, executives, key
+                ),
+            )
+        return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def stream_text(llm_model, prompt, timeout):
+    """
+    Yield the response text chunk by chunk as Gemini produces it. Holds a
+    concurrency slot for the whole stream, like generate_text does.
+    """
+    with _llm_slots:
+        for chunk in llm_model.generate_content(
+            prompt, stream=True, request_options={"timeout": timeout}
+        ):
+            if chunk.text:
+                yield chunk.text
+
+
+def gemini_summarize_stream(request):
+    """
+    Server-Sent Events flavour of gemini_summarize. Emits the retrieved
+    documents straight away ("sources"), then their synopses ("synopses"),
+    then the final HTML as it is generated ("token" events) and finally
+    "done" with the full response, so the page can render long before the
+    answer is complete.
+    """
+    llm_model = initialize_llm_model()
+
+    data = request.get_json()
+    if not data or "prompt" not in data:
+        return jsonify({"error": "Missing 'prompt' in request body"}), 400
+    prompt = data["prompt"]
+
+    def events():
+        try:
+            articles, executives = retrieve_context(prompt)
+            key = summary_cache_key(prompt, articles, executives, llm_model.model_name)
+            cached = summary_cache.get(key)
+            if cached is not None:
+                for event in ("sources", "synopses"):
+                    yield sse_event(
+                        event,
+                        {
+                            "articles": cached["articles"],
+                            "executive_orders": cached["executive_orders"],
+                        },
+                    )
+                yield sse_event("token", {"text": cached["llm_response"]})
+                yield sse_event("done", {"llm_response": cached["llm_response"]})
+                return
+
+            yield sse_event(
+                "sources",
+                {
+                    "articles": response_documents(articles),
+                    "executive_orders": response_documents(executives),
+                },
+            )
+
+            add_context_synopses(llm_model, articles, executives)
+            documents = {
+                "articles": response_documents(articles),
+                "executive_orders": response_documents(executives),
+            }
+            yield sse_event("synopses", documents)
+
+            parts = []
+            for text in stream_text(
+                llm_model,
+                build_final_prompt(prompt, articles, executives),
+                current_app.config["LLM_TIMEOUT"],
+            ):
+                parts.append(text)
+                yield sse_event("token", {"text": text})
+            response = "".join(parts)
+            summary_cache.set(key, dict(documents, llm_response=response))
+            yield sse_event("done", {"llm_response": response})
+        except Exception as e:
+            yield sse_event("error", {"error": str(e)})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
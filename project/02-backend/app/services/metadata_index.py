@@ -0,0 +1,135 @@
+import calendar
+from datetime import datetime
+import numpy as np
+
+# Stored for documents without a date; sorts before every real date.
+MISSING_DATE = np.iinfo(np.int64).min
+
+
+def date_key(value):
+    """
+    Milliseconds since the epoch (Mongo's date precision). Naive datetimes
+    are UTC, which is how pymongo returns them.
+    """
+    if not isinstance(value, datetime):
+        return MISSING_DATE
+    return calendar.timegm(value.utctimetuple()) * 1000 + value.microsecond // 1000
+
+
+def exact_key(value):
+    return "" if value is None else str(value)
+
+
+class MetadataIndex:
+    """
+    Filterable document metadata, row-aligned with a VectorIndex's matrix.
+
+    date_fields are int64 columns with their argsort order, so a date range
+    is two binary searches over the sorted values; exact_fields map every
+    value to the rows holding it. Either lookup costs O(log n + matches),
+    which lets a filtered search score only the matching rows.
+    """
+
+    def __init__(self, date_fields=(), exact_fields=()):
+        self.date_fields = tuple(date_fields)
+        self.exact_fields = tuple(exact_fields)
+        self.columns = {}
+        self._sorted = {}
+        self._postings = {}
+
+    @property
+    def fields(self):
+        return self.date_fields + self.exact_fields
+
+    def empty_columns(self):
+        columns = {field: np.empty(0, dtype=np.int64) for field in self.date_fields}
+        columns.update({field: np.empty(0, dtype=object) for field in self.exact_fields})
+        return columns
+
+    def column_values(self, docs):
+        """Columns for the given documents, in order."""
+        columns = {
+            field: np.fromiter((date_key(doc.get(field)) for doc in docs), np.int64, len(docs))
+            for field in self.date_fields
+        }
+        for field in self.exact_fields:
+            values = np.empty(len(docs), dtype=object)
+            values[:] = [exact_key(doc.get(field)) for doc in docs]
+            columns[field] = values
+        return columns
+
+    def build(self, columns):
+        """
+        Return a new MetadataIndex over columns ({field: array}, every array
+        as long as the index). Missing fields are treated as unset.
+        """
+        index = MetadataIndex(self.date_fields, self.exact_fields)
+        size = len(next(iter(columns.values()))) if columns else 0
+        for field in self.date_fields:
+            values = columns.get(field)
+            # A no-op for int64 columns, including memory-mapped ones.
+            values = (
+                np.full(size, MISSING_DATE, dtype=np.int64)
+                if values is None
+                else np.asarray(values, dtype=np.int64)
+            )
+            order = np.argsort(values, kind="stable")
+            index.columns[field] = values
+            index._sorted[field] = (values[order], order)
+        for field in self.exact_fields:
+            values = columns.get(field)
+            # Object arrays, so patching in a longer value never truncates it
+            # (as fixed-width strings from a snapshot file would).
+            values = (
+                np.full(size, "", dtype=object)
+                if values is None
+                else np.asarray(values, dtype=object)
+            )
+            keys, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+            order = np.argsort(inverse, kind="stable")
+            bounds = np.searchsorted(inverse[order], np.arange(len(keys) + 1))
+            index.columns[field] = values
+            index._postings[field] = {
+                key: order[bounds[i] : bounds[i + 1]] for i, key in enumerate(keys)
+            }
+        return index
+
+    def rows(self, filters):
+        """
+        Sorted row positions matching every filter:
+
+            {"createdAt": (start, end)}           datetimes, inclusive; None = open
+            {"executive_order_number": ["14151"]}  any of the values
+
+        Unknown fields raise ValueError.
+        """
+        matches = []
+        for field, condition in filters.items():
+            if field in self._sorted:
+                start, end = condition
+                values, order = self._sorted[field]
+                # Documents without the date never match a range.
+                low = MISSING_DATE + 1 if start is None else date_key(start)
+                lo = np.searchsorted(values, low, side="left")
+                hi = (
+                    len(values)
+                    if end is None
+                    else np.searchsorted(values, date_key(end), side="right")
+                )
+                matches.append(np.sort(order[lo:hi]))
+            elif field in self._postings:
+                wanted = [condition] if isinstance(condition, str) else condition
+                postings = self._postings[field]
+                found = [postings[exact_key(v)] for v in wanted if exact_key(v) in postings]
+                matches.append(np.unique(np.concatenate(found)) if found else np.empty(0, np.int64))
+            else:
+                raise ValueError(f"Cannot filter on {field!r}, expected one of {self.fields}")
+
+        # Intersect smallest first, so the work shrinks with the selectivity.
+        matches.sort(key=len)
+        rows = matches[0]
+        for other in matches[1:]:
+            if len(rows) == 0:
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows.astype(np.int64, copy=False)
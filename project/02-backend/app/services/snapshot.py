@@ -0,0 +1,128 @@
+"""
+On-disk, memory-mappable snapshots of a VectorIndex.
+
+Layout, one directory per collection and one sub-directory per version:
+
+    <root>/<collection>/CURRENT              name of the live version
+    <root>/<collection>/<version>/vectors.npy     unit-normalized float32 rows
+    <root>/<collection>/<version>/ids.npy         int64 document ids
+    <root>/<collection>/<version>/meta_<field>.npy  filterable metadata columns
+    <root>/<collection>/<version>/manifest.json   counts and sync watermarks
+
+Versions are written completely before CURRENT is swapped, so readers only
+ever see finished snapshots. Readers map every file read-only: all workers
+on a host share one page-cache copy instead of each holding the corpus.
+"""
+import json
+import os
+import shutil
+from datetime import datetime
+import numpy as np
+
+CURRENT = "CURRENT"
+
+
+def collection_dir(root, collection_name):
+    return os.path.join(root, collection_name)
+
+
+def current_version(root, collection_name):
+    try:
+        with open(os.path.join(collection_dir(root, collection_name), CURRENT)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_snapshot(root, index, watermarks=None, keep=2):
+    """
+    Export index (a loaded VectorIndex) as a new snapshot version and make it
+    current. watermarks ({"max_id": ..., "updated_since": ...}) record how
+    far the exported data goes, so a reader can catch up from there. The
+    newest `keep` versions are kept; running readers of older ones keep
+    working since their files stay mapped until they exit. Returns the
+    version name.
+    """
+    ids, matrix, columns = index.live_arrays()
+    metadata = index.metadata
+    if not all(isinstance(doc_id, (int, np.integer)) for doc_id in ids):
+        raise ValueError(f"{index.collection_name}: snapshots need integer _ids")
+
+    version = datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+    base = collection_dir(root, index.collection_name)
+    target = os.path.join(base, version)
+    tmp = target + ".tmp"
+    os.makedirs(tmp)
+
+    np.save(os.path.join(tmp, "vectors.npy"), np.ascontiguousarray(matrix, dtype=np.float32))
+    np.save(os.path.join(tmp, "ids.npy"), np.asarray(ids, dtype=np.int64))
+    for field in metadata.date_fields:
+        np.save(os.path.join(tmp, f"meta_{field}.npy"), columns[field])
+    for field in metadata.exact_fields:
+        # Fixed-width unicode rather than objects, so the file maps without pickle.
+        np.save(
+            os.path.join(tmp, f"meta_{field}.npy"),
+            np.asarray(columns[field], dtype=str),
+        )
+
+    watermarks = dict(watermarks or {})
+    if isinstance(watermarks.get("updated_since"), datetime):
+        watermarks["updated_since"] = watermarks["updated_since"].isoformat()
+    manifest = {
+        "version": version,
+        "collection": index.collection_name,
+        "embedding_field": index.embedding_field,
+        "count": int(len(ids)),
+        "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        "metadata": list(metadata.fields),
+        "watermarks": watermarks,
+    }
+    with open(os.path.join(tmp, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    os.replace(tmp, target)
+    pointer = os.path.join(base, CURRENT + ".tmp")
+    with open(pointer, "w") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(base, CURRENT))
+
+    versions = sorted(
+        name for name in os.listdir(base) if name != CURRENT and not name.endswith(".tmp")
+    )
+    for old in versions[: max(len(versions) - keep, 0)]:
+        shutil.rmtree(os.path.join(base, old), ignore_errors=True)
+    return version
+
+
+def read_snapshot(root, collection_name):
+    """
+    Map the current snapshot of collection_name read-only. Returns
+    (ids, matrix, columns, manifest) or None when there is none; columns
+    maps each metadata field listed in the manifest to its array.
+    """
+    version = current_version(root, collection_name)
+    if version is None:
+        return None
+    path = os.path.join(collection_dir(root, collection_name), version)
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    updated_since = manifest["watermarks"].get("updated_since")
+    if updated_since:
+        manifest["watermarks"]["updated_since"] = datetime.fromisoformat(updated_since)
+
+    fields = manifest.setdefault("metadata", [])
+    ids = np.empty(manifest["count"], dtype=object)
+    if manifest["count"] == 0:
+        # Zero-length arrays can't be memory-mapped.
+        columns = {field: np.empty(0) for field in fields}
+        return ids, np.empty((0, 0), dtype=np.float32), columns, manifest
+
+    matrix = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+    # Ids become Python ints so they hash/serialize like ids read from Mongo.
+    ids[:] = np.load(os.path.join(path, "ids.npy"), mmap_mode="r").tolist()
+    columns = {
+        field: np.load(os.path.join(path, f"meta_{field}.npy"), mmap_mode="r")
+        for field in fields
+    }
+    return ids, matrix, columns, manifest
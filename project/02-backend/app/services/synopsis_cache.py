@@ -0,0 +1,74 @@
+import hashlib
+from datetime import datetime
+from pymongo import UpdateOne
+from app.services.db import get_mongo_client
+
+SYNOPSIS_COLLECTION = "llm_synopses"
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def synopsis_key(collection_name, doc_id, model_name):
+    return f"{collection_name}:{doc_id}:{model_name}"
+
+
+def get_synopsis_collection():
+    return get_mongo_client()["WhatTheGovDoin"][SYNOPSIS_COLLECTION]
+
+
+def get_cached_synopses(jobs, model_name):
+    """
+    Look up stored synopses for [(collection_name, doc_id, prompt), ...].
+
+    Returns {(collection_name, doc_id): synopsis} for entries whose stored
+    prompt hash still matches, so a document whose text changed is simply
+    treated as a miss and regenerated.
+    """
+    if not jobs:
+        return {}
+    wanted = {
+        synopsis_key(collection_name, doc_id, model_name): (
+            (collection_name, doc_id),
+            text_hash(prompt),
+        )
+        for collection_name, doc_id, prompt in jobs
+    }
+    cached = {}
+    for entry in get_synopsis_collection().find(
+        {"_id": {"$in": list(wanted)}}, {"text_hash": 1, "synopsis": 1}
+    ):
+        target, expected_hash = wanted[entry["_id"]]
+        if entry.get("text_hash") == expected_hash:
+            cached[target] = entry["synopsis"]
+    return cached
+
+
+def store_synopses(entries, model_name):
+    """
+    Upsert [(collection_name, doc_id, prompt, synopsis), ...] in one bulk write.
+    """
+    if not entries:
+        return
+    now = datetime.utcnow()
+    get_synopsis_collection().bulk_write(
+        [
+            UpdateOne(
+                {"_id": synopsis_key(collection_name, doc_id, model_name)},
+                {
+                    "$set": {
+                        "collection": collection_name,
+                        "doc_id": doc_id,
+                        "model": model_name,
+                        "text_hash": text_hash(prompt),
+                        "synopsis": synopsis,
+                        "updatedAt": now,
+                    }
+                },
+                upsert=True,
+            )
+            for collection_name, doc_id, prompt, synopsis in entries
+        ],
+        ordered=False,
+    )
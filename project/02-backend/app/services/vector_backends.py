@@ -0,0 +1,309 @@
+import numpy as np
+
+# Rows per block when assigning vectors to centroids, to bound temp memory.
+ASSIGN_CHUNK = 65536
+# Query x corpus scores materialized at once by a batch search (64 MB float32).
+SCORE_BLOCK = 1 << 24
+
+
+def top_k_indices(scores, top_k):
+    """
+    Return the indices of the top_k highest scores, best first.
+    Uses argpartition so only the k winners get fully sorted.
+    """
+    k = min(top_k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def top_k_rows(scores, top_k):
+    """
+    top_k_indices for every row of a 2-D score matrix at once: returns a
+    (rows, k) array of column indices, best first within each row.
+    """
+    k = min(top_k, scores.shape[1])
+    if k <= 0:
+        return np.empty((len(scores), 0), dtype=np.int64)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def assign(data, centroids, spherical=False):
+    """
+    Index of the nearest centroid for every row of data. Spherical
+    assignment maximizes the dot product, otherwise L2 distance is used.
+    """
+    bias = 0.0 if spherical else 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+    labels = np.empty(len(data), dtype=np.int64)
+    for start in range(0, len(data), ASSIGN_CHUNK):
+        block = data[start : start + ASSIGN_CHUNK] @ centroids.T - bias
+        labels[start : start + ASSIGN_CHUNK] = block.argmax(axis=1)
+    return labels
+
+
+def kmeans(data, k, iterations=20, spherical=False, seed=0):
+    """
+    Plain Lloyd's k-means in NumPy. With spherical=True centroids are kept
+    unit length, which is what cosine similarity wants.
+    """
+    rng = np.random.default_rng(seed)
+    k = min(k, len(data))
+    centroids = data[rng.choice(len(data), k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = assign(data, centroids, spherical)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, data)
+        counts = np.bincount(labels, minlength=k)
+        empty = counts == 0
+        # Re-seed empty clusters from random points instead of dropping them.
+        sums[empty] = data[rng.choice(len(data), int(empty.sum()))]
+        counts[empty] = 1
+        centroids = (sums / counts[:, None]).astype(np.float32)
+        if spherical:
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids /= norms
+    return centroids
+
+
+class VectorBackend:
+    """
+    Interface for the search structure behind a VectorIndex.
+
+    build() receives the index's unit-normalized float32 matrix (and the
+    previous backend, so expensive training can be reused on incremental
+    updates); search() returns (row positions, scores) best first, and
+    search_batch() one such pair per row of a query matrix.
+    """
+
+    name = None
+
+    def build(self, matrix, previous=None):
+        raise NotImplementedError
+
+    def search(self, query, top_k):
+        raise NotImplementedError
+
+    def search_batch(self, queries, top_k):
+        return [self.search(query, top_k) for query in queries]
+
+
+class ExactBackend(VectorBackend):
+    """Brute force: one matrix-vector product over the whole corpus."""
+
+    name = "exact"
+
+    def __init__(self):
+        self.matrix = None
+
+    def build(self, matrix, previous=None):
+        self.matrix = matrix
+        return self
+
+    def search(self, query, top_k):
+        scores = self.matrix @ query
+        rows = top_k_indices(scores, top_k)
+        return rows, scores[rows]
+
+    def search_batch(self, queries, top_k):
+        """
+        One matrix-matrix product per block of queries, so BLAS does the
+        work for the whole batch; blocks keep the score matrix bounded.
+        """
+        results = []
+        block = max(1, SCORE_BLOCK // max(len(self.matrix), 1))
+        for start in range(0, len(queries), block):
+            scores = queries[start : start + block] @ self.matrix.T
+            rows = top_k_rows(scores, top_k)
+            best = np.take_along_axis(scores, rows, axis=1)
+            results.extend(zip(rows, best))
+        return results
+
+
+class IVFBackend(VectorBackend):
+    """
+    Inverted file index with optional product quantization.
+
+    Vectors are bucketed under nlist spherical k-means centroids and a query
+    only scores the nprobe closest buckets. With pq_m > 0 the residuals are
+    also PQ-encoded (pq_m sub-spaces x 256 codes) and candidates are ranked
+    by lookup table, then the best top_k * rerank are re-scored exactly.
+    """
+
+    name = "ivf"
+
+    def __init__(self, nlist=0, nprobe=8, pq_m=0, rerank=4, train_size=100000):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.pq_m = pq_m
+        self.rerank = rerank
+        self.train_size = train_size
+        self.matrix = None
+        self.centroids = None
+        self.codebooks = None
+        self.trained_on = 0
+        self.lists = []
+        self.codes = None
+
+    def build(self, matrix, previous=None):
+        self.matrix = matrix
+        if len(matrix) == 0:
+            self.lists = []
+            return self
+
+        # Reuse the previous training unless the corpus has doubled since.
+        if (
+            isinstance(previous, IVFBackend)
+            and previous.centroids is not None
+            and previous.pq_m == self.pq_m
+            and len(matrix) <= 2 * previous.trained_on
+        ):
+            self.centroids = previous.centroids
+            self.codebooks = previous.codebooks
+            self.trained_on = previous.trained_on
+        else:
+            self._train(matrix)
+
+        labels = assign(matrix, self.centroids, spherical=True)
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(len(self.centroids) + 1))
+        self.lists = [order[bounds[i] : bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+        if self.codebooks is not None:
+            self.codes = self._encode(matrix - self.centroids[labels])
+        return self
+
+    def search(self, query, top_k):
+        if not self.lists:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return self._search_lists(query, self.centroids @ query, top_k)
+
+    def search_batch(self, queries, top_k):
+        if not self.lists:
+            return [self.search(query, top_k) for query in queries]
+        # Bucket selection for every query in one product; the probed
+        # lists differ per query, so the rest runs query by query.
+        coarse = queries @ self.centroids.T
+        return [self._search_lists(q, c, top_k) for q, c in zip(queries, coarse)]
+
+    def _search_lists(self, query, coarse, top_k):
+        probed = top_k_indices(coarse, self.nprobe)
+        rows = np.concatenate([self.lists[c] for c in probed])
+        if len(rows) == 0:
+            return rows, np.empty(0, dtype=np.float32)
+
+        if self.codes is not None:
+            # Asymmetric distance: q.x ~= q.centroid + sum_m q_m.codebook_m[code]
+            bias = np.concatenate(
+                [np.full(len(self.lists[c]), coarse[c], dtype=np.float32) for c in probed]
+            )
+            sub = query.reshape(self.pq_m, -1)
+            tables = np.einsum("mkd,md->mk", self.codebooks, sub)
+            approx = bias + tables[np.arange(self.pq_m), self.codes[rows]].sum(axis=1)
+            rows = rows[top_k_indices(approx, top_k * self.rerank)]
+
+        scores = self.matrix[rows] @ query
+        best = top_k_indices(scores, top_k)
+        return rows[best], scores[best]
+
+    def _train(self, matrix):
+        rng = np.random.default_rng(0)
+        sample = matrix
+        if len(matrix) > self.train_size:
+            sample = matrix[rng.choice(len(matrix), self.train_size, replace=False)]
+
+        nlist = self.nlist or max(1, int(np.sqrt(len(matrix))))
+        self.centroids = kmeans(sample, nlist, spherical=True)
+        self.trained_on = len(matrix)
+
+        self.codebooks = None
+        if self.pq_m:
+            if matrix.shape[1] % self.pq_m:
+                raise ValueError(
+                    f"IVF_PQ_M={self.pq_m} must divide the embedding size {matrix.shape[1]}"
+                )
+            residuals = sample - self.centroids[assign(sample, self.centroids, True)]
+            subspaces = residuals.reshape(len(sample), self.pq_m, -1)
+            self.codebooks = np.stack(
+                [kmeans(subspaces[:, m], 256) for m in range(self.pq_m)]
+            )
+
+    def _encode(self, residuals):
+        subspaces = residuals.reshape(len(residuals), self.pq_m, -1)
+        codes = np.empty((len(residuals), self.pq_m), dtype=np.uint8)
+        for m in range(self.pq_m):
+            codes[:, m] = assign(subspaces[:, m], self.codebooks[m])
+        return codes
+
+
+class OverlayBackend(VectorBackend):
+    """
+    Search over a shared, read-only base matrix (a memory-mapped snapshot)
+    patched without writing to it: alive masks out base rows that were
+    deleted or replaced, and the replacement and new vectors sit in a small
+    in-memory overlay searched exactly. Row positions count the base rows
+    first, then the overlay rows.
+
+    Not a selectable backend; VectorIndex wraps its built backend in one
+    while the overlay stays small.
+    """
+
+    name = "overlay"
+
+    def __init__(self, base, base_matrix, alive, overlay_matrix):
+        self.base = base
+        self.base_matrix = base_matrix
+        self.alive = alive
+        self.matrix = overlay_matrix
+        self.size = len(base_matrix)
+        self.dead = int(self.size - np.count_nonzero(alive[: self.size]))
+        self.overlay = ExactBackend().build(overlay_matrix)
+
+    def vectors(self, rows):
+        """Vectors at the given sorted row positions."""
+        split = np.searchsorted(rows, self.size)
+        return np.concatenate(
+            [self.base_matrix[rows[:split]], self.matrix[rows[split:] - self.size]]
+        )
+
+    def search(self, query, top_k):
+        return self.search_batch(query[None, :], top_k)[0]
+
+    def search_batch(self, queries, top_k):
+        # Ask the base for enough extra hits to make up for masked rows.
+        base_hits = self.base.search_batch(queries, top_k + self.dead)
+        if len(self.matrix):
+            overlay_hits = self.overlay.search_batch(queries, top_k)
+        else:
+            nothing = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+            overlay_hits = [nothing] * len(queries)
+
+        results = []
+        for (rows, scores), (extra, extra_scores) in zip(base_hits, overlay_hits):
+            live = self.alive[rows]
+            rows = np.concatenate([rows[live], extra + self.size])
+            scores = np.concatenate([scores[live], extra_scores])
+            best = top_k_indices(scores, top_k)
+            results.append((rows[best], scores[best]))
+        return results
+
+
+BACKENDS = {backend.name: backend for backend in (ExactBackend, IVFBackend)}
+
+
+def make_backend_factory(name, **params):
+    """
+    Return a zero-argument callable producing fresh backends of the given
+    kind, e.g. make_backend_factory("ivf", nprobe=16).
+    """
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown vector backend {name!r}, expected one of {sorted(BACKENDS)}"
+        )
+    backend_cls = BACKENDS[name]
+    if backend_cls is ExactBackend:
+        return ExactBackend
+    return lambda: backend_cls(**params)
@@ -0,0 +1,380 @@
+import threading
+import numpy as np
+from app.services.embedding_codec import decode_embedding
+from app.services.metadata_index import MetadataIndex
+from app.services.vector_backends import ExactBackend, OverlayBackend
+
+# Patches to a memory-mapped snapshot go to an overlay (see OverlayBackend)
+# until it holds this many rows, or this share of the snapshot if larger;
+# past that the index is rebuilt in private memory and no longer shares
+# the snapshot's pages with other workers.
+OVERLAY_MIN_ROWS = 1024
+OVERLAY_MAX_SHARE = 0.05
+
+
+def normalize_rows(matrix):
+    """
+    L2-normalize each row of a float32 matrix in place. Zero rows stay zero.
+    """
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+class VectorIndex:
+    """
+    Process-resident embedding index for one Mongo collection.
+
+    Holds only a contiguous float32 matrix of unit-normalized vectors and a
+    parallel array of document ids: scoring never needs the documents
+    themselves, which are fetched for the top hits afterwards. The actual
+    top-k search is delegated to a VectorBackend (exact brute force by
+    default, or an approximate IVF index).
+
+    date_fields / exact_fields name document fields kept alongside the
+    vectors (see MetadataIndex) so searches can be filtered on them before
+    anything is scored.
+    """
+
+    def __init__(
+        self,
+        collection_name,
+        embedding_field,
+        backend_factory=None,
+        date_fields=(),
+        exact_fields=(),
+    ):
+        self.collection_name = collection_name
+        self.embedding_field = embedding_field
+        self.backend_factory = backend_factory or ExactBackend
+        self.metadata = MetadataIndex(date_fields, exact_fields)
+        self.lock = threading.Lock()
+        # Bumped on every load/patch; lets caches tell when results may differ.
+        self.version = 0
+        # (ids, matrix, backend, metadata) is swapped as one tuple so readers
+        # never see a half-built index.
+        self._snapshot = None
+        # Manifest of the on-disk snapshot this index was mapped from, until
+        # the refresher has caught up with the changes made since.
+        self.snapshot_info = None
+        # True while the matrix is the mapped snapshot, shared with other
+        # processes and patched only through an overlay.
+        self.shared = False
+
+    @property
+    def loaded(self):
+        return self._snapshot is not None
+
+    def __len__(self):
+        if self._snapshot is None:
+            return 0
+        backend = self._snapshot[2]
+        if isinstance(backend, OverlayBackend):
+            return int(np.count_nonzero(backend.alive))
+        return len(self._snapshot[0])
+
+    @property
+    def projection(self):
+        projection = {self.embedding_field: 1}
+        projection.update({field: 1 for field in self.metadata.fields})
+        return projection
+
+    @property
+    def doc_ids(self):
+        return [] if self._snapshot is None else list(self.live_arrays()[0])
+
+    def live_arrays(self):
+        """
+        (ids, matrix, columns) of the documents currently in the index, as
+        plain row-aligned arrays with any overlay merged in.
+        """
+        ids, matrix, backend, metadata = self._snapshot
+        if not isinstance(backend, OverlayBackend):
+            return ids, matrix, metadata.columns
+        rows = np.flatnonzero(backend.alive)
+        columns = {field: values[rows] for field, values in metadata.columns.items()}
+        return ids[rows], backend.vectors(rows), columns
+
+    def load(self, collection):
+        """
+        Read every document that has an embedding and rebuild the matrix.
+        Only _id, the embedding and the metadata fields are fetched;
+        embeddings may be stored as arrays or compact Binary values.
+        """
+        ids, vectors, docs = [], [], []
+        for doc in collection.find(
+            {self.embedding_field: {"$ne": None}}, self.projection
+        ):
+            emb = doc.get(self.embedding_field)
+            if not emb:
+                continue
+            ids.append(doc["_id"])
+            vectors.append(decode_embedding(emb))
+            docs.append(doc)
+
+        self._snapshot = self._build(
+            ids, vectors, self.backend_factory(), self.metadata.column_values(docs)
+        )
+        self.snapshot_info = None
+        self.shared = False
+        self.version += 1
+        return len(ids)
+
+    def load_arrays(self, ids, matrix, columns=None, snapshot_info=None):
+        """
+        Install prebuilt arrays, e.g. a memory-mapped snapshot. matrix must
+        already be unit-normalized; it is used as-is and never written to
+        (apply_changes patches an overlay instead). columns holds the
+        metadata fields, row-aligned with ids.
+        """
+        with self.lock:
+            self._snapshot = (
+                ids,
+                matrix,
+                self.backend_factory().build(matrix),
+                self.metadata.build(columns or {}),
+            )
+            self.snapshot_info = snapshot_info
+            self.shared = True
+            self.version += 1
+        return len(ids)
+
+    def apply_changes(self, docs=(), deleted_ids=()):
+        """
+        Patch the index with new/changed documents and removed ids.
+
+        Builds a new snapshot off to the side and swaps it in, so searches
+        running concurrently keep using the old one and never block.
+        Documents that lost their embedding are dropped. A mapped snapshot
+        is left untouched while the changes fit in its overlay.
+        """
+        # Last write wins when the same document shows up more than once.
+        docs = list({doc["_id"]: doc for doc in docs}.values())
+        deleted_ids = set(deleted_ids)
+        if not docs and not deleted_ids:
+            return
+
+        with self.lock:
+            if self._snapshot is None:
+                ids, matrix, backend, metadata = self._build(
+                    [], [], self.backend_factory(), self.metadata.empty_columns()
+                )
+            else:
+                ids, matrix, backend, metadata = self._snapshot
+
+            if self.shared and len(ids):
+                pending = len(docs) + len(deleted_ids)
+                used = (
+                    backend.dead + len(backend.matrix)
+                    if isinstance(backend, OverlayBackend)
+                    else 0
+                )
+                limit = max(OVERLAY_MIN_ROWS, OVERLAY_MAX_SHARE * len(matrix))
+                if used + pending <= limit:
+                    self._snapshot = self._patch_overlay(docs, deleted_ids)
+                    self.version += 1
+                    return
+                # The overlay is full: carry on from a private copy.
+                ids, matrix, columns = self.live_arrays()
+                if isinstance(backend, OverlayBackend):
+                    backend = backend.base
+                metadata = self.metadata.build(columns)
+                self.shared = False
+
+            positions = {doc_id: i for i, doc_id in enumerate(ids)}
+            drop = {positions[d] for d in deleted_ids if d in positions}
+
+            replaced, replaced_docs = {}, {}
+            added_ids, added_vectors, added_docs = [], [], []
+            for doc in docs:
+                pos = positions.get(doc["_id"])
+                emb = doc.get(self.embedding_field)
+                if not emb:
+                    if pos is not None:
+                        drop.add(pos)
+                elif pos is not None:
+                    replaced[pos] = decode_embedding(emb)
+                    replaced_docs[pos] = doc
+                else:
+                    added_ids.append(doc["_id"])
+                    added_vectors.append(decode_embedding(emb))
+                    added_docs.append(doc)
+
+            replaced = {i: r for i, r in replaced.items() if i not in drop}
+            keep = [i for i in range(len(ids)) if i not in drop]
+            new_ids = list(ids[keep]) + added_ids
+            kept_matrix = matrix[keep] if len(ids) else None
+
+            if replaced:
+                rows = {i: r for r, i in enumerate(keep)}
+                patch = np.asarray(list(replaced.values()), dtype=np.float32)
+                normalize_rows(patch)
+                kept_matrix[[rows[i] for i in replaced]] = patch
+
+            if added_vectors:
+                added = normalize_rows(np.asarray(added_vectors, dtype=np.float32))
+                kept_matrix = (
+                    added
+                    if kept_matrix is None or len(kept_matrix) == 0
+                    else np.vstack([kept_matrix, added])
+                )
+            if kept_matrix is None:
+                kept_matrix = np.empty((0, 0), dtype=np.float32)
+
+            # Metadata columns follow the same keep / patch / append steps.
+            columns = {field: values[keep] for field, values in metadata.columns.items()}
+            if replaced:
+                patched = self.metadata.column_values([replaced_docs[i] for i in replaced])
+                for field, values in patched.items():
+                    columns[field][[rows[i] for i in replaced]] = values
+            if added_docs:
+                appended = self.metadata.column_values(added_docs)
+                for field, values in appended.items():
+                    columns[field] = np.concatenate([columns[field], values])
+
+            id_array = np.empty(len(new_ids), dtype=object)
+            id_array[:] = new_ids
+            kept_matrix = np.ascontiguousarray(kept_matrix)
+            self._snapshot = (
+                id_array,
+                kept_matrix,
+                self.backend_factory().build(kept_matrix, previous=backend),
+                self.metadata.build(columns),
+            )
+            self.version += 1
+
+    def _patch_overlay(self, docs, deleted_ids):
+        """
+        apply_changes() for a mapped snapshot: the replaced and removed rows
+        are masked out and the new vectors appended to the overlay, so the
+        base matrix is neither copied nor written.
+        """
+        ids, matrix, backend, metadata = self._snapshot
+        size = len(matrix)
+        if isinstance(backend, OverlayBackend):
+            base, alive, extra = backend.base, backend.alive.copy(), backend.matrix
+        else:
+            base = backend
+            alive = np.ones(size, dtype=bool)
+            extra = np.empty((0, matrix.shape[1]), dtype=np.float32)
+
+        live = np.flatnonzero(alive)
+        positions = dict(zip(ids[live].tolist(), live.tolist()))
+        for doc_id in deleted_ids:
+            if doc_id in positions:
+                alive[positions[doc_id]] = False
+
+        added_ids, added_vectors, added_docs = [], [], []
+        for doc in docs:
+            if doc["_id"] in deleted_ids:
+                continue
+            if doc["_id"] in positions:
+                alive[positions[doc["_id"]]] = False
+            emb = doc.get(self.embedding_field)
+            if emb:
+                added_ids.append(doc["_id"])
+                added_vectors.append(decode_embedding(emb))
+                added_docs.append(doc)
+
+        # Overlay rows still alive stay; the base rows keep their positions.
+        kept = size + np.flatnonzero(alive[size:])
+        added = np.empty((0, matrix.shape[1]), dtype=np.float32)
+        if added_vectors:
+            added = normalize_rows(np.asarray(added_vectors, dtype=np.float32))
+        extra = np.vstack([extra[kept - size], added])
+
+        id_array = np.empty(size + len(extra), dtype=object)
+        id_array[:size] = ids[:size]
+        id_array[size:] = list(ids[kept]) + added_ids
+        appended = self.metadata.column_values(added_docs)
+        columns = {
+            field: np.concatenate([values[:size], values[kept], appended[field]])
+            for field, values in metadata.columns.items()
+        }
+        alive = np.concatenate([alive[:size], np.ones(len(extra), dtype=bool)])
+        return (
+            id_array,
+            matrix,
+            OverlayBackend(base, matrix, alive, extra),
+            self.metadata.build(columns),
+        )
+
+    def ensure_loaded(self, get_collection):
+        """
+        Load the index on first use. get_collection is only called when a
+        load is actually needed, so warm processes never touch Mongo.
+        """
+        if self._snapshot is not None:
+            return
+        with self.lock:
+            if self._snapshot is None:
+                self.load(get_collection())
+
+    def search(self, query_embedding, top_k=5, filters=None):
+        """
+        Return [(doc_id, similarity), ...] for the top_k most cosine-similar
+        documents, best first. filters (see MetadataIndex.rows) restrict the
+        search to matching documents before scoring.
+        """
+        return self.search_batch([query_embedding], top_k, filters)[0]
+
+    def search_batch(self, query_embeddings, top_k=5, filters=None):
+        """
+        search() for many queries at once: query_embeddings is a (queries,
+        dim) array or list of vectors; returns one hit list per query.
+        """
+        count = len(query_embeddings)
+        if self._snapshot is None or top_k <= 0 or count == 0:
+            return [[] for _ in range(count)]
+        ids, matrix, backend, metadata = self._snapshot
+        # Rows masked out by an overlay (see OverlayBackend) never match.
+        alive = backend.alive if isinstance(backend, OverlayBackend) else None
+
+        subset = None
+        if filters:
+            # Only the matching rows are scored, exactly: the cost follows
+            # the size of the subset rather than the corpus.
+            subset = metadata.rows(filters)
+            if alive is None:
+                vectors = matrix[subset]
+            else:
+                subset = subset[alive[subset]]
+                vectors = backend.vectors(subset)
+            backend = ExactBackend().build(vectors)
+        if subset is not None:
+            candidates = len(subset)
+        elif alive is not None:
+            candidates = int(np.count_nonzero(alive))
+        else:
+            candidates = len(ids)
+        if candidates == 0:
+            return [[] for _ in range(count)]
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        queries = queries / np.where(empty[:, None], 1.0, norms)
+
+        results = []
+        for query_empty, (rows, scores) in zip(empty, backend.search_batch(queries, top_k)):
+            if query_empty:
+                # Every document is equally (dis)similar to an empty query.
+                rows = np.arange(min(top_k, candidates))
+                if subset is None and alive is not None:
+                    rows = np.flatnonzero(alive)[rows]
+                scores = np.zeros(len(rows), dtype=np.float32)
+            if subset is not None:
+                rows = subset[rows]
+            results.append([(ids[i], float(score)) for i, score in zip(rows, scores)])
+        return results
+
+    def _build(self, ids, vectors, backend, columns):
+        id_array = np.empty(len(ids), dtype=object)
+        id_array[:] = ids
+        if vectors:
+            matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+            normalize_rows(matrix)
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        return id_array, matrix, backend.build(matrix), self.metadata.build(columns)
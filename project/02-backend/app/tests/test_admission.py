@@ -0,0 +1,181 @@
+import http.client
+import threading
+import time
+
+import pytest
+from flask import Blueprint, Flask, Response, jsonify
+from werkzeug.serving import make_server
+
+from app.services import admission
+from app.services.admission import AdmissionGate
+
+release_stream = threading.Event()
+
+
+def make_app(**config):
+    """
+    An app with stand-ins for the gated routes, registered under the
+    endpoint names admission.ROUTE_CLASSES knows.
+    """
+    llm = Blueprint("llm", __name__)
+    api = Blueprint("api", __name__)
+
+    @llm.route("/summarize/stream")
+    def gemini_summarize_stream():
+        def events():
+            yield "data: first\n\n"
+            while not release_stream.wait(0.02):
+                yield ": keep-alive\n\n"
+            yield "data: done\n\n"
+
+        return Response(events(), mimetype="text/event-stream")
+
+    @llm.route("/summarize")
+    def gemini_summarize():
+        return jsonify({"summary": "ok"})
+
+    @api.route("/articles")
+    def fetch_articles_similarity():
+        raise RuntimeError("index unavailable")
+
+    @api.route("/issues")
+    def get_all_issues():
+        return jsonify({"issues": []})
+
+    app = Flask(__name__)
+    app.config.update(
+        LLM_ROUTE_CONCURRENCY=1,
+        LLM_ROUTE_QUEUE=0,
+        SEARCH_ROUTE_CONCURRENCY=1,
+        SEARCH_ROUTE_QUEUE=0,
+        ROUTE_QUEUE_TIMEOUT=2.5,
+    )
+    app.config.update(config)
+    app.register_blueprint(llm)
+    app.register_blueprint(api)
+    admission.init_admission(app)
+    return app
+
+
+@pytest.fixture(autouse=True)
+def fresh_gates(monkeypatch):
+    monkeypatch.setitem(admission.gates, "llm", AdmissionGate("llm"))
+    monkeypatch.setitem(admission.gates, "search", AdmissionGate("search"))
+    release_stream.clear()
+    yield
+    release_stream.set()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_full_queue_gets_503_with_retry_after():
+    client = make_app().test_client()
+    held = client.get("/summarize")  # the test client keeps it open
+
+    busy = client.get("/summarize")
+
+    assert busy.status_code == 503
+    assert busy.headers["Retry-After"] == "3"  # ROUTE_QUEUE_TIMEOUT rounded up
+    assert "Too many llm requests" in busy.get_json()["error"]
+    assert admission.gates["llm"].stats()["rejected"] == 1
+    # Other route classes and ungated routes are unaffected.
+    assert client.get("/issues").status_code == 200
+    held.close()
+
+
+def test_slot_is_released_when_the_response_closes():
+    client = make_app().test_client()
+    gate = admission.gates["llm"]
+
+    response = client.get("/summarize")
+    assert gate.active == 1
+    response.close()
+    assert gate.active == 0
+
+    with client.get("/summarize") as again:
+        assert again.status_code == 200
+
+
+def test_queued_request_runs_once_a_slot_frees():
+    client = make_app(LLM_ROUTE_QUEUE=1).test_client()
+    gate = admission.gates["llm"]
+    held = client.get("/summarize")
+    statuses = []
+
+    waiter = threading.Thread(
+        target=lambda: statuses.append(client.get("/summarize").status_code)
+    )
+    waiter.start()
+    wait_for(lambda: gate.waiting == 1)
+    held.close()
+    waiter.join(5)
+
+    assert statuses == [200]
+
+
+def test_queued_request_times_out():
+    client = make_app(LLM_ROUTE_QUEUE=1, ROUTE_QUEUE_TIMEOUT=0.1).test_client()
+    held = client.get("/summarize")
+
+    started = time.perf_counter()
+    busy = client.get("/summarize")
+
+    assert busy.status_code == 503
+    assert busy.headers["Retry-After"] == "1"
+    assert 0.1 <= time.perf_counter() - started < 2
+    held.close()
+
+
+def test_failing_view_releases_its_slot():
+    client = make_app().test_client()
+    with client.get("/articles") as response:
+        assert response.status_code == 500
+    assert admission.gates["search"].active == 0
+
+
+@pytest.fixture
+def server():
+    """The app behind a real threaded WSGI server, which closes responses."""
+    server = make_server("127.0.0.1", 0, make_app(), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+def open_stream(server):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=5)
+    connection.request("GET", "/summarize/stream")
+    response = connection.getresponse()
+    assert response.status == 200
+    assert response.readline() == b"data: first\n"
+    return connection, response
+
+
+def test_stream_holds_its_slot_until_it_ends(server):
+    gate = admission.gates["llm"]
+    connection, response = open_stream(server)
+    assert gate.active == 1
+
+    release_stream.set()
+    body = response.read()
+
+    assert body.endswith(b"data: done\n\n")
+    wait_for(lambda: gate.active == 0)
+    connection.close()
+
+
+def test_stream_slot_is_released_when_the_client_goes_away(server):
+    gate = admission.gates["llm"]
+    connection, response = open_stream(server)
+
+    response.close()
+    connection.close()
+
+    # The next keep-alive write fails and the server closes the response.
+    wait_for(lambda: gate.active == 0)
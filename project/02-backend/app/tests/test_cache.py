@@ -0,0 +1,190 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.services import embedding
+from app.services.cache import DiskArrayStore, SingleFlight, TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the oldest
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["size"] == 2
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("a", 1)
+
+    now[0] += 4
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a", "gone") == "gone"
+    assert len(cache) == 0
+
+
+def test_ttl_cache_counts_hits_and_misses():
+    cache = TTLCache(maxsize=10)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+
+def test_ttl_cache_discard_where_and_shrinking():
+    cache = TTLCache(maxsize=10)
+    for key in [("articles", 1), ("articles", 2), ("executive", 1)]:
+        cache.set(key, key)
+    cache.discard_where(lambda key: key[0] == "articles")
+    assert len(cache) == 1
+
+    cache.configure(0, 0)
+    assert len(cache) == 0
+    cache.set("x", 1)
+    assert cache.get("x") is None
+
+
+def test_single_flight_runs_concurrent_calls_once():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("key", compute)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    while flight.coalesced < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == ["answer"] * 5
+
+
+def test_single_flight_shares_the_error_and_forgets_it():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do("key", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    # The failed call is not remembered; the next one runs again.
+    assert flight.do("key", lambda: 42) == 42
+
+
+def age(store, key, seconds):
+    path = store._path(key)
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def test_disk_store_round_trip_and_expiry(tmp_path):
+    store = DiskArrayStore(str(tmp_path), ttl=60)
+    store.set("query", np.arange(4, dtype=np.float32))
+    np.testing.assert_array_equal(store.get("query"), np.arange(4))
+
+    age(store, "query", 120)
+    assert store.get("query") is None
+    # Expired files found on read are removed.
+    assert os.listdir(tmp_path) == []
+
+
+def test_disk_store_prunes_oldest_beyond_max_entries(tmp_path):
+    store = DiskArrayStore(str(tmp_path), max_entries=3, prune_interval=3600)
+    for i in range(6):
+        store.set(f"q{i}", np.full(2, i, dtype=np.float32))
+        age(store, f"q{i}", 100 - i)
+
+    assert store.prune() == 3
+    assert [store.get(f"q{i}") is not None for i in range(6)] == [False] * 3 + [True] * 3
+
+
+def test_disk_store_prunes_expired_and_stale_temp_files(tmp_path):
+    store = DiskArrayStore(str(tmp_path), ttl=60, prune_interval=0)
+    store.set("old", np.zeros(2))
+    age(store, "old", 120)
+    leftover = tmp_path / "crashed.tmp"
+    leftover.write_bytes(b"")
+    os.utime(leftover, (0, 0))
+
+    store.set("new", np.ones(2))  # prune_interval 0: every set prunes
+
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(store._path("new"))]
+
+
+def test_disk_store_prunes_at_most_once_per_interval(tmp_path):
+    store = DiskArrayStore(str(tmp_path), max_entries=1, prune_interval=3600)
+    store.set("a", np.zeros(1))  # first set prunes, then not for an hour
+    store.set("b", np.zeros(1))
+    store.set("c", np.zeros(1))
+    assert len(os.listdir(tmp_path)) == 3
+
+
+class CountingModel:
+    """Stands in for the sentence-transformer; records what it encoded."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts):
+        self.encoded.extend([texts] if isinstance(texts, str) else texts)
+        if isinstance(texts, str):
+            return np.full(3, len(texts), dtype=np.float32)
+        return np.stack([np.full(3, len(text), dtype=np.float32) for text in texts])
+
+
+@pytest.fixture
+def query_caches(monkeypatch, tmp_path):
+    """Fresh query caches backed by a disk store in tmp_path and a stub model."""
+    model = CountingModel()
+    monkeypatch.setattr(embedding, "get_model", lambda: model)
+    monkeypatch.setattr(embedding, "embedding_cache", TTLCache(maxsize=100))
+    monkeypatch.setattr(embedding, "embedding_disk_store", DiskArrayStore(str(tmp_path)))
+    return model
+
+
+def test_batch_embeddings_fill_the_shared_disk_store(query_caches, monkeypatch):
+    first = embedding.get_query_embeddings(["Tariffs", "tariffs ", "Immigration"])
+    assert query_caches.encoded == ["Tariffs", "Immigration"]
+    assert first[0] is first[1]
+
+    # Another worker: empty in-process cache, same disk store.
+    monkeypatch.setattr(embedding, "embedding_cache", TTLCache(maxsize=100))
+    query_caches.encoded.clear()
+    again = embedding.get_query_embeddings(["tariffs", "immigration", "housing"])
+
+    assert query_caches.encoded == ["housing"]
+    np.testing.assert_array_equal(again[0], first[0])
+    assert all(not vector.flags.writeable for vector in again)
+
+
+def test_single_and_batch_lookups_share_cache_entries(query_caches, monkeypatch):
+    single = embedding.get_query_embedding("Climate policy")
+    monkeypatch.setattr(embedding, "embedding_cache", TTLCache(maxsize=100))
+
+    batch = embedding.get_query_embeddings(["climate  POLICY"])
+
+    assert query_caches.encoded == ["Climate policy"]
+    np.testing.assert_array_equal(batch[0], single)
@@ -0,0 +1,124 @@
+import gzip
+
+import pytest
+from flask import Flask, Response, jsonify
+
+from app.services import compression
+
+BIG = {"items": ["executive order text"] * 200}
+
+
+def make_client(**config):
+    app = Flask(__name__)
+    app.config.update(COMPRESS_ENABLED=True, COMPRESS_MIN_SIZE=1024, COMPRESS_LEVEL=6)
+    app.config.update(config)
+
+    @app.route("/big")
+    def big():
+        return jsonify(BIG)
+
+    @app.route("/small")
+    def small():
+        return jsonify({"status": "OK"})
+
+    @app.route("/tagged")
+    def tagged():
+        response = jsonify(BIG)
+        response.set_etag("v1")
+        return response
+
+    @app.route("/missing")
+    def missing():
+        return jsonify(BIG), 404
+
+    @app.route("/image")
+    def image():
+        return Response(b"\x89PNG" * 1000, mimetype="image/png")
+
+    @app.route("/stream")
+    def stream():
+        return Response((f"data: {i}\n\n" for i in range(500)), mimetype="text/event-stream")
+
+    compression.init_compression(app)
+    return app.test_client()
+
+
+@pytest.fixture
+def client():
+    return make_client()
+
+
+def plain_body(client):
+    return client.get("/big").data
+
+
+def test_gzip_when_accepted(client):
+    response = client.get("/big", headers={"Accept-Encoding": "gzip, deflate"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.vary
+    assert len(response.data) < len(plain_body(client))
+    assert gzip.decompress(response.data) == plain_body(client)
+
+
+@pytest.mark.parametrize("accept", [None, "identity", "gzip;q=0", "deflate"])
+def test_plain_when_gzip_is_not_accepted(client, accept):
+    headers = {"Accept-Encoding": accept} if accept else {}
+    response = client.get("/big", headers=headers)
+
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json() == BIG
+    assert "Accept-Encoding" in response.vary
+
+
+def test_responses_below_the_minimum_size_stay_plain(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.vary
+    assert response.get_json() == {"status": "OK"}
+
+
+def test_minimum_size_is_configurable():
+    client = make_client(COMPRESS_MIN_SIZE=0)
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+
+
+@pytest.mark.parametrize("path", ["/missing", "/image", "/stream"])
+def test_errors_binary_and_streams_stay_plain(client, path):
+    response = client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_compressed_etags_become_weak(client):
+    response = client.get("/tagged", headers={"Accept-Encoding": "gzip"})
+    assert response.get_etag() == ("v1", True)
+    assert client.get("/tagged").get_etag() == ("v1", False)
+
+
+def test_disabled_compression_leaves_responses_alone():
+    client = make_client(COMPRESS_ENABLED=False)
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" not in response.vary
+
+
+def test_brotli_is_preferred_when_installed(client):
+    brotli = pytest.importorskip("brotli")
+    response = client.get("/big", headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.headers["Content-Encoding"] == "br"
+    assert brotli.decompress(response.data) == plain_body(client)
+
+
+def test_client_quality_values_win_over_brotli(client, monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+    response = client.get("/big", headers={"Accept-Encoding": "br;q=0.5, gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+
+
+def test_brotli_only_clients_get_plain_without_brotli(client, monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    response = client.get("/big", headers={"Accept-Encoding": "br"})
+    assert "Content-Encoding" not in response.headers
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from app.services.embedding_model import load_model
+from bench_query_embeddings import SAMPLE_QUERIES, cosine_rows, encode
+
+# Only meaningful with the ONNX extras and the model files at hand.
+pytest.importorskip("onnxruntime")
+
+
+def load_or_skip(backend):
+    try:
+        return load_model(backend, fallback=False)
+    except (ImportError, OSError, ValueError) as e:
+        # OSError/ValueError: the model or its ONNX export could not be
+        # found locally or downloaded.
+        pytest.skip(f"{backend} backend unavailable: {e}")
+
+
+@pytest.fixture(scope="module")
+def torch_embeddings():
+    return encode(load_or_skip("torch"), SAMPLE_QUERIES)
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_onnx_backends_match_torch(backend, torch_embeddings):
+    model = load_or_skip(backend)
+    assert getattr(model, "backend", "torch") == "onnx"
+
+    similarity = cosine_rows(encode(model, SAMPLE_QUERIES), torch_embeddings)
+
+    assert similarity.min() >= 0.99
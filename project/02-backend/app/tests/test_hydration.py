@@ -0,0 +1,84 @@
+import pytest
+
+from app.services import embedding
+from app.services.cache import TTLCache
+
+
+class StubCollection:
+    """
+    Serves find() from a dict of documents, evaluating the $substrCP
+    projection hydrate_documents sends the way MongoDB 4.4+ does.
+    """
+
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: doc for doc in docs}
+        self.queries = []
+
+    def find(self, query, projection):
+        wanted = query["_id"]["$in"]
+        self.queries.append((list(wanted), projection))
+        for doc_id in wanted:
+            if doc_id in self.docs:
+                yield self.project(self.docs[doc_id], projection)
+
+    @staticmethod
+    def project(doc, projection):
+        result = {"_id": doc["_id"]}
+        for field, rule in projection.items():
+            if isinstance(rule, dict):
+                value, start, count = rule["$substrCP"]
+                source, _ = value["$ifNull"]
+                result[field] = (doc.get(source[1:]) or "")[start : start + count]
+            elif field in doc:
+                result[field] = doc[field]
+        return result
+
+
+@pytest.fixture
+def orders(monkeypatch):
+    collection = StubCollection(
+        [
+            {"_id": 1, "title": "Short order", "order_text": "Brief."},
+            {"_id": 2, "title": "Long order", "order_text": "word " * 100},
+            {"_id": 3, "title": "No text yet"},
+            {"_id": 4, "title": "Exactly ten", "order_text": "0123456789"},
+        ]
+    )
+    monkeypatch.setattr(
+        embedding, "get_mongo_client", lambda: {"WhatTheGovDoin": {"executive": collection}}
+    )
+    monkeypatch.setattr(embedding, "document_cache", TTLCache(maxsize=100))
+    return collection
+
+
+def test_texts_are_cut_by_the_server(orders):
+    docs = embedding.hydrate_documents("executive", [1, 2, 3, 4, 99], 10)
+
+    assert sorted(docs) == [1, 2, 3, 4]
+    assert docs[1]["order_text"] == "Brief."
+    assert docs[2]["order_text"] == "word word..."
+    assert docs[3]["order_text"] == ""
+    assert docs[4]["order_text"] == "0123456789"  # not cut, so no "..."
+    _, projection = orders.queries[0]
+    assert projection["order_text"]["$substrCP"][1:] == [0, 11]
+
+
+def test_zero_length_fetches_whole_texts(orders):
+    docs = embedding.hydrate_documents("executive", [2, 3], 0)
+
+    assert docs[2]["order_text"] == "word " * 100
+    assert "order_text" not in docs[3]
+    assert orders.queries[0][1] == {"title": 1, "order_text": 1}
+
+
+def test_hydrated_documents_are_cached_per_length(orders):
+    embedding.hydrate_documents("executive", [1, 2], 10)
+    docs = embedding.hydrate_documents("executive", [2, 3], 10)
+    embedding.hydrate_documents("executive", [2], 20)
+
+    assert [ids for ids, _ in orders.queries] == [[1, 2], [3], [2]]
+    assert docs[2]["order_text"] == "word word..."
+
+    embedding.forget_documents("executive", [2])
+    embedding.hydrate_documents("executive", [1, 2], 10)
+    assert orders.queries[-1][0] == [2]
@@ -0,0 +1,161 @@
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from app.routes.api_routes import api_bp
+from app.services import issues
+
+
+class StubCursor(list):
+    def sort(self, field, direction):
+        return StubCursor(sorted(self, key=lambda doc: doc[field], reverse=direction < 0))
+
+    def limit(self, count):
+        return StubCursor(self[:count])
+
+
+class StubIssues:
+    """In-memory issues collection with the calls the issues service makes."""
+
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: doc for doc in docs}
+        self.finds = 0
+
+    @staticmethod
+    def project(doc, projection):
+        return {field: doc[field] for field in projection if field in doc}
+
+    def find(self, query, projection):
+        self.finds += 1
+        after = query.get("_id", {}).get("$gt")
+        return StubCursor(
+            self.project(doc, projection)
+            for doc in self.docs.values()
+            if after is None or doc["_id"] > after
+        )
+
+    def find_one(self, query, projection, sort=None):
+        if sort:
+            field, direction = sort[0]
+            docs = [doc for doc in self.docs.values() if doc.get(field) is not None]
+            docs.sort(key=lambda doc: doc[field], reverse=direction < 0)
+        else:
+            docs = [doc for doc in self.docs.values() if doc["_id"] == query["_id"]]
+        return self.project(docs[0], projection) if docs else None
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+    def replace_one(self, query, doc, upsert=False):
+        matched = query["_id"] in self.docs
+        if matched:
+            self.docs[query["_id"]] = doc
+        return SimpleNamespace(matched_count=int(matched))
+
+
+def make_issue(i):
+    return {
+        "_id": i,
+        "issue": f"Issue {i}",
+        "summary": f"Summary {i}",
+        "llm_summary": f"LLM summary {i}",
+        "articles": [],
+        "executive_orders": [],
+    }
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = StubIssues([make_issue(i) for i in range(1, 8)])
+    monkeypatch.setattr(issues, "get_issue_collection", lambda: collection)
+    return collection
+
+
+@pytest.fixture
+def client(collection):
+    app = Flask(__name__)
+    app.config.update(ISSUES_PAGE_SIZE=3, ISSUES_MAX_PAGE_SIZE=5, ISSUES_VERSION_TTL=60)
+    app.register_blueprint(api_bp)
+    issues.configure_issues(app)
+    issues.mark_issues_changed()
+    yield app.test_client()
+    issues.mark_issues_changed()
+
+
+def test_cursor_pagination_walks_every_issue(client):
+    seen, after, pages = [], None, 0
+    while True:
+        url = "/api/issues" if after is None else f"/api/issues?after={after}"
+        body = client.get(url).get_json()
+        pages += 1
+        seen += [issue["_id"] for issue in body["issues"]]
+        after = body["next"]
+        if after is None:
+            break
+
+    assert seen == list(range(1, 8))
+    assert pages == 3  # 3 + 3 + 1 with ISSUES_PAGE_SIZE=3
+
+
+def test_list_pages_only_carry_list_fields(client):
+    issue = client.get("/api/issues?limit=1").get_json()["issues"][0]
+    assert set(issue) == {"_id", "issue", "summary"}
+
+
+def test_limit_is_capped_by_the_max_page_size(client):
+    body = client.get("/api/issues?limit=100").get_json()
+    assert [issue["_id"] for issue in body["issues"]] == [1, 2, 3, 4, 5]
+    assert body["next"] == 5
+    body = client.get("/api/issues?after=5&limit=100").get_json()
+    assert ([issue["_id"] for issue in body["issues"]], body["next"]) == ([6, 7], None)
+
+
+def test_responses_carry_weak_etags(client):
+    response = client.get("/api/issues")
+    etag, weak = response.get_etag()
+    assert weak and etag
+    assert response.headers["Cache-Control"] == "no-cache"
+    # Each page has its own tag.
+    assert client.get("/api/issues?after=3").get_etag()[0] != etag
+    assert client.get("/api/issues").get_etag()[0] == etag
+
+
+def test_matching_if_none_match_gets_a_304(client, collection):
+    etag = client.get("/api/issues").headers["ETag"]
+    finds = collection.finds
+
+    response = client.get("/api/issues", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == etag
+    assert collection.finds == finds  # answered without reading any issue
+
+
+def test_detail_route_revalidates_too(client):
+    response = client.get("/api/issues/2")
+    assert response.get_json()["llm_summary"] == "LLM summary 2"
+    again = client.get("/api/issues/2", headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+    assert client.get("/api/issues/99").status_code == 404
+
+
+def test_post_changes_the_etag(client):
+    list_etag = client.get("/api/issues").headers["ETag"]
+    detail_etag = client.get("/api/issues/2").headers["ETag"]
+
+    edited = dict(make_issue(2), summary="Edited")
+    assert client.post("/api/issues", json=edited).status_code == 200
+
+    response = client.get("/api/issues", headers={"If-None-Match": list_etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != list_etag
+    assert response.get_json()["issues"][1]["summary"] == "Edited"
+    detail = client.get("/api/issues/2", headers={"If-None-Match": detail_etag})
+    assert detail.status_code == 200
+
+
+def test_post_rejects_unknown_and_incomplete_issues(client):
+    assert client.post("/api/issues", json=make_issue(99)).status_code == 404
+    assert client.post("/api/issues", json={"_id": 1}).status_code == 400
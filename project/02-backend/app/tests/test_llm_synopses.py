@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from app.services import llm
+
+
+class StubModel:
+    """Stands in for the Gemini model; records how many calls overlap."""
+
+    model_name = "stub"
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, request_options=None):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            if "slow" in prompt:
+                time.sleep(2)
+            else:
+                time.sleep(self.delay)
+            if "fail" in prompt:
+                raise RuntimeError("quota exceeded")
+
+            class Reply:
+                text = f"synopsis of {prompt}"
+
+            return Reply()
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(
+        LLM_MAX_CONCURRENCY=2,
+        LLM_TIMEOUT=5,
+        LLM_SYNOPSIS_DEADLINE=1,
+        SYNOPSIS_CACHE_ENABLED=False,
+        SUMMARY_CACHE_SIZE=0,
+        SUMMARY_CACHE_TTL=0,
+    )
+    llm.init_llm_pool(app)
+    with app.app_context():
+        yield app
+
+
+def make_jobs(prompts):
+    return [
+        ("articles", {"article_id": i, "name": f"doc {i}", "summary": f"summary {i}"}, prompt)
+        for i, prompt in enumerate(prompts)
+    ]
+
+
+def test_fan_out_is_bounded_by_llm_max_concurrency(app):
+    model = StubModel()
+    jobs = make_jobs([f"doc {i}" for i in range(8)])
+
+    started = time.perf_counter()
+    llm.add_synopses(model, jobs)
+    elapsed = time.perf_counter() - started
+
+    assert model.calls == 8
+    assert model.peak == 2
+    # Eight 50 ms calls two at a time, not one after another.
+    assert elapsed < 8 * model.delay
+    assert [doc["llm_synopses"] for _, doc, _ in jobs] == [
+        f"synopsis of doc {i}" for i in range(8)
+    ]
+
+
+def test_failed_calls_fall_back_to_the_summary(app):
+    model = StubModel()
+    jobs = make_jobs(["doc 0", "fail 1", "doc 2"])
+
+    llm.add_synopses(model, jobs)
+
+    docs = [doc for _, doc, _ in jobs]
+    assert docs[0]["llm_synopses"] == "synopsis of doc 0"
+    assert docs[1]["llm_synopses"] == llm.fallback_synopsis(docs[1])
+    assert docs[2]["llm_synopses"] == "synopsis of doc 2"
+
+
+def test_calls_past_the_deadline_fall_back(app):
+    model = StubModel()
+    jobs = make_jobs(["doc 0", "slow 1"])
+
+    started = time.perf_counter()
+    llm.add_synopses(model, jobs)
+
+    assert time.perf_counter() - started < 2
+    assert jobs[0][1]["llm_synopses"] == "synopsis of doc 0"
+    assert jobs[1][1]["llm_synopses"] == "summary 1"
+
+
+def test_fallback_trims_long_summaries():
+    doc = {"summary": "word " * 100}
+    synopsis = llm.fallback_synopsis(doc, length=20)
+    assert synopsis.endswith("...")
+    assert len(synopsis) <= 23
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.metadata_index import MetadataIndex
+
+SOURCES = ["ap", "reuters", "npr", None]
+
+
+@pytest.fixture
+def docs():
+    rng = np.random.default_rng(0)
+    docs = []
+    for i in range(500):
+        doc = {"source": SOURCES[rng.integers(len(SOURCES))], "number": str(14000 + i % 40)}
+        if rng.random() > 0.1:  # some documents have no date at all
+            doc["createdAt"] = datetime(2025, 1, 1) + timedelta(hours=int(rng.integers(24 * 90)))
+        docs.append(doc)
+    return docs
+
+
+@pytest.fixture
+def index(docs):
+    empty = MetadataIndex(["createdAt"], ["source", "number"])
+    return empty.build(empty.column_values(docs))
+
+
+def brute_force(docs, keep):
+    return [i for i, doc in enumerate(docs) if keep(doc)]
+
+
+def in_range(doc, start, end):
+    created = doc.get("createdAt")
+    return (
+        created is not None
+        and (start is None or created >= start)
+        and (end is None or created <= end)
+    )
+
+
+@pytest.mark.parametrize(
+    "start, end",
+    [
+        (datetime(2025, 1, 15), datetime(2025, 2, 15)),
+        (None, datetime(2025, 1, 20)),
+        (datetime(2025, 3, 1), None),
+        (None, None),
+        (datetime(2025, 2, 1), datetime(2025, 1, 1)),
+        (datetime(2026, 1, 1), None),
+    ],
+)
+def test_date_ranges_match_brute_force(docs, index, start, end):
+    rows = index.rows({"createdAt": (start, end)})
+    assert rows.tolist() == brute_force(docs, lambda d: in_range(d, start, end))
+
+
+def test_date_range_bounds_are_inclusive(docs, index):
+    moment = next(doc["createdAt"] for doc in docs if "createdAt" in doc)
+    rows = index.rows({"createdAt": (moment, moment)})
+    assert rows.tolist() == brute_force(docs, lambda d: d.get("createdAt") == moment)
+    assert len(rows) >= 1
+
+
+@pytest.mark.parametrize(
+    "wanted", [["ap"], ["ap", "npr"], "reuters", [None], ["unknown"], [], ["ap", "ap"]]
+)
+def test_exact_postings_match_brute_force(docs, index, wanted):
+    values = [wanted] if isinstance(wanted, str) else wanted
+    rows = index.rows({"source": wanted})
+    assert rows.tolist() == brute_force(docs, lambda d: d["source"] in values)
+
+
+def test_exact_values_are_compared_as_strings(docs, index):
+    rows = index.rows({"number": [14003]})
+    assert rows.tolist() == brute_force(docs, lambda d: d["number"] == "14003")
+
+
+def test_combined_filters_intersect(docs, index):
+    start, end = datetime(2025, 1, 10), datetime(2025, 2, 20)
+    filters = {"createdAt": (start, end), "source": ["ap", "npr"], "number": ["14001", "14002"]}
+
+    rows = index.rows(filters)
+
+    assert rows.dtype == np.int64
+    assert rows.tolist() == brute_force(
+        docs,
+        lambda d: in_range(d, start, end)
+        and d["source"] in ("ap", "npr")
+        and d["number"] in ("14001", "14002"),
+    )
+
+
+def test_combined_filters_with_no_overlap(index):
+    rows = index.rows({"source": ["unknown"], "createdAt": (None, None)})
+    assert rows.tolist() == []
+
+
+def test_unknown_field_is_rejected(index):
+    with pytest.raises(ValueError, match="Cannot filter on 'title'"):
+        index.rows({"title": ["x"]})
+
+
+def test_build_fills_missing_columns():
+    sources = np.array(["ap", "npr"], dtype=object)
+    index = MetadataIndex(["createdAt"], ["source"]).build({"source": sources})
+    assert index.rows({"createdAt": (None, None)}).tolist() == []
+    assert index.rows({"source": "npr"}).tolist() == [1]
@@ -0,0 +1,100 @@
+import pytest
+from flask import Flask
+
+from app.routes import api_routes
+from app.routes.api_routes import api_bp
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    """Replaces the model and indexes; records the searches that ran."""
+    calls = []
+    monkeypatch.setattr(
+        api_routes, "get_query_embeddings", lambda queries: [None] * len(queries)
+    )
+
+    def search_documents_batch(index, queries, top_k, query_embeddings, filters):
+        calls.append((index.collection_name, top_k, filters))
+        return [[{"query": query, "top_k": top_k}] for query in queries]
+
+    monkeypatch.setattr(api_routes, "search_documents_batch", search_documents_batch)
+    return calls
+
+
+@pytest.fixture
+def client(searches):
+    app = Flask(__name__)
+    app.config.update(SEARCH_BATCH_MAX_QUERIES=3)
+    app.register_blueprint(api_bp)
+    return app.test_client()
+
+
+def post(client, **body):
+    return client.post("/api/search/batch", json=body)
+
+
+@pytest.mark.parametrize(
+    "queries",
+    [None, "tariffs", {"q": "tariffs"}, [], ["tariffs", ""], ["tariffs", "   "], ["tariffs", 3]],
+)
+def test_queries_must_be_a_list_of_non_empty_strings(client, searches, queries):
+    response = post(client, queries=queries)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "queries must be a list of non-empty strings"
+    assert searches == []
+
+
+def test_too_many_queries_are_rejected(client):
+    response = post(client, queries=["a", "b", "c", "d"])
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "At most 3 queries per batch"
+
+
+@pytest.mark.parametrize("top_k", [True, False, 0, -1, 2.5, "5", None])
+def test_top_k_must_be_a_positive_integer(client, top_k):
+    response = post(client, queries=["tariffs"], top_k=top_k)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "top_k must be a positive integer"
+
+
+@pytest.mark.parametrize(
+    "collections",
+    [["issues"], ["articles", "users"], "articles", {"articles": 1}, [["articles"]], [None]],
+)
+def test_collections_must_be_articles_or_executive(client, collections):
+    response = post(client, queries=["tariffs"], collections=collections)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == (
+        "collections must be a subset of ['articles', 'executive']"
+    )
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [["executive"], {"executive": "2025-01-01"}, {"executive": {"signing_date_from": "soon"}}],
+)
+def test_malformed_filters_are_rejected(client, searches, filters):
+    response = post(client, queries=["tariffs"], collections=["executive"], filters=filters)
+    assert response.status_code == 400
+    assert searches == []
+
+
+def test_a_valid_batch_searches_each_collection_once(client, searches):
+    response = post(
+        client,
+        queries=["tariffs", "immigration"],
+        collections=["executive", "executive"],
+        top_k=2,
+        filters={"executive": {"executive_order_number": "14151"}},
+    )
+
+    assert response.status_code == 200
+    assert searches == [("executive", 2, {"executive_order_number": ["14151"]})]
+    results = response.get_json()["results"]
+    assert [result["query"] for result in results] == ["tariffs", "immigration"]
+    assert results[1]["executive"] == [{"query": "immigration", "top_k": 2}]
+
+
+def test_collections_default_to_both(client, searches):
+    assert post(client, queries=["tariffs"]).status_code == 200
+    assert [name for name, _, _ in searches] == ["articles", "executive"]
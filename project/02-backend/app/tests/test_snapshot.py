@@ -0,0 +1,163 @@
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from flask import Flask
+
+from app.services import embedding
+from app.services.snapshot import current_version, read_snapshot, write_snapshot
+from app.services.vector_index import VectorIndex
+
+DIM = 8
+
+
+def make_docs(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "_id": i,
+            "order_text_embedding": rng.normal(size=DIM).tolist(),
+            "signing_date": datetime(2025, 1, 20) + timedelta(days=i),
+            "executive_order_number": str(14148 + i),
+        }
+        for i in range(count)
+    ]
+
+
+def executive(docs=()):
+    index = VectorIndex(
+        "executive",
+        "order_text_embedding",
+        date_fields=("signing_date",),
+        exact_fields=("executive_order_number",),
+    )
+    index.apply_changes(docs)
+    return index
+
+
+def test_round_trip_restores_ids_vectors_and_metadata(tmp_path):
+    index = executive(make_docs(30))
+    since = datetime(2025, 3, 1, 12, 30)
+    version = write_snapshot(str(tmp_path), index, {"max_id": 29, "updated_since": since})
+
+    ids, matrix, columns, manifest = read_snapshot(str(tmp_path), "executive")
+
+    original_ids, original_matrix, original_columns = index.live_arrays()
+    assert ids.tolist() == original_ids.tolist()
+    assert all(type(doc_id) is int for doc_id in ids)
+    np.testing.assert_array_equal(matrix, original_matrix)
+    assert not matrix.flags.writeable
+    np.testing.assert_array_equal(columns["signing_date"], original_columns["signing_date"])
+    assert columns["executive_order_number"].tolist() == original_columns[
+        "executive_order_number"
+    ].tolist()
+    assert manifest["version"] == version
+    assert (manifest["count"], manifest["dim"]) == (30, DIM)
+    assert manifest["watermarks"] == {"max_id": 29, "updated_since": since}
+
+    # A mapped copy answers searches and filters like the original.
+    mapped = executive()
+    mapped.load_arrays(ids, matrix, columns, snapshot_info=manifest)
+    query = np.random.default_rng(1).normal(size=DIM)
+    filters = {"executive_order_number": ["14150", "14160"]}
+    assert mapped.search(query, 5) == index.search(query, 5)
+    assert mapped.search(query, 5, filters) == index.search(query, 5, filters)
+
+
+def test_round_trip_of_an_empty_index(tmp_path):
+    index = executive()
+    index.load(SimpleNamespace(find=lambda query, projection: []))
+    write_snapshot(str(tmp_path), index)
+    ids, matrix, columns, manifest = read_snapshot(str(tmp_path), "executive")
+    assert (len(ids), matrix.shape, manifest["count"]) == (0, (0, 0), 0)
+    assert set(columns) == {"signing_date", "executive_order_number"}
+
+
+def test_overlay_patches_are_exported(tmp_path):
+    write_snapshot(str(tmp_path), executive(make_docs(20)))
+    mapped = executive()
+    ids, matrix, columns, manifest = read_snapshot(str(tmp_path), "executive")
+    mapped.load_arrays(ids, matrix, columns, manifest)
+    mapped.apply_changes(make_docs(25, seed=2)[18:], deleted_ids=[3])
+
+    write_snapshot(str(tmp_path), mapped)
+    ids, _, columns, _ = read_snapshot(str(tmp_path), "executive")
+
+    assert sorted(ids.tolist()) == [i for i in range(25) if i != 3]
+    number = dict(zip(ids.tolist(), columns["executive_order_number"].tolist()))
+    assert number[24] == "14172"
+
+
+def test_old_versions_are_pruned(tmp_path):
+    index = executive(make_docs(5))
+    versions = [write_snapshot(str(tmp_path), index, keep=2) for _ in range(4)]
+
+    assert current_version(str(tmp_path), "executive") == versions[-1]
+    assert sorted(os.listdir(tmp_path / "executive")) == sorted(versions[-2:] + ["CURRENT"])
+
+
+def test_non_integer_ids_are_rejected(tmp_path):
+    index = executive([dict(make_docs(1)[0], _id="abc")])
+    with pytest.raises(ValueError, match="integer _ids"):
+        write_snapshot(str(tmp_path), index)
+
+
+def test_missing_snapshot_reads_as_none(tmp_path):
+    assert read_snapshot(str(tmp_path), "executive") is None
+
+
+@pytest.fixture
+def snapshot_app(tmp_path, monkeypatch):
+    """Fresh, unloaded search indexes and an app pointed at tmp_path."""
+    articles = VectorIndex("articles", "summary_embedding", date_fields=("createdAt",))
+    monkeypatch.setattr(embedding, "article_index", articles)
+    monkeypatch.setattr(embedding, "executive_index", executive())
+    app = Flask(__name__)
+    app.config.update(EMBEDDING_SNAPSHOT_DIR=str(tmp_path))
+    return app
+
+
+def test_matching_snapshots_are_mapped(snapshot_app, tmp_path):
+    write_snapshot(str(tmp_path), executive(make_docs(10)))
+
+    embedding.load_embedding_snapshots(snapshot_app)
+
+    assert embedding.executive_index.shared
+    assert len(embedding.executive_index) == 10
+    assert not embedding.article_index.loaded  # no snapshot: left to Mongo
+
+
+def test_snapshot_of_another_embedding_field_is_ignored(snapshot_app, tmp_path, caplog):
+    other = executive(make_docs(10))
+    other.embedding_field = "title_embedding"
+    write_snapshot(str(tmp_path), other)
+
+    embedding.load_embedding_snapshots(snapshot_app)
+
+    assert not embedding.executive_index.loaded
+    assert "snapshot of title_embedding" in caplog.text
+
+
+def test_snapshot_without_current_metadata_is_ignored(snapshot_app, tmp_path, caplog):
+    # Written before executive_order_number became filterable.
+    stale = VectorIndex("executive", "order_text_embedding", date_fields=("signing_date",))
+    stale.apply_changes(make_docs(10))
+    write_snapshot(str(tmp_path), stale)
+
+    embedding.load_embedding_snapshots(snapshot_app)
+
+    assert not embedding.executive_index.loaded
+    assert "without executive_order_number" in caplog.text
+
+
+def test_unreadable_snapshot_is_ignored(snapshot_app, tmp_path, caplog):
+    write_snapshot(str(tmp_path), executive(make_docs(10)))
+    version = current_version(str(tmp_path), "executive")
+    os.remove(tmp_path / "executive" / version / "vectors.npy")
+
+    embedding.load_embedding_snapshots(snapshot_app)
+
+    assert not embedding.executive_index.loaded
+    assert "Ignoring executive snapshot" in caplog.text
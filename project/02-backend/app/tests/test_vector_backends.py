@@ -0,0 +1,166 @@
+import numpy as np
+import pytest
+
+from app.services import vector_index
+from app.services.vector_backends import (
+    ExactBackend,
+    IVFBackend,
+    OverlayBackend,
+    make_backend_factory,
+)
+from app.services.vector_index import VectorIndex, normalize_rows
+
+DIM = 32
+
+
+def clustered(count, seed=0, clusters=40):
+    """Unit vectors scattered around random centers, like real embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, DIM))
+    points = centers[rng.integers(clusters, size=count)] + 0.3 * rng.normal(size=(count, DIM))
+    return normalize_rows(points.astype(np.float32))
+
+
+def recall(backend, exact, queries, top_k):
+    found = 0
+    for (rows, _), (truth, _) in zip(
+        backend.search_batch(queries, top_k), exact.search_batch(queries, top_k)
+    ):
+        found += len(set(rows.tolist()) & set(truth.tolist()))
+    return found / (len(queries) * top_k)
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return clustered(4000)
+
+
+@pytest.fixture(scope="module")
+def queries():
+    return clustered(50, seed=1)
+
+
+@pytest.mark.parametrize(
+    "params, minimum",
+    [
+        ({"nlist": 64, "nprobe": 64}, 1.0),  # probing every list is exact
+        ({"nlist": 64, "nprobe": 16}, 0.9),
+        ({"nlist": 64, "nprobe": 16, "pq_m": 8, "rerank": 8}, 0.85),
+    ],
+)
+def test_ivf_recall_against_brute_force(corpus, queries, params, minimum):
+    exact = ExactBackend().build(corpus)
+    backend = IVFBackend(**params).build(corpus)
+    assert recall(backend, exact, queries, 10) >= minimum
+
+
+def test_ivf_scores_are_exact_for_returned_rows(corpus, queries):
+    backend = IVFBackend(nlist=64, nprobe=8, pq_m=8).build(corpus)
+    rows, scores = backend.search(queries[0], 10)
+    np.testing.assert_allclose(scores, corpus[rows] @ queries[0], rtol=1e-5)
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_ivf_reuses_training_until_the_corpus_doubles(corpus):
+    first = IVFBackend(nlist=16).build(corpus[:1000])
+    grown = IVFBackend(nlist=16).build(corpus[:2000], previous=first)
+    assert grown.centroids is first.centroids
+    rebuilt = IVFBackend(nlist=16).build(corpus[:2001], previous=first)
+    assert rebuilt.centroids is not first.centroids
+    assert rebuilt.trained_on == 2001
+
+
+def test_pq_m_must_divide_the_dimension(corpus):
+    with pytest.raises(ValueError, match="IVF_PQ_M=5"):
+        IVFBackend(nlist=4, pq_m=5).build(corpus[:500])
+
+
+def docs_for(ids, vectors):
+    return [{"_id": i, "embedding": v.tolist()} for i, v in zip(ids, vectors)]
+
+
+def mapped_index(matrix, backend_factory=ExactBackend):
+    """An index over a read-only matrix, standing in for a mapped snapshot."""
+    matrix = matrix.copy()
+    matrix.flags.writeable = False
+    ids = np.empty(len(matrix), dtype=object)
+    ids[:] = list(range(len(matrix)))
+    index = VectorIndex("articles", "embedding", backend_factory)
+    index.load_arrays(ids, matrix)
+    return index
+
+
+def private_index(ids, matrix):
+    index = VectorIndex("articles", "embedding")
+    index.apply_changes(docs_for(ids, matrix))
+    return index
+
+
+def patch(index, step, seed):
+    """Replace, delete and add a few documents; returns the expected state."""
+    rng = np.random.default_rng(seed)
+    ids = list(index.doc_ids)
+    replaced = rng.choice(ids, 5, replace=False).tolist()
+    deleted = set(rng.choice([i for i in ids if i not in replaced], 5, replace=False).tolist())
+    added = list(range(10000 * step, 10000 * step + 5))
+    changed = docs_for(replaced + added, clustered(10, seed=seed))
+    index.apply_changes(changed, deleted)
+    return changed, deleted
+
+
+def assert_same_results(index, expected, queries, top_k=10):
+    results = zip(index.search_batch(queries, top_k), expected.search_batch(queries, top_k))
+    for hits, truth in results:
+        assert [doc_id for doc_id, _ in hits] == [doc_id for doc_id, _ in truth]
+        np.testing.assert_allclose([s for _, s in hits], [s for _, s in truth], atol=1e-5)
+
+
+@pytest.mark.parametrize(
+    "factory", [ExactBackend, make_backend_factory("ivf", nlist=32, nprobe=32)]
+)
+def test_overlay_patches_match_a_private_rebuild(corpus, queries, factory):
+    base = corpus[:2000]
+    index = mapped_index(base, factory)
+    state = {i: v for i, v in enumerate(base)}
+
+    for step in range(1, 4):  # patches stack on an existing overlay
+        changed, deleted = patch(index, step, seed=step)
+        for doc in changed:
+            state[doc["_id"]] = np.asarray(doc["embedding"], dtype=np.float32)
+        for doc_id in deleted:
+            state.pop(doc_id, None)
+
+    backend = index._snapshot[2]
+    assert isinstance(backend, OverlayBackend)
+    assert index.shared
+    assert len(index) == len(state)
+    np.testing.assert_array_equal(index._snapshot[1], base)  # base never written
+    expected = private_index(list(state), np.array(list(state.values())))
+    assert_same_results(index, expected, queries)
+    assert sorted(index.doc_ids) == sorted(state)
+
+
+def test_overlay_overflow_moves_to_a_private_copy(corpus, queries, monkeypatch):
+    monkeypatch.setattr(vector_index, "OVERLAY_MIN_ROWS", 30)
+    base = corpus[:500]
+    index = mapped_index(base)
+    state = {i: v for i, v in enumerate(base)}
+
+    step = 0
+    while index.shared:
+        step += 1
+        changed, deleted = patch(index, step, seed=step)
+        for doc in changed:
+            state[doc["_id"]] = np.asarray(doc["embedding"], dtype=np.float32)
+        for doc_id in deleted:
+            state.pop(doc_id, None)
+
+    # The first patch uses 20 rows (10 masked, 10 overlaid) of the 30
+    # allowed; the 15 pending in the second no longer fit.
+    assert step == 2
+    ids, matrix, backend, _ = index._snapshot
+    assert not isinstance(backend, OverlayBackend)
+    assert matrix.flags.writeable and not np.shares_memory(matrix, base)
+    expected = private_index(list(state), np.array(list(state.values())))
+    assert_same_results(index, expected, queries)
+    assert sorted(index.doc_ids) == sorted(state)
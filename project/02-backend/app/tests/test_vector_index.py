@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.vector_index import VectorIndex
+
+DIM = 16
+
+
+class StubCollection:
+    """Just enough of a pymongo collection for VectorIndex.load()."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection):
+        return [
+            {field: doc[field] for field in ["_id", *projection] if field in doc}
+            for doc in self.docs
+        ]
+
+
+def make_docs(count, seed=0, start=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "_id": start + i,
+            "embedding": rng.normal(size=DIM).tolist(),
+            "createdAt": datetime(2025, 1, 1) + timedelta(days=(start + i) % 60),
+            "source": ["ap", "reuters", "npr"][(start + i) % 3],
+        }
+        for i in range(count)
+    ]
+
+
+def brute_force(docs, query, top_k, keep=lambda doc: True):
+    """Cosine top_k by scoring every (kept) document in plain NumPy."""
+    docs = [doc for doc in docs if doc.get("embedding") and keep(doc)]
+    if not docs:
+        return []
+    matrix = np.array([doc["embedding"] for doc in docs], dtype=np.float64)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    query = np.asarray(query, dtype=np.float64)
+    scores = matrix @ (query / np.linalg.norm(query))
+    order = np.argsort(-scores)[:top_k]
+    return [(docs[i]["_id"], scores[i]) for i in order]
+
+
+def assert_same_hits(hits, expected):
+    assert [doc_id for doc_id, _ in hits] == [doc_id for doc_id, _ in expected]
+    np.testing.assert_allclose(
+        [score for _, score in hits], [score for _, score in expected], atol=1e-5
+    )
+
+
+def loaded_index(docs):
+    index = VectorIndex("articles", "embedding", date_fields=["createdAt"], exact_fields=["source"])
+    index.load(StubCollection(docs))
+    return index
+
+
+@pytest.fixture
+def queries():
+    return np.random.default_rng(42).normal(size=(8, DIM)).astype(np.float32)
+
+
+@pytest.mark.parametrize("top_k", [1, 5, 50, 500])
+def test_search_matches_brute_force(queries, top_k):
+    docs = make_docs(200)
+    index = loaded_index(docs)
+
+    for query in queries:
+        assert_same_hits(index.search(query, top_k), brute_force(docs, query, top_k))
+
+
+def test_search_batch_matches_single_searches(queries):
+    index = loaded_index(make_docs(200))
+    for hits, query in zip(index.search_batch(queries, 7), queries):
+        assert_same_hits(hits, index.search(query, 7))
+
+
+def test_degenerate_searches():
+    index = loaded_index(make_docs(10))
+    assert index.search(np.ones(DIM), top_k=0) == []
+    assert index.search_batch([], top_k=5) == []
+    assert VectorIndex("articles", "embedding").search(np.ones(DIM)) == []
+
+    hits = index.search(np.zeros(DIM), top_k=3)
+    assert [score for _, score in hits] == [0.0] * 3
+
+
+def test_filtered_search_matches_brute_force(queries):
+    docs = make_docs(300)
+    index = loaded_index(docs)
+    start, end = datetime(2025, 1, 10), datetime(2025, 1, 20)
+    filters = {"createdAt": (start, end), "source": ["ap", "npr"]}
+
+    def keep(doc):
+        return start <= doc["createdAt"] <= end and doc["source"] in ("ap", "npr")
+
+    for query in queries:
+        assert_same_hits(index.search(query, 10, filters), brute_force(docs, query, 10, keep))
+
+
+def apply_to_docs(docs, changed, deleted):
+    by_id = {doc["_id"]: doc for doc in docs}
+    by_id.update({doc["_id"]: doc for doc in changed})
+    return [doc for doc_id, doc in by_id.items() if doc_id not in deleted]
+
+
+def test_apply_changes_matches_a_fresh_load(queries):
+    docs = make_docs(200)
+    index = loaded_index(docs)
+    version = index.version
+
+    replaced = make_docs(5, seed=1, start=10)
+    added = make_docs(5, seed=2, start=1000)
+    emptied = [{"_id": 20, "embedding": None}]
+    deleted = {0, 1, 2, 12, 999}
+    index.apply_changes(replaced + added + emptied, deleted)
+
+    current = apply_to_docs(docs, replaced + added + emptied, deleted)
+    assert index.version == version + 1
+    assert len(index) == len(current) - 1  # 20 lost its embedding
+    assert sorted(index.doc_ids) == sorted(doc["_id"] for doc in current if doc["embedding"])
+    for query in queries:
+        assert_same_hits(index.search(query, 20), brute_force(current, query, 20))
+    # The metadata of patched and appended rows moves with them.
+    hits = index.search(queries[0], 500, {"source": "ap"})
+    assert_same_hits(hits, brute_force(current, queries[0], 500, lambda d: d["source"] == "ap"))
+
+
+def test_apply_changes_on_an_empty_index(queries):
+    index = VectorIndex("articles", "embedding")
+    docs = make_docs(20)
+    index.apply_changes(docs)
+
+    assert len(index) == 20
+    assert_same_hits(index.search(queries[0], 5), brute_force(docs, queries[0], 5))
+
+
+def test_apply_changes_keeps_the_last_duplicate(queries):
+    docs = make_docs(50)
+    index = loaded_index(docs)
+    first, last = make_docs(1, seed=3, start=7)[0], make_docs(1, seed=4, start=7)[0]
+    index.apply_changes([first, last])
+
+    current = apply_to_docs(docs, [last], set())
+    assert_same_hits(index.search(queries[0], 50), brute_force(current, queries[0], 50))
@@ -0,0 +1,121 @@
+"""
+Parity and speed check for the query embedding backends.
+
+    python bench_query_embeddings.py
+    python bench_query_embeddings.py --backends onnx-int8 --queries-file queries.txt
+
+Every backend encodes the same queries as the torch model; the minimum and
+mean cosine similarity to the torch embeddings are reported next to
+single-query latency and batch throughput. Exits non-zero when a backend
+falls below --min-cosine, so it can gate a switch of EMBEDDING_BACKEND.
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from app.services.embedding_model import BACKENDS, load_model
+
+SAMPLE_QUERIES = [
+    "tariffs on imported steel and aluminum",
+    "federal hiring freeze",
+    "immigration enforcement at the southern border",
+    "student loan forgiveness",
+    "Department of Education funding cuts",
+    "climate policy and withdrawal from the Paris agreement",
+    "birthright citizenship executive order",
+    "federal workforce return to office",
+    "DOGE government efficiency cuts",
+    "transgender service members in the military",
+    "energy emergency and oil drilling permits",
+    "TikTok ban enforcement delay",
+    "foreign aid pause USAID",
+    "diversity equity and inclusion programs in federal agencies",
+    "pardons for January 6 defendants",
+    "artificial intelligence regulation",
+    "Medicaid work requirements",
+    "sanctions on the International Criminal Court",
+    "renaming the Gulf of Mexico",
+    "How do the new tariffs affect grocery prices for families?",
+]
+
+
+def encode(model, texts, batch_size=32):
+    return np.asarray(model.encode(texts, batch_size=batch_size), dtype=np.float32)
+
+
+def cosine_rows(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.einsum("ij,ij->i", a, b)
+
+
+def measure(model, queries, repeats, batch_size):
+    # First call pays one-off graph/kernel setup; keep it out of the numbers.
+    encode(model, queries[:1])
+    timings = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        model.encode(queries[i % len(queries)])
+        timings.append((time.perf_counter() - start) * 1000)
+
+    batch = (queries * (1 + 256 // len(queries)))[:256]
+    start = time.perf_counter()
+    encode(model, batch, batch_size)
+    throughput = len(batch) / (time.perf_counter() - start)
+    return np.percentile(timings, 50), np.percentile(timings, 99), throughput
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS[1:], default=list(BACKENDS[1:]))
+    parser.add_argument("--onnx-file", help="ONNX file inside the model repo, e.g. onnx/model_qint8_avx512.onnx")
+    parser.add_argument("--queries-file", help="one query per line (default: built-in sample)")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    if args.queries_file:
+        with open(args.queries_file, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = SAMPLE_QUERIES
+
+    start = time.perf_counter()
+    baseline = load_model("torch")
+    load_ms = (time.perf_counter() - start) * 1000
+    reference = encode(baseline, queries)
+    rows = [("torch", load_ms, 1.0, 1.0) + measure(baseline, queries, args.repeats, args.batch_size)]
+
+    failed = []
+    for backend in args.backends:
+        start = time.perf_counter()
+        try:
+            model = load_model(backend, args.onnx_file, fallback=False)
+        except (ImportError, TypeError, OSError, ValueError) as e:
+            print(f"{backend}: could not load ({e})")
+            failed.append(backend)
+            continue
+        load_ms = (time.perf_counter() - start) * 1000
+        similarity = cosine_rows(encode(model, queries), reference)
+        rows.append(
+            (backend, load_ms, float(similarity.min()), float(similarity.mean()))
+            + measure(model, queries, args.repeats, args.batch_size)
+        )
+        if similarity.min() < args.min_cosine:
+            failed.append(backend)
+
+    print(f"{len(queries)} queries, {args.repeats} single-query runs, min cosine {args.min_cosine}")
+    print(f"{'backend':<10} {'load ms':>8} {'min cos':>8} {'mean cos':>9} {'p50 ms':>7} {'p99 ms':>7} {'texts/s':>8}")
+    for backend, load_ms, low, mean, p50, p99, throughput in rows:
+        print(
+            f"{backend:<10} {load_ms:>8.0f} {low:>8.4f} {mean:>9.4f} "
+            f"{p50:>7.2f} {p99:>7.2f} {throughput:>8.0f}"
+        )
+    if failed:
+        print(f"FAILED: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Recall@k vs latency report for the similarity search backends.
+
+    python bench_vector_backends.py --collection executive
+    python bench_vector_backends.py --synthetic 200000 --nprobe 4 8 16 --pq-m 0 16
+
+Ground truth comes from the exact backend; every IVF setting is scored on
+the same queries so the numbers can be used to pick IVF_* settings.
+"""
+import argparse
+import time
+import numpy as np
+from pymongo import MongoClient
+from app.config import Config
+from app.services.embedding_codec import decode_embedding
+from app.services.vector_backends import ExactBackend, IVFBackend
+from app.services.vector_index import normalize_rows
+
+EMBEDDING_FIELDS = {
+    "articles": "summary_embedding",
+    "executive": "order_text_embedding",
+}
+
+
+def load_from_mongo(collection_name):
+    config = Config()
+    client = MongoClient(
+        f"{config.MONGO_URI}?authSource=admin",
+        username=config.MONGO_INITDB_ROOT_USERNAME,
+        password=config.MONGO_INITDB_ROOT_PASSWORD,
+    )
+    field = EMBEDDING_FIELDS[collection_name]
+    cursor = client["WhatTheGovDoin"][collection_name].find(
+        {field: {"$ne": None}}, {field: 1, "_id": 0}
+    )
+    vectors = [decode_embedding(doc[field]) for doc in cursor if doc.get(field)]
+    client.close()
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def synthetic_corpus(size, dim=384, clusters=256, seed=0):
+    # Clustered data behaves much more like real embeddings than pure noise.
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size)
+    return centers[labels] + 0.6 * rng.standard_normal((size, dim)).astype(np.float32)
+
+
+def make_queries(matrix, count, seed=1):
+    # Perturbed corpus vectors, so the queries land where the data is.
+    rng = np.random.default_rng(seed)
+    picks = matrix[rng.choice(len(matrix), count, replace=False)]
+    queries = picks + 0.05 * rng.standard_normal(picks.shape).astype(np.float32)
+    return normalize_rows(queries.astype(np.float32))
+
+
+def run(backend, queries, top_k):
+    results, timings = [], []
+    for query in queries:
+        start = time.perf_counter()
+        rows, _ = backend.search(query, top_k)
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append(rows)
+    return results, np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--collection", choices=sorted(EMBEDDING_FIELDS), default="executive")
+    parser.add_argument("--synthetic", type=int, default=0, help="use N random vectors instead of Mongo")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, nargs="+", default=[0])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--pq-m", type=int, nargs="+", default=[0])
+    args = parser.parse_args()
+
+    if args.synthetic:
+        matrix = synthetic_corpus(args.synthetic)
+    else:
+        matrix = load_from_mongo(args.collection)
+    matrix = normalize_rows(np.ascontiguousarray(matrix, dtype=np.float32))
+    queries = make_queries(matrix, min(args.queries, len(matrix)))
+    print(f"Corpus: {matrix.shape[0]} x {matrix.shape[1]}, {len(queries)} queries, k={args.top_k}")
+
+    truth, p50, p99 = run(ExactBackend().build(matrix), queries, args.top_k)
+    print(f"{'backend':<32}{'recall@k':>10}{'p50 ms':>10}{'p99 ms':>10}{'build s':>10}")
+    print(f"{'exact':<32}{1.0:>10.3f}{p50:>10.2f}{p99:>10.2f}{0.0:>10.1f}")
+
+    for nlist in args.nlist:
+        for pq_m in args.pq_m:
+            start = time.perf_counter()
+            trained = IVFBackend(nlist=nlist, pq_m=pq_m).build(matrix)
+            build_time = time.perf_counter() - start
+            for nprobe in args.nprobe:
+                backend = IVFBackend(nlist=nlist, nprobe=nprobe, pq_m=pq_m)
+                backend.build(matrix, previous=trained)
+                found, p50, p99 = run(backend, queries, args.top_k)
+                recall = np.mean(
+                    [len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]
+                )
+                label = f"ivf nlist={len(trained.centroids)} nprobe={nprobe} pq={pq_m}"
+                print(f"{label:<32}{recall:>10.3f}{p50:>10.2f}{p99:>10.2f}{build_time:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
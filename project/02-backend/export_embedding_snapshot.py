@@ -0,0 +1,69 @@
+"""
+Export the search indexes to memory-mapped snapshot files.
+
+    python export_embedding_snapshot.py --output /var/lib/wtgd/snapshots
+    python export_embedding_snapshot.py --collection executive --keep 3
+
+Workers started with EMBEDDING_SNAPSHOT_DIR pointing at the same directory
+map the newest snapshot read-only instead of scanning Mongo, then catch up
+on anything that changed after the export. Re-run whenever a fresh
+baseline is wanted; older versions are pruned down to --keep.
+"""
+import argparse
+import os
+import time
+
+# A one-off job doesn't need the search indexes kept in sync.
+os.environ.setdefault("INDEX_REFRESH_ENABLED", "false")
+
+from app import create_app  # noqa: E402
+from app.services.db import get_mongo_client  # noqa: E402
+from app.services.embedding import article_index, executive_index  # noqa: E402
+from app.services.snapshot import write_snapshot  # noqa: E402
+
+INDEXES = {index.collection_name: index for index in (article_index, executive_index)}
+
+
+def watermarks(collection):
+    newest = collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    latest = collection.find_one(
+        {"updatedAt": {"$ne": None}}, {"updatedAt": 1}, sort=[("updatedAt", -1)]
+    )
+    return {
+        "max_id": newest["_id"] if newest else None,
+        "updated_since": latest["updatedAt"] if latest else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--collection", nargs="+", choices=sorted(INDEXES), default=sorted(INDEXES)
+    )
+    parser.add_argument("--output", help="snapshot directory (default EMBEDDING_SNAPSHOT_DIR)")
+    parser.add_argument("--keep", type=int, default=2, help="versions to keep per collection")
+    args = parser.parse_args()
+
+    app = create_app()
+    output = args.output or app.config["EMBEDDING_SNAPSHOT_DIR"]
+    if not output:
+        parser.error("pass --output or set EMBEDDING_SNAPSHOT_DIR")
+
+    with app.app_context():
+        for name in args.collection:
+            start = time.time()
+            collection = get_mongo_client()["WhatTheGovDoin"][name]
+            # Taken before the scan: changes racing with it get re-applied
+            # by the workers' catch-up rather than lost.
+            marks = watermarks(collection)
+            index = INDEXES[name]
+            count = index.load(collection)
+            version = write_snapshot(output, index, marks, keep=args.keep)
+            print(
+                f"✅ {name}: {count} vectors -> {os.path.join(output, name, version)} "
+                f"({time.time() - start:.1f}s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
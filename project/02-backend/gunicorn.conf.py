@@ -0,0 +1,46 @@
+"""
+gunicorn settings for production:
+
+    gunicorn -c gunicorn.conf.py run:app
+
+The app is created once in the master (preload_app) with EMBEDDING_PRELOAD
+on, so the embedding model and search indexes are loaded before forking and
+every worker shares those pages copy-on-write instead of loading its own.
+Mongo clients are recreated in each worker, and the index refresher
+threads only ever run in the workers (INDEX_REFRESH_AFTER_FORK), never in
+the master.
+
+GUNICORN_WORKER_CLASS picks how a worker serves requests:
+
+    gevent   one greenlet per request, up to GUNICORN_WORKER_CONNECTIONS
+             (default); a request waiting on Gemini or Mongo costs a
+             greenlet rather than a thread, so hundreds of summaries can be
+             in flight without starving the search and issue routes
+    gthread  a fixed pool of GUNICORN_THREADS threads
+"""
+import os
+
+os.environ.setdefault("EMBEDDING_PRELOAD", "true")
+os.environ.setdefault("INDEX_REFRESH_AFTER_FORK", "true")
+
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gevent")
+if worker_class == "gevent":
+    # Patch before preload_app imports the app, so the locks, sockets and
+    # threads it creates at import time are cooperative as well.
+    from gevent import monkey
+
+    monkey.patch_all()
+    try:
+        # Gemini calls go over gRPC, which needs its own hook to yield.
+        from grpc.experimental import gevent as grpc_gevent
+
+        grpc_gevent.init_gevent()
+    except ImportError:
+        pass
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5001")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_app = True
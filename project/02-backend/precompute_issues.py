@@ -0,0 +1,119 @@
+"""
+Fill in the issues collection offline: for every issue, retrieve the most
+relevant articles and executive orders, generate the llm_summary and write
+both back, so GET /api/issues serves finished pages.
+
+    python precompute_issues.py --workers 4 --batch-size 10
+
+Issues that already have an llm_summary are skipped unless --force is
+given, so an interrupted run picks up where it stopped.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+# A one-off job doesn't need the search indexes kept in sync.
+os.environ.setdefault("INDEX_REFRESH_ENABLED", "false")
+
+from pymongo import UpdateOne  # noqa: E402
+from app import create_app  # noqa: E402
+from app.services.db import get_mongo_client  # noqa: E402
+from app.services.embedding import (  # noqa: E402
+    get_query_embeddings,
+    similarity_search_articles,
+    similarity_search_executive,
+)
+from app.services.llm import (  # noqa: E402
+    initialize_llm_model,
+    summarize_uncached,
+    summary_cache_key,
+)
+
+PENDING_SUMMARIES = [None, "", "TBD"]
+
+
+def issue_prompt(issue):
+    # Same text the frontend sends for an issue, so the answers match
+    return f"{issue['issue']} - {issue['summary']}"
+
+
+def summarize_issue(app, llm_model, issue, query_embedding, top_k):
+    with app.app_context():
+        prompt = issue_prompt(issue)
+        # Full texts for the synopsis prompts, as retrieve_context does
+        articles = similarity_search_articles(
+            prompt, top_k, query_embedding=query_embedding, length=0
+        )
+        executives = similarity_search_executive(
+            prompt, top_k, query_embedding=query_embedding, length=0
+        )
+        key = summary_cache_key(prompt, articles, executives, llm_model.model_name)
+        result = summarize_uncached(llm_model, prompt, articles, executives, key)
+
+    # Same shape the frontend stores through POST /api/issues
+    return UpdateOne(
+        {"_id": issue["_id"]},
+        {
+            "$set": {
+                "llm_summary": result["llm_response"],
+                "articles": result["articles"],
+                "executive_orders": result["executive_orders"],
+                # Moves the collection version behind the /api/issues ETags
+                "updatedAt": datetime.utcnow(),
+            }
+        },
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=10, help="issues per bulk write")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--force", action="store_true", help="recompute finished issues too")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        issues_collection = get_mongo_client()["WhatTheGovDoin"]["issues"]
+        query = {} if args.force else {"llm_summary": {"$in": PENDING_SUMMARIES}}
+        issues = list(issues_collection.find(query, {"issue": 1, "summary": 1}))
+        if not issues:
+            print("✅ All issues already have an llm_summary.")
+            return
+
+        # One batched encode for every issue up front
+        embeddings = get_query_embeddings([issue_prompt(issue) for issue in issues])
+        llm_model = initialize_llm_model()
+
+        start, written, pending = time.time(), 0, []
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            futures = {
+                pool.submit(
+                    summarize_issue, app, llm_model, issue, embedding, args.top_k
+                ): issue
+                for issue, embedding in zip(issues, embeddings)
+            }
+            for future in as_completed(futures):
+                issue = futures[future]
+                try:
+                    pending.append(future.result())
+                except Exception as e:
+                    print(f"❌ Failed to summarize issue #{issue['_id']}: {e}")
+                    continue
+                if len(pending) >= args.batch_size:
+                    issues_collection.bulk_write(pending, ordered=False)
+                    written += len(pending)
+                    pending = []
+                    print(f"⬆️  {written}/{len(issues)} issues written")
+
+        if pending:
+            issues_collection.bulk_write(pending, ordered=False)
+            written += len(pending)
+        print(f"✅ Wrote {written}/{len(issues)} issues in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Generate and store the per-document LLM synopses for the whole corpus, so
+/api/summarize can serve them from the llm_synopses cache.
+
+    python precompute_synopses.py --collection articles executive --batch-size 50
+
+Safe to stop and re-run: documents whose synopsis is already stored for the
+current text and model are skipped, and changed documents are regenerated.
+"""
+import argparse
+import os
+import time
+
+# A one-off job doesn't need the search indexes kept in sync.
+os.environ.setdefault("INDEX_REFRESH_ENABLED", "false")
+
+from app import create_app  # noqa: E402
+from app.services.db import get_mongo_client  # noqa: E402
+from app.services.llm import (  # noqa: E402
+    add_synopses,
+    initialize_llm_model,
+    synopsis_prompt,
+)
+
+TEXT_FIELDS = {
+    "articles": ("name", "summary"),
+    "executive": ("title", "order_text"),
+}
+
+
+def document_batches(collection, name_field, text_field, batch_size):
+    batch = []
+    cursor = collection.find(
+        {text_field: {"$nin": [None, ""]}}, {name_field: 1, text_field: 1}
+    ).sort("_id", 1)
+    for doc in cursor:
+        batch.append(
+            {
+                "article_id": doc["_id"],
+                "name": doc.get(name_field, "Unnamed"),
+                "summary": doc[text_field],
+            }
+        )
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--collection", nargs="+", choices=sorted(TEXT_FIELDS), default=sorted(TEXT_FIELDS)
+    )
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        llm_model = initialize_llm_model()
+        db = get_mongo_client()["WhatTheGovDoin"]
+        for collection_name in args.collection:
+            name_field, text_field = TEXT_FIELDS[collection_name]
+            start, processed = time.time(), 0
+            for batch in document_batches(
+                db[collection_name], name_field, text_field, args.batch_size
+            ):
+                add_synopses(
+                    llm_model,
+                    [
+                        (collection_name, doc, synopsis_prompt(collection_name, doc["summary"]))
+                        for doc in batch
+                    ],
+                )
+                processed += len(batch)
+                print(f"⬆️  {collection_name}: {processed} documents checked")
+            print(
+                f"✅ {collection_name}: {processed} synopses up to date "
+                f"in {time.time() - start:.1f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
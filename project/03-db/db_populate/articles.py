@@ -1,16 +1,33 @@
-import json
 import os
 from datetime import datetime
 from pymongo import MongoClient
 from pymongo.errors import BulkWriteError
 from dotenv import load_dotenv
 
-from embedding import get_text_embedding
+from embedding import embedding_pool, get_text_embeddings
+from pipeline import (
+    content_hash,
+    iter_json_records,
+    plan_upserts,
+    run_pipeline,
+    upsert_operations,
+)
 
 load_dotenv("../env/dev.env")
 
 
-def insert_articles_from_json(json_path: str):
+def insert_articles_from_json(
+    json_path: str, batch_size=64, processes=0, chunk_size=500, checkpoint_path=None
+):
+    """
+    Stream articles from a Perigon JSON dump (array or newline-delimited)
+    into MongoDB, chunk_size records at a time. Pass checkpoint_path to be
+    able to resume an interrupted run.
+
+    Articles are upserted on their Perigon story id (source_id) and carry a
+    content_hash, so re-running over the same dump only embeds and writes
+    articles whose content changed.
+    """
     mongo_uri = os.getenv("MONGO_URI")
     mongo_user = os.getenv("MONGO_INITDB_ROOT_USERNAME")
     mongo_password = os.getenv("MONGO_INITDB_ROOT_PASSWORD")
@@ -24,10 +41,6 @@ def insert_articles_from_json(json_path: str):
     db = client["WhatTheGovDoin"]
     articles_collection = db["articles"]
 
-    # Read the JSON
-    with open(json_path, "r", encoding="utf-8") as f:
-        articles_data = json.load(f)
-
     def parse_datetime(date_str):
         try:
             return datetime.fromisoformat(date_str)
@@ -37,40 +50,76 @@ def insert_articles_from_json(json_path: str):
     def safe_strip(val):
         return val.strip() if isinstance(val, str) else ""
 
-    # Determine max existing ID so we can increment
+    # Determine max existing ID so new articles can increment from it
     last_doc = articles_collection.find_one(sort=[("_id", -1)])
     start_id = (last_doc["_id"] + 1) if last_doc else 1
+    next_id = [start_id]
+
+    def allocate_id():
+        next_id[0] += 1
+        return next_id[0] - 1
+
+    def build_docs(articles_chunk):
+        docs = []
+        for article in articles_chunk:
+            doc = {
+                "name": safe_strip(article.get("name", "")),
+                "summary": safe_strip(article.get("summary", "")),
+                "createdAt": parse_datetime(article.get("createdAt")),
+                "keyPoints": [
+                    {"point": safe_strip(kp.get("point", ""))}
+                    for kp in article.get("keyPoints", [])
+                ],
+            }
+            # Perigon story id; fall back to the content for stories without one
+            doc["source_id"] = str(article.get("id") or content_hash(doc))
+            doc["content_hash"] = content_hash(doc)
+            docs.append(doc)
 
-    records = []
-    for idx, article in enumerate(articles_data):
-        summary = safe_strip(article.get("summary", ""))
-        key_points = [
-            {"point": safe_strip(kp.get("point", ""))}
-            for kp in article.get("keyPoints", [])
-        ]
-
-        record = {
-            "_id": start_id + idx,  # 👈 incrementing ID that avoids collisions
-            "name": safe_strip(article.get("name", "")),
-            "summary": summary,
-            "summary_embedding": get_text_embedding(summary) if summary else None,
-            "createdAt": parse_datetime(article.get("createdAt")),
-            "keyPoints": key_points,
-        }
-
-        records.append(record)
-
-    if records:
+        # Skip articles we already hold with identical content
+        planned = plan_upserts(
+            articles_collection, docs, "source_id", legacy_fields=("name", "createdAt")
+        )
+
+        # Embed every non-empty summary that changed, in batches
+        to_embed = [doc for doc, _ in planned if doc["summary"]]
+        embeddings = get_text_embeddings(
+            [doc["summary"] for doc in to_embed],
+            batch_size=batch_size,
+            pool=pool,
+        )
+        for doc, embedding in zip(to_embed, embeddings):
+            doc["summary_embedding"] = embedding
+        now = datetime.utcnow()
+        for doc, _ in planned:
+            doc.setdefault("summary_embedding", None)
+            doc["updatedAt"] = now
+
+        return upsert_operations(planned, "source_id", allocate_id)
+
+    def write_docs(operations):
         try:
-            result = articles_collection.insert_many(records, ordered=False)
-            print(
-                f"✅ Inserted {len(result.inserted_ids)} new articles starting from _id={start_id}"
-            )
+            articles_collection.bulk_write(operations, ordered=False)
         except BulkWriteError as e:
-            print("⚠️ Bulk insert error:")
+            print("⚠️ Bulk upsert error:")
             for err in e.details.get("writeErrors", []):
                 print(f" - {err.get('errmsg')}")
+
+    # One worker pool for the whole run; build_docs embeds every chunk on it
+    with embedding_pool(processes) as pool:
+        inserted = run_pipeline(
+            iter_json_records(json_path),
+            build_docs,
+            write_docs,
+            chunk_size=chunk_size,
+            checkpoint_path=checkpoint_path,
+        )
+    if inserted:
+        print(
+            f"✅ Upserted {inserted} new or changed articles "
+            f"({next_id[0] - start_id} new, from _id={start_id})"
+        )
     else:
-        print("⚠️ No valid articles found in JSON.")
+        print("✅ No new or changed articles found in JSON.")
 
     client.close()
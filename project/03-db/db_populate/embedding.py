@@ -1,14 +1,76 @@
-from sentence_transformers import SentenceTransformer
+import os
+import sys
+import time
+from contextlib import contextmanager
 
-model = SentenceTransformer(
-    "all-MiniLM-L6-v2"
-)  # Use the best model for general text embeddings
+# The model loader and the embedding storage codec are shared with the
+# backend; import them straight from 02-backend/app/services.
+BACKEND_SERVICES = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "02-backend", "app", "services"
+)
+sys.path.append(BACKEND_SERVICES)
+from embedding_codec import (  # noqa: E402,F401
+    EMBEDDING_FORMATS,
+    decode_embedding,
+    embedding_format,
+    encode_embedding,
+)
+from embedding_model import get_model  # noqa: E402
 
 
 def get_text_embedding(text):
     """
     Generate text embeddings for the given text using the SentenceTransformer model.
     """
-    return model.encode(
-        text
-    ).tolist()  # Convert embedding to list for storage in MongoDB
+    return encode_embedding(get_model().encode(text))
+
+
+@contextmanager
+def embedding_pool(processes=0):
+    """
+    SentenceTransformer multi-process pool (one model copy per CPU worker)
+    for as long as the block runs, or None when processes <= 1. Open it once
+    per ingestion run and pass it to every get_text_embeddings call, so the
+    workers load the model once instead of once per chunk.
+    """
+    if not processes or processes <= 1:
+        yield None
+        return
+    model = get_model()
+    pool = model.start_multi_process_pool(["cpu"] * processes)
+    try:
+        yield pool
+    finally:
+        model.stop_multi_process_pool(pool)
+
+
+def get_text_embeddings(texts, batch_size=64, pool=None, chunk_size=1024):
+    """
+    Embed many texts at once, batch_size texts per forward pass.
+
+    With a pool from embedding_pool() the work is spread over its worker
+    processes. Progress and throughput are printed every chunk_size texts.
+    Returns one stored embedding (see encode_embedding) per text.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+
+    model = get_model()
+    embeddings = []
+    start = time.time()
+    for offset in range(0, len(texts), chunk_size):
+        chunk = texts[offset : offset + chunk_size]
+        if pool is not None:
+            vectors = model.encode_multi_process(chunk, pool, batch_size=batch_size)
+        else:
+            vectors = model.encode(chunk, batch_size=batch_size)
+        embeddings.extend(encode_embedding(vector) for vector in vectors)
+
+        elapsed = time.time() - start
+        print(
+            f"🧮 Embedded {len(embeddings)}/{len(texts)} texts "
+            f"({len(embeddings) / elapsed if elapsed else 0:.1f} texts/s)"
+        )
+
+    return embeddings
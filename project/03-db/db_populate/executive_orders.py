@@ -5,14 +5,46 @@ from datetime import datetime
 from dotenv import load_dotenv
 import os
 
-from embedding import get_text_embedding
+from embedding import embedding_pool, get_text_embeddings
+from pipeline import content_hash, plan_upserts, run_pipeline, upsert_operations
 
 # Load environment variables
 load_dotenv("../env/dev.env")
 
 
-def insert_executive_orders_from_csv(csv_path: str):
-    """Insert executive orders into MongoDB from a CSV file (single batch)."""
+def iter_csv_rows(csv_path, chunk_size):
+    """Yield CSV rows as dicts, reading chunk_size rows at a time."""
+    for df in pd.read_csv(csv_path, chunksize=chunk_size):
+        yield from df.fillna("").to_dict("records")
+
+
+def insert_executive_orders_from_csv(
+    csv_path: str, batch_size=64, processes=0, chunk_size=200, checkpoint_path=None
+):
+    """
+    Stream executive orders from a CSV file into MongoDB, chunk_size rows at
+    a time. Pass checkpoint_path to be able to resume an interrupted run.
+    """
+    return upsert_executive_orders(
+        iter_csv_rows(csv_path, chunk_size),
+        batch_size=batch_size,
+        processes=processes,
+        chunk_size=chunk_size,
+        checkpoint_path=checkpoint_path,
+    )
+
+
+def upsert_executive_orders(
+    rows, batch_size=64, processes=0, chunk_size=200, checkpoint_path=None
+):
+    """
+    Embed and upsert executive orders from any iterable of row dicts (CSV
+    rows, Federal Register API results, ...).
+
+    Orders are upserted on their EO number (source_id, falling back to the
+    Federal Register document number) and carry a content_hash, so re-runs
+    only embed and write orders whose content changed.
+    """
     # MongoDB connection setup
     mongo_uri = os.getenv("MONGO_URI")
     mongo_user = os.getenv("MONGO_INITDB_ROOT_USERNAME")
@@ -27,42 +59,82 @@ def insert_executive_orders_from_csv(csv_path: str):
     db = client["WhatTheGovDoin"]
     executive_collection = db["executive"]
 
-    # Load full CSV in memory (safe for small/medium files)
-    df = pd.read_csv(csv_path).fillna("")
-
     def parse_date(date_str):
         try:
             return pd.to_datetime(date_str).to_pydatetime()
         except Exception:
             return None
 
-    records = []
-    for idx, row in df.iterrows():
-        order_text = str(row.get("order_text", "")).strip()
-        title = str(row.get("title", "")).strip()
-
-        # Build document
-        doc = {
-            "_id": idx + 1,  # or use ObjectId automatically
-            "signing_date": parse_date(row.get("signing_date")),
-            "title": title,
-            "executive_order_number": str(row.get("executive_order_number", "")).strip()
-            or None,
-            "order_text": order_text,
-            "order_text_embedding": (
-                get_text_embedding(order_text) if order_text else None
-            ),
-        }
-
-        records.append(doc)
-
-    # Insert all records in one batch
-    try:
-        result = executive_collection.insert_many(records, ordered=False)
-        print(f"✅ Successfully inserted {len(result.inserted_ids)} executive orders.")
-    except BulkWriteError as e:
-        print("⚠️ Bulk insert encountered errors:")
-        for err in e.details.get("writeErrors", []):
-            print(f" - {err.get('errmsg')}")
+    # Determine max existing ID so new orders can increment from it
+    last_doc = executive_collection.find_one(sort=[("_id", -1)])
+    next_id = [(last_doc["_id"] + 1) if last_doc else 1]
+
+    def allocate_id():
+        next_id[0] += 1
+        return next_id[0] - 1
+
+    def build_docs(rows_chunk):
+        docs = []
+        for row in rows_chunk:
+            doc = {
+                "signing_date": parse_date(row.get("signing_date")),
+                "title": str(row.get("title") or "").strip(),
+                "executive_order_number": str(
+                    row.get("executive_order_number") or ""
+                ).strip()
+                or None,
+                "order_text": str(row.get("order_text") or "").strip(),
+            }
+            doc["source_id"] = (
+                doc["executive_order_number"]
+                or str(row.get("document_number") or "").strip()
+                or content_hash(doc)
+            )
+            doc["content_hash"] = content_hash(doc)
+            docs.append(doc)
+
+        # Skip orders we already hold with identical content
+        planned = plan_upserts(
+            executive_collection,
+            docs,
+            "source_id",
+            legacy_fields=("executive_order_number",),
+        )
+
+        # Embed every non-empty order text that changed, in batches
+        to_embed = [doc for doc, _ in planned if doc["order_text"]]
+        embeddings = get_text_embeddings(
+            [doc["order_text"] for doc in to_embed],
+            batch_size=batch_size,
+            pool=pool,
+        )
+        for doc, embedding in zip(to_embed, embeddings):
+            doc["order_text_embedding"] = embedding
+        now = datetime.utcnow()
+        for doc, _ in planned:
+            doc.setdefault("order_text_embedding", None)
+            doc["updatedAt"] = now
+
+        return upsert_operations(planned, "source_id", allocate_id)
+
+    def write_docs(operations):
+        try:
+            executive_collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            print("⚠️ Bulk upsert encountered errors:")
+            for err in e.details.get("writeErrors", []):
+                print(f" - {err.get('errmsg')}")
+
+    # One worker pool for the whole run; build_docs embeds every chunk on it
+    with embedding_pool(processes) as pool:
+        inserted = run_pipeline(
+            rows,
+            build_docs,
+            write_docs,
+            chunk_size=chunk_size,
+            checkpoint_path=checkpoint_path,
+        )
+    print(f"✅ Upserted {inserted} new or changed executive orders.")
 
     client.close()
+    return inserted
@@ -1,5 +1,6 @@
 import csv
 import os
+from datetime import datetime
 from pymongo import MongoClient
 from dotenv import load_dotenv
 
@@ -57,6 +58,7 @@ def write_issues_directly_from_csv(csv_path="../data/issues.csv"):
                 "llm_summary": "TBD",  # Placeholder for now
                 "articles": [],
                 "executive_orders": [],
+                "updatedAt": datetime.utcnow(),
             }
 
             try:
@@ -0,0 +1,77 @@
+"""
+Rewrite stored embeddings in another storage format.
+
+    python migrate_embeddings.py --format float32
+    python migrate_embeddings.py --format int8 --collection articles
+    python migrate_embeddings.py --format list      # back to BSON arrays
+
+Documents already in the target format are left alone, so the migration can
+be interrupted and re-run. content_hash does not cover embeddings, so
+migrated documents are not re-embedded by later ingestion runs.
+"""
+import argparse
+import os
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+
+from embedding import EMBEDDING_FORMATS, decode_embedding, embedding_format, encode_embedding
+
+load_dotenv("../env/dev.env")
+
+EMBEDDING_FIELDS = {
+    "articles": "summary_embedding",
+    "executive": "order_text_embedding",
+}
+
+
+def migrate_collection(collection, field, fmt, batch_size=500):
+    """Convert every embedding in field to fmt. Returns (converted, skipped)."""
+    converted = skipped = 0
+    operations = []
+    cursor = collection.find({field: {"$ne": None}}, {field: 1}, batch_size=batch_size)
+    for doc in cursor:
+        value = doc[field]
+        if embedding_format(value) == fmt:
+            skipped += 1
+            continue
+        stored = encode_embedding(decode_embedding(value), fmt)
+        operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {field: stored}}))
+        if len(operations) == batch_size:
+            collection.bulk_write(operations, ordered=False)
+            converted += len(operations)
+            operations = []
+            print(f"🔁 {collection.name}: {converted} converted")
+    if operations:
+        collection.bulk_write(operations, ordered=False)
+        converted += len(operations)
+    return converted, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--format", choices=EMBEDDING_FORMATS, required=True)
+    parser.add_argument("--collection", choices=sorted(EMBEDDING_FIELDS), nargs="+")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    mongo_uri = os.getenv("MONGO_URI")
+    mongo_user = os.getenv("MONGO_INITDB_ROOT_USERNAME")
+    mongo_password = os.getenv("MONGO_INITDB_ROOT_PASSWORD")
+
+    if not all([mongo_uri, mongo_user, mongo_password]):
+        raise ValueError("Missing MongoDB environment variables")
+
+    client = MongoClient(
+        f"{mongo_uri}?authSource=admin", username=mongo_user, password=mongo_password
+    )
+    db = client["WhatTheGovDoin"]
+    for name in args.collection or sorted(EMBEDDING_FIELDS):
+        converted, skipped = migrate_collection(
+            db[name], EMBEDDING_FIELDS[name], args.format, args.batch_size
+        )
+        print(f"✅ {name}: {converted} converted to {args.format}, {skipped} already were")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from pymongo import UpdateOne
+
+_DONE = object()
+
+
+def iter_json_records(path, read_size=1 << 20):
+    """
+    Stream records out of a JSON file without loading it whole.
+
+    Handles both a top-level JSON array (the Perigon dump) and newline
+    delimited JSON (one object per line). Only one read_size block plus the
+    record being decoded is held in memory at a time.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = f.read(read_size)
+        stripped = buffer.lstrip()
+        in_array = stripped.startswith("[")
+        pos = len(buffer) - len(stripped) + (1 if in_array else 0)
+
+        while True:
+            # Skip separators between records
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if in_array and pos < len(buffer) and buffer[pos] == "]":
+                return
+            if pos >= len(buffer):
+                more = f.read(read_size)
+                if not more:
+                    return
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The record runs past the end of the buffer; read more.
+                more = f.read(read_size)
+                if not more:
+                    raise
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+
+            yield record
+            pos = end
+            if pos > read_size:
+                buffer, pos = buffer[pos:], 0
+
+
+def content_hash(doc):
+    """Stable hash of a document's stored content (embeddings excluded)."""
+    payload = json.dumps(doc, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def plan_upserts(collection, docs, key_field, legacy_fields=()):
+    """
+    Decide which of docs actually need writing.
+
+    docs are keyed by their natural key in key_field and carry a
+    content_hash. Returns [(doc, existing_id), ...] for documents that are
+    new (existing_id None) or whose stored hash differs; unchanged ones are
+    dropped so they are neither re-embedded nor rewritten. Documents stored
+    before natural keys existed are matched on legacy_fields instead.
+    """
+    # Last occurrence wins if the source repeats a key
+    docs = list({doc[key_field]: doc for doc in docs}.values())
+    existing = {
+        found[key_field]: found
+        for found in collection.find(
+            {key_field: {"$in": [doc[key_field] for doc in docs]}},
+            {key_field: 1, "content_hash": 1},
+        )
+    }
+
+    unmatched = [doc for doc in docs if doc[key_field] not in existing]
+    legacy = {}
+    if legacy_fields and unmatched:
+        for found in collection.find(
+            {
+                key_field: {"$exists": False},
+                "$or": [{f: doc.get(f) for f in legacy_fields} for doc in unmatched],
+            },
+            {f: 1 for f in legacy_fields},
+        ):
+            legacy[tuple(found.get(f) for f in legacy_fields)] = found["_id"]
+
+    planned = []
+    for doc in docs:
+        found = existing.get(doc[key_field])
+        if found is not None:
+            if found.get("content_hash") != doc["content_hash"]:
+                planned.append((doc, found["_id"]))
+            continue
+        legacy_id = legacy.get(tuple(doc.get(f) for f in legacy_fields))
+        planned.append((doc, legacy_id))
+    return planned
+
+
+def upsert_operations(planned, key_field, allocate_id):
+    """
+    Turn plan_upserts() output into bulk UpdateOne ops. New documents get a
+    fresh numeric _id from allocate_id(); existing ones keep theirs.
+    """
+    operations = []
+    for doc, existing_id in planned:
+        if existing_id is not None:
+            operations.append(UpdateOne({"_id": existing_id}, {"$set": doc}))
+        else:
+            operations.append(
+                UpdateOne(
+                    {key_field: doc[key_field]},
+                    {"$set": doc, "$setOnInsert": {"_id": allocate_id()}},
+                    upsert=True,
+                )
+            )
+    return operations
+
+
+def read_checkpoint(checkpoint_path):
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return 0
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        return json.load(f).get("records_done", 0)
+
+
+def write_checkpoint(checkpoint_path, records_done):
+    tmp = checkpoint_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"records_done": records_done}, f)
+    os.replace(tmp, checkpoint_path)
+
+
+def run_pipeline(
+    records,
+    build_docs,
+    write_docs,
+    chunk_size=500,
+    queue_size=2,
+    checkpoint_path=None,
+):
+    """
+    Stream records through read -> build (embed) -> write in chunks.
+
+    Each stage runs in its own thread and hands chunks over through queues
+    of at most queue_size chunks, so a slow stage makes the earlier ones
+    wait (back-pressure) and memory stays bounded by roughly
+    chunk_size * (2 * queue_size + 3) records however big the input is.
+
+    build_docs(chunk) turns a list of raw records into documents;
+    write_docs(docs) persists them. With checkpoint_path set, the number of
+    input records fully written is saved after every chunk and that many
+    records are skipped when the pipeline is restarted.
+    """
+    skip = read_checkpoint(checkpoint_path)
+    if skip:
+        print(f"⏩ Resuming after {skip} already written records")
+
+    raw_chunks = queue.Queue(maxsize=queue_size)
+    doc_chunks = queue.Queue(maxsize=queue_size)
+    errors = []
+
+    def read():
+        try:
+            chunk = []
+            for i, record in enumerate(records):
+                if errors:
+                    # A later stage failed; don't read the rest of the input
+                    return
+                if i < skip:
+                    continue
+                chunk.append(record)
+                if len(chunk) == chunk_size:
+                    raw_chunks.put(chunk)
+                    chunk = []
+            if chunk:
+                raw_chunks.put(chunk)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            raw_chunks.put(_DONE)
+
+    def build():
+        chunk = None
+        try:
+            while True:
+                chunk = raw_chunks.get()
+                if chunk is _DONE or errors:
+                    break
+                doc_chunks.put((len(chunk), build_docs(chunk)))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            doc_chunks.put(_DONE)
+            # Unblock the reader if we stopped early
+            while chunk is not _DONE:
+                chunk = raw_chunks.get()
+
+    threads = [
+        threading.Thread(target=read, daemon=True),
+        threading.Thread(target=build, daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    start, done, written = time.time(), skip, 0
+    try:
+        while True:
+            item = doc_chunks.get()
+            if item is _DONE:
+                break
+            if errors:
+                continue
+            count, docs = item
+            if docs:
+                write_docs(docs)
+            done += count
+            written += len(docs)
+            if checkpoint_path:
+                write_checkpoint(checkpoint_path, done)
+            elapsed = time.time() - start
+            print(
+                f"⬆️  {done} records processed, {written} written "
+                f"({written / elapsed if elapsed else 0:.1f} docs/s)"
+            )
+    except Exception as e:
+        errors.append(e)
+        # Drain so the build thread can finish
+        while doc_chunks.get() is not _DONE:
+            pass
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return written
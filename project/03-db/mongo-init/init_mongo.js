@@ -5,15 +5,29 @@ db.createCollection("issues");
 db.createCollection("users");
 db.createCollection("executive");
 db.createCollection("articles");
+db.createCollection("llm_synopses"); // cache of per-document LLM synopses, keyed by collection:_id:model
 
 // db.createCollection("legislative");
 // db.createCollection("judicial");
 
-// Optional: Create indexes if needed (e.g., issue_id as a unique field)
-db.issues.createIndex({ issue_id: 1 }, { unique: true });
+// Documents are keyed by their integer _id; users by userid
 db.users.createIndex({ userid: 1 }, { unique: true });
-db.executive.createIndex({ article_id: 1 }, { unique: true });
-db.articles.createIndex({ article_id: 1 }, { unique: true });
+
+// Fields the similarity search can be filtered on
+db.articles.createIndex({ createdAt: -1 });
+db.executive.createIndex({ signing_date: -1 });
+db.executive.createIndex({ executive_order_number: 1 });
+
+// Polled by the backend's index refresher for changed documents
+db.articles.createIndex({ updatedAt: -1 });
+db.executive.createIndex({ updatedAt: -1 });
+
+// Newest edit, read for the collection version behind the /api/issues ETags
+db.issues.createIndex({ updatedAt: -1 });
+
+// Natural keys used by the ingestion upserts (Perigon story id / EO number)
+db.executive.createIndex({ source_id: 1 }, { unique: true, sparse: true });
+db.articles.createIndex({ source_id: 1 }, { unique: true, sparse: true });
 
 // db.legislative.createIndex({ article_id: 1 }, { unique: true });
 // db.judicial.createIndex({ article_id: 1 }, { unique: true });
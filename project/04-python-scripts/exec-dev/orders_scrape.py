@@ -2,32 +2,20 @@
     This is for new executive orders. Just to see what we have not gotten yet in the DB
 """
 import pandas as pd
-import io
 import requests
-import fitz
-import time
-
-# Function to extract text from a PDF given a URL
-def extract_pdf_text_from_url(url):
-    try:
-        # Get the PDF content from the URL
-        response = requests.get(url)
-        response.raise_for_status()  # Ensure the request was successful
-        pdf = io.BytesIO(response.content)
-        
-        # Open the PDF and extract text
-        with fitz.open(stream=pdf) as doc:
-            text = ""
-            for page in doc:
-                text += page.get_text()
-        return text
-    except Exception as e:
-        return f"Error processing URL {url}: {str(e)}"
+import os
+from pdf_fetch import add_order_texts
+
+# API endpoint for the Federal Register documents (overridable for local stubs)
+API_URL = os.getenv("FEDERAL_REGISTER_API", "https://www.federalregister.gov/api/v1/documents.json")
 
-def get_recent_ten_orders():
-    # API endpoint for the Federal Register documents
-    url = "https://www.federalregister.gov/api/v1/documents.json"
 
+def list_orders(since=None, api_url=None):
+    """
+    Metadata for every executive order, or only those signed on/after
+    `since` (YYYY-MM-DD). Follows next_page_url so nothing is cut off.
+    Returns None if the API call fails.
+    """
     params = {
     'conditions[correction]': 0,
     'conditions[presidential_document_type]': 'executive_order',
@@ -38,16 +26,29 @@ def get_recent_ten_orders():
     'order': 'executive_order',
     'per_page': 10000
     }
+    if since:
+        params['conditions[signing_date][gte]'] = since
+
+    results = []
+    url = api_url or API_URL
+    while url:
+        # Send GET request to the API
+        response = requests.get(url, params=params)
+
+        # Check if the request was successful (HTTP status code 200)
+        if response.status_code != 200:
+            print(f"Failed to retrieve data. HTTP Status code: {response.status_code}")
+            return None
+        page = response.json()
+        results.extend(page.get('results', []))
+        # next_page_url already carries the query string
+        url, params = page.get('next_page_url'), None
 
-    # Send GET request to the API
-    response = requests.get(url, params=params)
-
-    # Check if the request was successful (HTTP status code 200)
-    if response.status_code == 200:
-        new_orders = pd.DataFrame(response.json()['results'])
-        new_orders['order_text'] = new_orders['pdf_url'].apply(extract_pdf_text_from_url)
-        return new_orders
-        
-    else:
-        print(f"Failed to retrieve data. HTTP Status code: {response.status_code}")
-    
+    return pd.DataFrame(results)
+
+
+def get_recent_ten_orders():
+    new_orders = list_orders()
+    if new_orders is not None:
+        # Download + extract concurrently, reusing PDFs already in the cache
+        return add_order_texts(new_orders)
@@ -0,0 +1,155 @@
+"""
+    Concurrent download + text extraction for executive order PDFs.
+    Downloads run on a thread pool sharing one pooled, rate limited session with
+    retries; PyMuPDF extraction runs on a process pool. PDFs are cached on disk
+    by document number so re-runs only fetch what is missing.
+"""
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import fitz
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_CACHE_DIR = "pdf_cache"
+
+
+class RateLimiter:
+    """Lets at most `rate` requests start per second, across all threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        time.sleep(max(0.0, slot - now))
+
+
+def make_session(pool_size=16, retries=5):
+    """One keep-alive session with retries (honouring Retry-After) on 429/5xx."""
+    retry = Retry(
+        total=retries,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def cache_path(cache_dir, document_number, url):
+    key = document_number or hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{key}.pdf")
+
+
+class NotAPdf(ValueError):
+    """The server answered 200 with something other than a PDF."""
+
+
+def download_pdf(session, limiter, url, path, timeout=60):
+    """
+    Download url to path unless it is already cached. Returns the path.
+    Bodies that are not a PDF (e.g. an HTML error page) are never cached.
+    """
+    if os.path.exists(path):
+        return path
+    limiter.wait()
+    response = session.get(url, timeout=timeout)
+    response.raise_for_status()
+    if not response.content.lstrip()[:5].startswith(b"%PDF"):
+        content_type = response.headers.get("Content-Type", "no content type")
+        raise NotAPdf(f"{url} returned {content_type}, not a PDF")
+    tmp = path + ".part"
+    with open(tmp, "wb") as f:
+        f.write(response.content)
+    os.replace(tmp, path)
+    return path
+
+
+def extract_pdf_text(path):
+    """Text of every page in the PDF at path (runs in a worker process)."""
+    with fitz.open(path) as doc:
+        return "".join(page.get_text() for page in doc)
+
+
+def fetch_pdf_texts(
+    urls,
+    document_numbers=None,
+    cache_dir=DEFAULT_CACHE_DIR,
+    download_workers=8,
+    extract_processes=None,
+    rate=5.0,
+):
+    """
+    Download and extract every PDF in urls concurrently.
+
+    Returns a list of texts in the same order as urls. A PDF that could not
+    be downloaded or read gives None (and a warning), so an error message is
+    never mistaken for the order's text. Cached files that fail to extract
+    are deleted, so the next run downloads them again.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    document_numbers = document_numbers or [None] * len(urls)
+    session = make_session(pool_size=download_workers)
+    limiter = RateLimiter(rate)
+    texts = [None] * len(urls)
+
+    with ThreadPoolExecutor(max_workers=download_workers) as downloads, ProcessPoolExecutor(
+        max_workers=extract_processes
+    ) as extracts:
+        pending = {
+            downloads.submit(
+                download_pdf, session, limiter, url, cache_path(cache_dir, number, url)
+            ): i
+            for i, (url, number) in enumerate(zip(urls, document_numbers))
+        }
+        extracting, paths = {}, {}
+        for future in as_completed(pending):
+            i = pending[future]
+            try:
+                paths[i] = future.result()
+                extracting[extracts.submit(extract_pdf_text, paths[i])] = i
+            except Exception as e:
+                print(f"Error processing URL {urls[i]}: {str(e)}")
+
+        done = 0
+        for future in as_completed(extracting):
+            i = extracting[future]
+            try:
+                texts[i] = future.result()
+            except Exception as e:
+                print(f"Error processing URL {urls[i]}: {str(e)}")
+                try:
+                    os.remove(paths[i])
+                except OSError:
+                    pass
+            done += 1
+            if done % 100 == 0:
+                print(f"Extracted {done}/{len(extracting)} PDFs")
+
+    session.close()
+    return texts
+
+
+def add_order_texts(orders, **kwargs):
+    """Fill orders['order_text'] from orders['pdf_url'] (keyed by document_number)."""
+    numbers = (
+        orders["document_number"].tolist() if "document_number" in orders.columns else None
+    )
+    orders["order_text"] = fetch_pdf_texts(orders["pdf_url"].tolist(), numbers, **kwargs)
+    return orders
@@ -0,0 +1,146 @@
+"""
+    Incremental sync of executive orders into the `executive` collection.
+    Looks up the newest signing date we already have, asks the Federal Register
+    only for orders signed since then, and runs just the missing ones through
+    PDF extraction, embedding and upsert. Orders whose PDF could not be read
+    are recorded in a pending file, and later runs reach back to the oldest of
+    them until they are stored. Set FEDERAL_REGISTER_API to point it at a
+    local stub when testing.
+
+        python sync_orders.py            # daily run
+        python sync_orders.py --dry-run  # only list what would be added
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+from pymongo import MongoClient
+
+import orders_scrape
+from pdf_fetch import add_order_texts
+
+# Reuse the ingestion code (embedding + upsert) from 03-db/db_populate
+DB_POPULATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "03-db", "db_populate")
+sys.path.insert(0, DB_POPULATE)
+from executive_orders import upsert_executive_orders  # noqa: E402
+
+# EO number -> signing date of every order a previous run had to skip
+PENDING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sync_orders.pending.json")
+
+
+class SyncIncomplete(RuntimeError):
+    """Some orders could not be fetched; the rest were upserted."""
+
+
+def get_collection():
+    mongo_uri = os.getenv("MONGO_URI")
+    mongo_user = os.getenv("MONGO_INITDB_ROOT_USERNAME")
+    mongo_password = os.getenv("MONGO_INITDB_ROOT_PASSWORD")
+    if not all([mongo_uri, mongo_user, mongo_password]):
+        raise ValueError("Missing MongoDB environment variables")
+    client = MongoClient(f"{mongo_uri}?authSource=admin", username=mongo_user, password=mongo_password)
+    return client, client["WhatTheGovDoin"]["executive"]
+
+
+def newest_known(collection):
+    """Newest signing date in the DB (a datetime), or None when it is empty."""
+    newest = collection.find_one({"signing_date": {"$ne": None}}, {"signing_date": 1}, sort=[("signing_date", -1)])
+    return newest["signing_date"] if newest else None
+
+
+def known_since(collection, since):
+    """EO numbers already stored with a signing date on/after since (YYYY-MM-DD)."""
+    return {
+        str(doc.get("executive_order_number"))
+        for doc in collection.find(
+            {"signing_date": {"$gte": datetime.strptime(since, "%Y-%m-%d")}},
+            {"executive_order_number": 1},
+        )
+    }
+
+
+def load_pending(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_pending(path, pending):
+    if not pending:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(pending, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def sync(dry_run=False, pending_path=None):
+    pending_path = pending_path or PENDING_FILE
+    pending = load_pending(pending_path)
+    client, collection = get_collection()
+    newest = newest_known(collection)
+
+    since_param = newest.strftime("%Y-%m-%d") if isinstance(newest, datetime) else None
+    print(f"Newest order in DB signed {since_param or 'never'}; asking for anything newer")
+    if since_param and pending:
+        # Reach back far enough to retry every order a previous run skipped
+        oldest_pending = min(str(date)[:10] for date in pending.values())
+        if oldest_pending < since_param:
+            print(f"Retrying {len(pending)} skipped orders, from {oldest_pending}")
+            since_param = oldest_pending
+    known = known_since(collection, since_param) if since_param else set()
+    client.close()
+
+    orders = orders_scrape.list_orders(since=since_param)
+    if orders is None:
+        return 0
+    if orders.empty:
+        print("✅ Already up to date")
+        return 0
+
+    # The same-day orders we already hold come back too; drop them
+    orders = orders[~orders["executive_order_number"].astype(str).isin(known)]
+    print(f"{len(orders)} new executive orders")
+    if orders.empty or dry_run:
+        if orders.empty and not dry_run:
+            # Whatever was pending has been stored since
+            save_pending(pending_path, {})
+        if not orders.empty:
+            print(orders[["executive_order_number", "signing_date", "title"]].to_string(index=False))
+        return len(orders)
+
+    orders = add_order_texts(orders.reset_index(drop=True))
+    # An order whose PDF failed is left out and recorded as pending, so the
+    # next run asks for it again even once newer orders are stored
+    failed = orders["order_text"].isna()
+    if failed.any():
+        print(f"⚠️ Skipping {int(failed.sum())} orders whose PDF text could not be fetched:")
+        print(orders.loc[failed, ["executive_order_number", "pdf_url"]].to_string(index=False))
+    upserted = upsert_executive_orders(orders[~failed].fillna("").to_dict("records"))
+    save_pending(
+        pending_path,
+        {
+            str(row["executive_order_number"]): str(row["signing_date"])
+            for row in orders[failed].to_dict("records")
+        },
+    )
+    if failed.any():
+        raise SyncIncomplete(f"{int(failed.sum())} orders failed; {upserted} upserted")
+    return upserted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally sync new executive orders")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--pending-file", default=PENDING_FILE, help="where skipped orders are recorded")
+    args = parser.parse_args()
+    try:
+        sync(dry_run=args.dry_run, pending_path=args.pending_file)
+    except SyncIncomplete as e:
+        print(f"❌ {e}")
+        sys.exit(1)
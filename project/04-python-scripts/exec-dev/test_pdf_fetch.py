@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+import pdf_fetch  # noqa: E402
+
+
+def make_pdf(text):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class PdfHandler(BaseHTTPRequestHandler):
+    """
+    /ok.pdf      a PDF
+    /flaky.pdf   503 (Retry-After: 0) twice, then a PDF
+    /missing.pdf 404
+    /broken.pdf  200 with bytes that are not a PDF
+    /corrupt.pdf 200 with a PDF header but no readable document
+    """
+
+    hits = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            count = self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        if self.path == "/ok.pdf":
+            self._reply(200, make_pdf("Executive Order 14001"))
+        elif self.path == "/flaky.pdf" and count <= 2:
+            self._reply(503, b"busy", {"Retry-After": "0"})
+        elif self.path == "/flaky.pdf":
+            self._reply(200, make_pdf("Executive Order 14002"))
+        elif self.path == "/broken.pdf":
+            self._reply(200, b"this is not a pdf at all", {"Content-Type": "text/html"})
+        elif self.path == "/corrupt.pdf":
+            self._reply(200, b"%PDF-1.7\nthis is garbage")
+        else:
+            self._reply(404, b"not found")
+
+    def _reply(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    PdfHandler.hits = {}
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), PdfHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fetch_retries_and_reports_failures_as_none(server, tmp_path):
+    names = ("ok", "flaky", "missing", "broken", "corrupt")
+    urls = [f"{server}/{name}.pdf" for name in names]
+
+    texts = pdf_fetch.fetch_pdf_texts(
+        urls, ["1", "2", "3", "4", "5"], cache_dir=str(tmp_path), extract_processes=1, rate=0
+    )
+
+    assert "Executive Order 14001" in texts[0]
+    assert "Executive Order 14002" in texts[1]
+    assert texts[2:] == [None, None, None]
+    assert PdfHandler.hits["/flaky.pdf"] == 3
+    # Failed downloads and unreadable PDFs leave nothing behind in the cache
+    assert sorted(os.listdir(tmp_path)) == ["1.pdf", "2.pdf"]
+
+
+def test_failed_pdfs_are_downloaded_again_next_run(server, tmp_path):
+    urls = [f"{server}/broken.pdf", f"{server}/corrupt.pdf"]
+    for _ in range(2):
+        texts = pdf_fetch.fetch_pdf_texts(urls, ["4", "5"], cache_dir=str(tmp_path), rate=0)
+        assert texts == [None, None]
+
+    assert PdfHandler.hits == {"/broken.pdf": 2, "/corrupt.pdf": 2}
+    assert os.listdir(tmp_path) == []
+
+
+def test_download_rejects_html_error_pages(server, tmp_path):
+    path = str(tmp_path / "4.pdf")
+    session = pdf_fetch.make_session()
+    with pytest.raises(pdf_fetch.NotAPdf, match="text/html"):
+        pdf_fetch.download_pdf(session, pdf_fetch.RateLimiter(0), f"{server}/broken.pdf", path)
+    session.close()
+    assert not os.path.exists(path)
+
+
+def test_cached_pdfs_are_not_downloaded_again(server, tmp_path):
+    urls = [f"{server}/ok.pdf"]
+    first = pdf_fetch.fetch_pdf_texts(urls, ["1"], cache_dir=str(tmp_path), rate=0)
+    second = pdf_fetch.fetch_pdf_texts(urls, ["1"], cache_dir=str(tmp_path), rate=0)
+
+    assert first == second
+    assert PdfHandler.hits["/ok.pdf"] == 1
+
+
+def test_add_order_texts_keys_the_cache_by_document_number(server, tmp_path):
+    pd = pytest.importorskip("pandas")
+    orders = pd.DataFrame(
+        {"pdf_url": [f"{server}/ok.pdf", f"{server}/missing.pdf"], "document_number": ["A", "B"]}
+    )
+
+    orders = pdf_fetch.add_order_texts(orders, cache_dir=str(tmp_path), rate=0)
+
+    assert "14001" in orders.loc[0, "order_text"]
+    assert orders["order_text"].isna().tolist() == [False, True]
+    assert os.path.exists(tmp_path / "A.pdf")
+
+
+def test_rate_limiter_spaces_out_requests():
+    limiter = pdf_fetch.RateLimiter(20)
+    started = time.monotonic()
+    for _ in range(5):
+        limiter.wait()
+    # The first request goes at once, the other four 50 ms apart.
+    assert time.monotonic() - started >= 0.19
@@ -0,0 +1,215 @@
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+pytest.importorskip("pandas")
+
+import orders_scrape  # noqa: E402
+import sync_orders  # noqa: E402
+
+ORDERS = [
+    {
+        "executive_order_number": 14150 + i,
+        "document_number": f"2025-0{i}",
+        "signing_date": f"2025-01-{20 + i}",
+        "title": f"Order {14150 + i}",
+        "pdf_url": f"https://example.test/{14150 + i}.pdf",
+    }
+    for i in range(4)
+]
+
+
+class FederalRegisterHandler(BaseHTTPRequestHandler):
+    """
+    Serves ORDERS signed on/after conditions[signing_date][gte], two per
+    page, linking pages through next_page_url like the real API.
+    """
+
+    requests = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.requests.append(query)
+        since = query.get("conditions[signing_date][gte]", [""])[0]
+        page = int(query.get("page", ["1"])[0])
+        matching = [order for order in ORDERS if order["signing_date"] >= since]
+        body = {"results": matching[(page - 1) * 2 : page * 2]}
+        if page * 2 < len(matching):
+            host = f"http://{self.server.server_address[0]}:{self.server.server_address[1]}"
+            body["next_page_url"] = f"{host}{url.path}?{url.query}&page={page + 1}"
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubCollection:
+    """The two queries newest_known() makes, over a list of documents."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find_one(self, query, projection=None, sort=None):
+        docs = [doc for doc in self.docs if doc.get("signing_date") is not None]
+        return max(docs, key=lambda doc: doc["signing_date"], default=None)
+
+    def find(self, query, projection=None):
+        since = query["signing_date"]["$gte"]
+        return [doc for doc in self.docs if doc["signing_date"] >= since]
+
+
+class StubClient:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def api(monkeypatch):
+    FederalRegisterHandler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FederalRegisterHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(
+        orders_scrape, "API_URL", f"http://127.0.0.1:{httpd.server_address[1]}/documents.json"
+    )
+    yield FederalRegisterHandler.requests
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def synced(monkeypatch, tmp_path):
+    """
+    Stubs out Mongo, PDF fetching and the upsert; returns what was upserted.
+    Upserted orders are added to the stub collection, like the real upsert.
+    """
+    upserted = []
+    failing_urls = set()
+    stored = []
+
+    def add_order_texts(orders):
+        orders["order_text"] = [
+            None if url in failing_urls else f"text of {url}" for url in orders["pdf_url"]
+        ]
+        return orders
+
+    def upsert_executive_orders(rows):
+        upserted.extend(rows)
+        stored.extend(
+            {
+                "executive_order_number": str(row["executive_order_number"]),
+                "signing_date": datetime.strptime(row["signing_date"], "%Y-%m-%d"),
+            }
+            for row in rows
+        )
+        return len(rows)
+
+    def use_db(docs):
+        stored[:] = docs
+        monkeypatch.setattr(
+            sync_orders, "get_collection", lambda: (StubClient(), StubCollection(stored))
+        )
+
+    monkeypatch.setattr(sync_orders, "PENDING_FILE", str(tmp_path / "pending.json"))
+    monkeypatch.setattr(sync_orders, "add_order_texts", add_order_texts)
+    monkeypatch.setattr(sync_orders, "upsert_executive_orders", upsert_executive_orders)
+    return upserted, failing_urls, use_db
+
+
+def test_empty_db_syncs_every_order(api, synced):
+    upserted, _, use_db = synced
+    use_db([])
+
+    assert sync_orders.sync() == 4
+    assert "conditions[signing_date][gte]" not in api[0]
+    assert len(api) == 2  # followed next_page_url
+    assert [row["executive_order_number"] for row in upserted] == [14150, 14151, 14152, 14153]
+    assert upserted[0]["order_text"] == "text of https://example.test/14150.pdf"
+
+
+def test_only_orders_after_the_newest_known_are_synced(api, synced):
+    upserted, _, use_db = synced
+    use_db(
+        [
+            {"executive_order_number": "14150", "signing_date": datetime(2025, 1, 20)},
+            {"executive_order_number": "14151", "signing_date": datetime(2025, 1, 21)},
+        ]
+    )
+
+    assert sync_orders.sync() == 2
+    assert api[0]["conditions[signing_date][gte]"] == ["2025-01-21"]
+    # 14151 comes back for its own signing day but is already stored
+    assert [row["executive_order_number"] for row in upserted] == [14152, 14153]
+
+
+def test_dry_run_upserts_nothing(api, synced):
+    upserted, _, use_db = synced
+    use_db([{"executive_order_number": "14150", "signing_date": datetime(2025, 1, 20)}])
+
+    assert sync_orders.sync(dry_run=True) == 3
+    assert upserted == []
+
+
+def test_orders_whose_pdf_failed_are_left_for_the_next_run(api, synced):
+    upserted, failing_urls, use_db = synced
+    use_db([])
+    failing_urls.add("https://example.test/14152.pdf")
+
+    with pytest.raises(sync_orders.SyncIncomplete):
+        sync_orders.sync()
+
+    assert [row["executive_order_number"] for row in upserted] == [14150, 14151, 14153]
+    assert all(row["order_text"].startswith("text of") for row in upserted)
+    assert sync_orders.load_pending(sync_orders.PENDING_FILE) == {"14152": "2025-01-22"}
+
+    # 14153 is stored now, but the next run still reaches back for 14152
+    failing_urls.clear()
+    upserted.clear()
+    assert sync_orders.sync() == 1
+    assert api[-1]["conditions[signing_date][gte]"] == ["2025-01-22"]
+    assert [row["executive_order_number"] for row in upserted] == [14152]
+    assert sync_orders.load_pending(sync_orders.PENDING_FILE) == {}
+
+    # With nothing pending, runs go back to starting at the newest order
+    assert sync_orders.sync() == 0
+    assert api[-1]["conditions[signing_date][gte]"] == ["2025-01-23"]
+
+
+def test_orders_still_failing_stay_pending(api, synced):
+    upserted, failing_urls, use_db = synced
+    use_db([])
+    failing_urls.add("https://example.test/14151.pdf")
+
+    for _ in range(2):
+        with pytest.raises(sync_orders.SyncIncomplete):
+            sync_orders.sync()
+        assert sync_orders.load_pending(sync_orders.PENDING_FILE) == {"14151": "2025-01-21"}
+
+    assert api[-1]["conditions[signing_date][gte]"] == ["2025-01-21"]
+    assert [row["executive_order_number"] for row in upserted] == [14150, 14152, 14153]
+
+
+def test_failed_api_call_syncs_nothing(monkeypatch, synced):
+    upserted, _, use_db = synced
+    use_db([])
+    # A bare handler answers every GET with 501
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), BaseHTTPRequestHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(orders_scrape, "API_URL", f"http://127.0.0.1:{httpd.server_address[1]}/")
+    try:
+        assert sync_orders.sync() == 0
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    assert upserted == []
@@ -2,17 +2,71 @@ import requests
 import time
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-API_KEY = "your_api_key_here"
-BASE_URL = "https://api.goperigon.com/v1/stories/all"
-OUTPUT_FILE = "perigon_us_politics_2025.json"
+API_KEY = os.getenv("PERIGON_API_KEY", "your_api_key_here")
+BASE_URL = os.getenv("PERIGON_BASE_URL", "https://api.goperigon.com/v1/stories/all")
+# Newline-delimited JSON: one story per line, readable by the articles ingester
+OUTPUT_FILE = "perigon_us_politics_2025.ndjson"
+CHECKPOINT_FILE = OUTPUT_FILE + ".pages"
+PAGE_SIZE = 100
 
-def safe_request(url, params, max_retries=5):
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts up to `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def retry_after_seconds(response, default):
+    """Seconds to wait from a Retry-After header (delta or HTTP date), else default."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        from email.utils import parsedate_to_datetime
+
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return default
+
+
+def safe_request(url, params, max_retries=5, session=None, limiter=None):
+    http = session or requests
     for attempt in range(max_retries):
-        response = requests.get(url, params=params)
-        if response.status_code == 429:
+        if limiter:
+            limiter.acquire()
+        try:
+            response = http.get(url, params=params, timeout=30)
+        except requests.RequestException as e:
             wait_time = 2 ** attempt
-            print(f"Rate limited (429). Retrying in {wait_time} seconds...")
+            print(f"Request failed ({e}). Retrying in {wait_time} seconds...")
+            time.sleep(wait_time)
+            continue
+        if response.status_code == 429 or response.status_code >= 500:
+            wait_time = retry_after_seconds(response, 2 ** attempt)
+            print(f"Got {response.status_code}. Retrying in {wait_time:.1f} seconds...")
             time.sleep(wait_time)
         elif response.status_code != 200:
             print(f"Error {response.status_code}: {response.text}")
@@ -21,52 +75,74 @@ def safe_request(url, params, max_retries=5):
             return response
     raise Exception("Too many failed attempts. Aborting.")
 
-def fetch_all_stories():
-    all_stories = []
-    page = 1
 
-    # Initial request to get total results
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return {int(line) for line in f if line.strip()}
+
+
+def fetch_all_stories(output_path=OUTPUT_FILE, checkpoint_path=CHECKPOINT_FILE, workers=4, rate=2.0):
+    """
+    Fetch every page concurrently (at most `workers` in flight, `rate`
+    requests/second overall) and append each page's stories to output_path
+    as soon as it arrives. Completed page numbers go to checkpoint_path, so a
+    re-run after a crash only fetches the pages that are still missing.
+    Returns the number of stories written in this run.
+    """
     base_params = {
         "category": "Politics",
         "from": "2025-01-01T00:00:00",
-        "size": 100,
+        "size": PAGE_SIZE,
         "country": "us",
         "topic": "US Politics",
         "sortBy": "count",
         "showNumResults": "true",
         "apiKey": API_KEY,
     }
+    session = requests.Session()
+    session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=workers))
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=workers))
+    limiter = TokenBucket(rate, burst=workers)
 
     print("Getting total number of results...")
-    initial = safe_request(BASE_URL, {**base_params, "page": 1}).json()
+    initial = safe_request(BASE_URL, {**base_params, "page": 1}, session=session, limiter=limiter).json()
     total_results = initial.get("numResults", 0)
-    total_pages = (total_results + 99) // 100
+    total_pages = (total_results + PAGE_SIZE - 1) // PAGE_SIZE
     print(f"Total results: {total_results} (~{total_pages} pages)")
 
-    # Start pagination
-    while page <= total_pages:
-        print(f"⬇️  Fetching page {page}/{total_pages}...")
-        params = {**base_params, "page": page}
-        response = safe_request(BASE_URL, params)
-
-        data = response.json()
-        stories = data.get("results", [])
+    done_pages = load_checkpoint(checkpoint_path)
+    todo = [page for page in range(1, total_pages + 1) if page not in done_pages]
+    if done_pages:
+        print(f"Resuming: {len(done_pages)} pages already saved, {len(todo)} to go")
 
-        if not stories:
-            print("No stories found on this page. Stopping early.")
-            break
+    def fetch_page(page):
+        if page == 1:
+            return initial
+        return safe_request(BASE_URL, {**base_params, "page": page}, session=session, limiter=limiter).json()
 
-        all_stories.extend(stories)
-        page += 1
-        time.sleep(0.5)  # Prevent burst rate issues
+    written = 0
+    with open(output_path, "a", encoding="utf-8") as out, open(
+        checkpoint_path, "a", encoding="utf-8"
+    ) as checkpoint, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch_page, page): page for page in todo}
+        for future in as_completed(futures):
+            page = futures[future]
+            stories = future.result().get("results", [])
+            for story in stories:
+                out.write(json.dumps(story, ensure_ascii=False) + "\n")
+            out.flush()
+            # Only mark the page done once its stories are safely on disk
+            checkpoint.write(f"{page}\n")
+            checkpoint.flush()
+            written += len(stories)
+            print(f"⬇️  Page {page}/{total_pages}: {len(stories)} stories")
 
-    return all_stories
+    session.close()
+    print(f"Saved {written} stories to {os.path.abspath(output_path)}")
+    return written
 
-def save_to_json(data, path):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    print(f"Saved {len(data)} stories to {os.path.abspath(path)}")
 
 if __name__ == "__main__":
-    stories = fetch_all_stories()
-    save_to_json(stories, OUTPUT_FILE)
\ No newline at end of file
+    fetch_all_stories()
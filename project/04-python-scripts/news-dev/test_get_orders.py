@@ -0,0 +1,169 @@
+import json
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import get_orders
+
+TOTAL_STORIES = 5  # three pages of two
+
+
+class PerigonHandler(BaseHTTPRequestHandler):
+    """
+    Serves TOTAL_STORIES stories, `size` per page. A page in `failing`
+    answers 503 (Retry-After: 0) that many more times.
+    """
+
+    pages = []
+    failing = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        page, size = int(query["page"][0]), int(query["size"][0])
+        with self.lock:
+            self.pages.append(page)
+            failed = self.failing.get(page, 0) > 0
+            if failed:
+                self.failing[page] -= 1
+        if failed:
+            self._reply(503, {"error": "busy"}, {"Retry-After": "0"})
+            return
+        first = (page - 1) * size
+        stories = [{"id": f"story-{i}"} for i in range(first, min(first + size, TOTAL_STORIES))]
+        self._reply(200, {"numResults": TOTAL_STORIES, "results": stories})
+
+    def _reply(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def perigon(monkeypatch):
+    PerigonHandler.pages = []
+    PerigonHandler.failing = {}
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), PerigonHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(get_orders, "BASE_URL", f"http://127.0.0.1:{httpd.server_address[1]}/stories")
+    monkeypatch.setattr(get_orders, "PAGE_SIZE", 2)
+    yield PerigonHandler
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class StubResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+def read_ids(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["id"] for line in f]
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    bucket = get_orders.TokenBucket(rate=20, burst=2)
+    started = time.monotonic()
+    bucket.acquire()
+    bucket.acquire()
+    assert time.monotonic() - started < 0.04
+
+    for _ in range(4):
+        bucket.acquire()
+    # Four more tokens at 20/s take at least 200 ms to refill.
+    assert time.monotonic() - started >= 0.19
+
+
+def test_token_bucket_paces_across_threads():
+    bucket = get_orders.TokenBucket(rate=50, burst=1)
+    started = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(11)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.monotonic() - started >= 0.19
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({}, 7),
+        ({"Retry-After": "3"}, 3.0),
+        ({"Retry-After": "1.5"}, 1.5),
+        ({"Retry-After": "-4"}, 0.0),
+        ({"Retry-After": "soon"}, 7),
+        ({"Retry-After": formatdate(time.time() - 60, usegmt=True)}, 0.0),
+    ],
+)
+def test_retry_after_seconds(headers, expected):
+    assert get_orders.retry_after_seconds(StubResponse(headers), 7) == expected
+
+
+def test_retry_after_seconds_reads_http_dates():
+    header = formatdate(time.time() + 30, usegmt=True)
+    wait = get_orders.retry_after_seconds(StubResponse({"Retry-After": header}), 7)
+    assert 28 <= wait <= 30
+
+
+def test_safe_request_retries_until_the_server_recovers(perigon):
+    perigon.failing = {1: 2}
+
+    response = get_orders.safe_request(get_orders.BASE_URL, {"page": 1, "size": 2})
+
+    assert response.status_code == 200
+    assert perigon.pages == [1, 1, 1]
+
+
+def test_safe_request_gives_up_after_max_retries(perigon):
+    perigon.failing = {1: 10}
+
+    with pytest.raises(Exception, match="Too many failed attempts"):
+        get_orders.safe_request(get_orders.BASE_URL, {"page": 1, "size": 2}, max_retries=3)
+    assert perigon.pages == [1, 1, 1]
+
+
+def test_fetch_all_stories_writes_every_page_once(perigon, tmp_path):
+    output, checkpoint = tmp_path / "stories.ndjson", tmp_path / "pages"
+
+    assert get_orders.fetch_all_stories(str(output), str(checkpoint), workers=2, rate=100) == 5
+
+    assert sorted(read_ids(output)) == [f"story-{i}" for i in range(5)]
+    assert get_orders.load_checkpoint(str(checkpoint)) == {1, 2, 3}
+    # Page 1 doubles as the request for the total and is not fetched twice.
+    assert sorted(perigon.pages) == [1, 2, 3]
+
+
+def test_interrupted_fetch_resumes_from_the_checkpoint(perigon, tmp_path):
+    output, checkpoint = tmp_path / "stories.ndjson", tmp_path / "pages"
+    perigon.failing = {3: 5}
+
+    with pytest.raises(Exception, match="Too many failed attempts"):
+        get_orders.fetch_all_stories(str(output), str(checkpoint), workers=2, rate=100)
+    # Page 2 may or may not have landed before page 3 gave up.
+    done = get_orders.load_checkpoint(str(checkpoint))
+    assert 1 in done and 3 not in done
+    missing = sorted({2, 3} - done)
+
+    perigon.pages = []
+    written = get_orders.fetch_all_stories(str(output), str(checkpoint), workers=2, rate=100)
+
+    assert written == (3 if 2 in missing else 1)
+    # Only the total (page 1) and the missing pages were requested again.
+    assert sorted(perigon.pages) == [1] + missing
+    assert sorted(read_ids(output)) == [f"story-{i}" for i in range(5)]
+    assert get_orders.load_checkpoint(str(checkpoint)) == {1, 2, 3}